@@ -18,13 +18,26 @@ export DISPLAY=:99
 echo -e "${BLUE}🐳 Docker QA Test Container${NC}"
 echo "==========================="
 echo "Environment: Docker"
-echo "Chrome: $(chromium --version 2>/dev/null || echo 'Not available')"
-echo "Python: $(python --version)"
-echo "Pytest: $(python -m pytest --version)"
+if command -v chromium &> /dev/null; then
+    echo "Chrome: $(chromium --version 2>/dev/null)"
+else
+    echo "Chrome: Not available (API-only image)"
+fi
+# Версии Python и pytest одним процессом (быстрее старт контейнера)
+python -c 'import sys, pytest; print(f"Python: {sys.version.split()[0]}\nPytest: {pytest.__version__}")'
 echo ""
 
 # Default report options for all test runs
-REPORT_ARGS="--html=/app/reports/report.html --self-contained-html --junit-xml=/app/reports/junit.xml"
+REPORT_ARGS="--html=/app/reports/report.html --self-contained-html --junit-xml=/app/reports/junit.xml --http-report=/app/reports/http_calls.json"
+
+# UI тесты: воркер xdist на ядро, у каждого свой браузер (SELENIUM_HUB - браузеры в Grid)
+UI_WORKERS="${UI_WORKERS:-auto}"
+
+# Доступность внешних API (httpbin.org) из контейнера: без сети test_api.py
+# работает в OFFLINE_MODE
+internet_available() {
+    curl -s --max-time 5 https://httpbin.org/get > /dev/null 2>&1
+}
 
 # Function to run tests with reports
 run_docker_tests() {
@@ -42,12 +55,14 @@ run_docker_tests() {
         echo "📊 Reports generated:"
         echo "  - HTML: /app/reports/report.html"
         echo "  - JUnit: /app/reports/junit.xml"
+        echo "  - HTTP calls: /app/reports/http_calls.json"
         return 0
     else
         echo -e "${RED}❌ $test_type tests failed!${NC}"
         echo "📊 Reports generated (with failures):"
         echo "  - HTML: /app/reports/report.html"
         echo "  - JUnit: /app/reports/junit.xml"
+        echo "  - HTTP calls: /app/reports/http_calls.json"
         return 1
     fi
 }
@@ -69,7 +84,7 @@ case "$TEST_MODE" in
         
         # Then try remote API tests
         echo -e "\n${YELLOW}Attempting remote API tests...${NC}"
-        if curl -s --max-time 5 https://httpbin.org/get > /dev/null 2>&1; then
+        if internet_available; then
             echo -e "${GREEN}✅ Internet connection available in container${NC}"
             run_docker_tests "Remote API" "tests/test_api.py -v"
         else
@@ -86,12 +101,15 @@ case "$TEST_MODE" in
         
     "ui")
         echo "🖥️ Running UI tests in Docker container"
-        echo "Using headless Chrome in container environment"
+        echo "Workers: $UI_WORKERS (one reusable browser per worker)"
         
         # Verify Chrome is available
-        if command -v chromium &> /dev/null; then
+        if [ -n "$SELENIUM_HUB" ]; then
+            echo -e "${GREEN}✅ Using Selenium Grid: $SELENIUM_HUB${NC}"
+            run_docker_tests "UI" "tests/test_ui.py -v -n $UI_WORKERS"
+        elif command -v chromium &> /dev/null; then
             echo -e "${GREEN}✅ Chromium detected: $(chromium --version)${NC}"
-            run_docker_tests "UI" "tests/test_ui.py -v"
+            run_docker_tests "UI" "tests/test_ui.py -v -n $UI_WORKERS"
         else
             echo -e "${RED}❌ Chrome/Chromium not available in container${NC}"
             echo "UI tests cannot run without a browser"
@@ -118,7 +136,7 @@ case "$TEST_MODE" in
         
         # Step 2: Remote API tests (if internet available)
         echo -e "\n${BLUE}Step 2/3: Remote API tests${NC}"
-        if curl -s --max-time 5 https://httpbin.org/get > /dev/null 2>&1; then
+        if internet_available; then
             echo -e "${GREEN}✅ Internet connection available${NC}"
             run_docker_tests "Remote API" "tests/test_api.py -v"
         else
@@ -131,22 +149,62 @@ case "$TEST_MODE" in
         echo -e "\n${BLUE}Step 3/3: UI tests${NC}"
         if command -v chromium &> /dev/null; then
             echo -e "${GREEN}✅ Chromium detected, running UI tests${NC}"
-            run_docker_tests "UI" "tests/test_ui.py -v" || echo -e "${YELLOW}⚠️ UI tests failed, but continuing...${NC}"
+            run_docker_tests "UI" "tests/test_ui.py -v -n $UI_WORKERS" || echo -e "${YELLOW}⚠️ UI tests failed, but continuing...${NC}"
         else
             echo -e "${YELLOW}⚠️ Chrome not available, skipping UI tests${NC}"
         fi
         ;;
         
+    "shard")
+        # Один шард из SHARD_COUNT (например, элемент matrix в CI)
+        SHARD_INDEX="${SHARD_INDEX:-0}"
+        SHARD_COUNT="${SHARD_COUNT:-1}"
+        echo "🧩 Running shard $SHARD_INDEX of $SHARD_COUNT"
+        echo "Durations history: ${TEST_DURATIONS_FILE:-.test_durations.json}"
+        
+        # Как в режимах api/all: без сети test_api.py работает в OFFLINE_MODE
+        if internet_available; then
+            echo -e "${GREEN}✅ Internet connection available${NC}"
+        else
+            echo -e "${YELLOW}⚠️ No internet connection, running API tests in offline mode${NC}"
+            export OFFLINE_MODE=true
+        fi
+        
+        # Образ api без браузера: UI-тесты не попадают в шарды. Набор тестов
+        # одинаков во всех шардах, потому что шарды запускаются из одного образа
+        SHARD_TESTS="tests/"
+        if [ -z "$SELENIUM_HUB" ] && ! command -v chromium &> /dev/null; then
+            echo -e "${YELLOW}⚠️ Chrome not available, UI tests excluded from shards${NC}"
+            SHARD_TESTS="tests/ --ignore=tests/test_ui.py"
+        fi
+        
+        REPORT_ARGS="--junit-xml=/app/reports/shards/junit-$SHARD_INDEX.xml \
+            --record-durations=/app/reports/shards/durations-$SHARD_INDEX.json"
+        mkdir -p /app/reports/shards
+        run_docker_tests "Shard $SHARD_INDEX" "$SHARD_TESTS -v --shard-index=$SHARD_INDEX --shard-count=$SHARD_COUNT"
+        ;;
+        
+    "merge")
+        echo "🔗 Merging shard reports from /app/reports/shards"
+        python src/sharding.py merge \
+            --junit "/app/reports/shards/junit-*.xml" \
+            --durations "/app/reports/shards/durations-*.json" \
+            --output /app/reports/junit.xml \
+            --summary /app/reports/shards-summary.json
+        ;;
+        
     "help"|"--help"|"-h")
         echo -e "${BLUE}Docker Test Container Usage${NC}"
         echo ""
         echo "Available test modes:"
         echo "  api         - Run API tests (local + remote if internet available)"
         echo "  api-local   - Run local API tests only (offline, with mocking)"
-        echo "  ui          - Run UI tests (requires Chrome in container)"
+        echo "  ui          - Run UI tests (Chrome in container or SELENIUM_HUB, UI_WORKERS workers)"
         echo "  smoke       - Run smoke tests only"
         echo "  fast        - Run fast tests only (local API)"
         echo "  all         - Run full test suite (default)"
+        echo "  shard       - Run one shard (SHARD_INDEX, SHARD_COUNT env)"
+        echo "  merge       - Merge shard reports and update durations history"
         echo "  help        - Show this help message"
         echo ""
         echo "Docker run examples:"
@@ -162,7 +220,7 @@ case "$TEST_MODE" in
         
     *)
         echo -e "${RED}❌ Unknown test mode: $TEST_MODE${NC}"
-        echo "Available modes: api, api-local, ui, smoke, fast, all, help"
+        echo "Available modes: api, api-local, ui, smoke, fast, all, shard, merge, help"
         echo "Use 'help' to see detailed usage information"
         exit 1
         ;;
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""Бенчмарк образов с тестами: размер и время до первого теста
+
+Собирает варианты образа (цели Dockerfile), измеряет размер образа и время
+от `docker run` до первого результата теста, сравнивает с сохраненным
+baseline (benchmarks/image_startup.json) и сообщает о регрессиях.
+
+    python scripts/benchmark_image.py                 # измерить и сравнить
+    python scripts/benchmark_image.py --update        # обновить baseline
+    python scripts/benchmark_image.py --check         # код 1 при росте размера или без baseline
+
+Baseline коммитится в репозиторий. Блокирует только размер образа: он
+детерминирован для одних и тех же слоев. Время старта на общих runner'ах
+CI шумит, поэтому его изменение выводится в отчет, но проверку не валит.
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE_FILE = os.path.join(PROJECT_DIR, "benchmarks", "image_startup.json")
+IMAGE_NAME = "qa-tests"
+# Строка pytest -v с результатом теста
+RESULT_LINE = re.compile(r"\s(PASSED|FAILED|SKIPPED|ERROR)\b")
+# Метрика -> блокирует ли ее рост проверку
+METRICS = {"size_mb": True, "time_to_first_test_s": False, "total_run_s": False}
+
+
+def build_image(variant: str) -> str:
+    """Собрать вариант образа и вернуть тег"""
+    tag = f"{IMAGE_NAME}:{variant}"
+    subprocess.run(
+        ["docker", "build", "--target", variant, "-t", tag, PROJECT_DIR],
+        check=True, stdout=subprocess.DEVNULL
+    )
+    return tag
+
+
+def image_size_mb(tag: str) -> float:
+    """Размер образа в МБ"""
+    output = subprocess.run(
+        ["docker", "image", "inspect", "-f", "{{.Size}}", tag],
+        check=True, capture_output=True, text=True
+    ).stdout
+    return round(int(output.strip()) / 1024 / 1024, 1)
+
+
+def measure_startup(tag: str) -> dict:
+    """Время до первого результата теста и полное время прогона (секунды)"""
+    started = time.perf_counter()
+    first_test = None
+    process = subprocess.Popen(
+        ["docker", "run", "--rm", "-e", "OFFLINE_MODE=true", tag, "fast"],
+        stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True
+    )
+    for line in process.stdout:
+        if first_test is None and RESULT_LINE.search(line):
+            first_test = time.perf_counter() - started
+    process.wait()
+    total = time.perf_counter() - started
+
+    if first_test is None:
+        raise RuntimeError(f"{tag}: no test results in output (exit code {process.returncode})")
+    return {"time_to_first_test_s": first_test, "total_run_s": total}
+
+
+def benchmark(variant: str, runs: int, skip_build: bool) -> dict:
+    tag = f"{IMAGE_NAME}:{variant}" if skip_build else build_image(variant)
+    samples = [measure_startup(tag) for _ in range(runs)]
+    return {
+        "size_mb": image_size_mb(tag),
+        "time_to_first_test_s": round(statistics.median(s["time_to_first_test_s"] for s in samples), 3),
+        "total_run_s": round(statistics.median(s["total_run_s"] for s in samples), 3),
+        "runs": runs,
+    }
+
+
+def load_baseline() -> dict:
+    try:
+        with open(BASELINE_FILE, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def compare(results: dict, baseline: dict, size_threshold: float, time_threshold: float) -> tuple:
+    """Вывести таблицу сравнения и вернуть (регрессии размера, заметные изменения времени)"""
+    regressions, slowdowns = [], []
+    print(f"{'variant':<8} {'metric':<22} {'baseline':>10} {'current':>10} {'change':>8}")
+    for variant, metrics in results.items():
+        previous = baseline.get("variants", {}).get(variant, {})
+        for metric, blocking in METRICS.items():
+            current = metrics[metric]
+            before = previous.get(metric)
+            if before:
+                change = (current - before) / before
+                threshold = size_threshold if blocking else time_threshold
+                mark = (" !" if blocking else " ~") if change > threshold else ""
+                print(f"{variant:<8} {metric:<22} {before:>10} {current:>10} {change:>+7.0%}{mark}")
+                if change > threshold:
+                    (regressions if blocking else slowdowns).append(f"{variant}.{metric}: {before} -> {current}")
+            else:
+                print(f"{variant:<8} {metric:<22} {'-':>10} {current:>10} {'new':>8}")
+    return regressions, slowdowns
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Бенчмарк размера и старта образов с тестами")
+    parser.add_argument("--variants", nargs="+", default=["api", "ui"])
+    parser.add_argument("--runs", type=int, default=3, help="Количество запусков (берется медиана)")
+    parser.add_argument("--skip-build", action="store_true", help="Использовать уже собранные образы")
+    parser.add_argument("--threshold", type=float, default=0.1, help="Допустимый рост размера образа (доля)")
+    parser.add_argument("--time-threshold", type=float, default=0.5,
+                        help="Рост времени старта, о котором сообщать (доля, не блокирует)")
+    parser.add_argument("--update", action="store_true", help="Записать результаты как новый baseline")
+    parser.add_argument("--check", action="store_true", help="Вернуть код 1 при росте размера образа")
+    parser.add_argument("--json", help="Записать текущие замеры и сравнение в JSON (отчет CI)")
+    args = parser.parse_args()
+
+    baseline = load_baseline()
+    if args.check and not args.update and not baseline:
+        # Без baseline сравнивать не с чем: молча пройти проверку нельзя
+        print(f"Baseline not found: {BASELINE_FILE}. Record it with --update")
+        return 1
+
+    results = {variant: benchmark(variant, args.runs, args.skip_build) for variant in args.variants}
+    regressions, slowdowns = compare(results, baseline, args.threshold, args.time_threshold)
+
+    if args.json:
+        os.makedirs(os.path.dirname(os.path.abspath(args.json)), exist_ok=True)
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"baseline": baseline.get("variants", {}), "current": results,
+                       "regressions": regressions, "slowdowns": slowdowns}, f, indent=2)
+
+    if args.update:
+        os.makedirs(os.path.dirname(BASELINE_FILE), exist_ok=True)
+        with open(BASELINE_FILE, "w", encoding="utf-8") as f:
+            json.dump({
+                "recorded_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                "variants": results,
+            }, f, indent=2)
+            f.write("\n")
+        print(f"Baseline updated: {BASELINE_FILE}")
+
+    if slowdowns:
+        print("Startup time above threshold (not blocking, runners are noisy):")
+        for slowdown in slowdowns:
+            print(f"  - {slowdown}")
+
+    if regressions:
+        print("Image size regressions above threshold:")
+        for regression in regressions:
+            print(f"  - {regression}")
+        return 1 if args.check else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
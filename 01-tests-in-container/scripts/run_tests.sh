@@ -49,8 +49,9 @@ case "${1:-all}" in
         ;;
         
     "ui")
-        echo "🖥️ Running UI tests"
-        run_tests "UI" "tests/test_ui.py -v" || echo -e "${YELLOW}⚠️ UI tests may fail without Chrome setup${NC}"
+        # Воркер xdist на ядро, у каждого свой браузер; SELENIUM_HUB - браузеры в Grid
+        echo "🖥️ Running UI tests (${UI_WORKERS:-auto} workers)"
+        run_tests "UI" "tests/test_ui.py -v -n ${UI_WORKERS:-auto}" || echo -e "${YELLOW}⚠️ UI tests may fail without Chrome setup${NC}"
         ;;
         
     "smoke")
@@ -89,6 +90,42 @@ case "${1:-all}" in
         fi
         ;;
         
+    "sharded")
+        SHARD_COUNT="${2:-$(nproc 2>/dev/null || echo 2)}"
+        SHARDS_DIR="reports/shards"
+        echo "🧩 Running all tests in $SHARD_COUNT shards (balanced by previous durations)"
+        
+        rm -rf "$SHARDS_DIR" && mkdir -p "$SHARDS_DIR"
+        pids=()
+        for ((i = 0; i < SHARD_COUNT; i++)); do
+            python -m pytest tests/ -q \
+                --shard-index=$i --shard-count=$SHARD_COUNT \
+                --junit-xml="$SHARDS_DIR/junit-$i.xml" \
+                --record-durations="$SHARDS_DIR/durations-$i.json" \
+                > "$SHARDS_DIR/shard-$i.log" 2>&1 &
+            pids+=($!)
+        done
+        
+        failed=0
+        for i in "${!pids[@]}"; do
+            if wait "${pids[$i]}"; then
+                echo -e "${GREEN}✅ Shard $i passed${NC}"
+            else
+                echo -e "${RED}❌ Shard $i failed (see $SHARDS_DIR/shard-$i.log)${NC}"
+                failed=1
+            fi
+        done
+        
+        # Сливаем отчеты и обновляем историю длительностей
+        python src/sharding.py merge \
+            --junit "$SHARDS_DIR/junit-*.xml" \
+            --durations "$SHARDS_DIR/durations-*.json" \
+            --output reports/junit.xml \
+            --summary reports/shards-summary.json || failed=1
+        
+        exit $failed
+        ;;
+        
     "help"|"--help"|"-h")
         echo -e "\n${BLUE}Usage: ./run_tests.sh [mode]${NC}"
         echo ""
@@ -96,16 +133,18 @@ case "${1:-all}" in
         echo "  api         - Run API tests (requires internet)"
         echo "  api-local   - Run local API tests (offline, with mocking)"
         echo "  api-offline - Force API tests to run in offline mode"
-        echo "  ui          - Run UI tests (requires Chrome)"
+        echo "  ui          - Run UI tests in parallel (requires Chrome or SELENIUM_HUB, UI_WORKERS)"
         echo "  smoke       - Run smoke tests only"
         echo "  fast        - Run fast tests only"
         echo "  all         - Run all applicable tests (default)"
+        echo "  sharded [N] - Run all tests in N parallel shards balanced by duration"
         echo "  help        - Show this help message"
         echo ""
         echo "Examples:"
         echo "  ./run_tests.sh api-local    # Run only mocked API tests"
         echo "  ./run_tests.sh fast         # Quick test run"
         echo "  ./run_tests.sh all          # Full test suite"
+        echo "  ./run_tests.sh sharded 4    # 4 parallel shards + merged report"
         echo ""
         exit 0
         ;;
@@ -1,13 +1,17 @@
 import requests
+from requests.adapters import BaseAdapter
 from typing import List, Dict, Optional
 
 
 class JSONPlaceholderClient:
     """Клиент для работы с JSONPlaceholder API"""
     
-    def __init__(self, base_url: str):
+    def __init__(self, base_url: str, transport: Optional[BaseAdapter] = None):
         self.base_url = base_url.rstrip('/')
         self.session = requests.Session()
+        # Подключаемый транспорт (например, InMemoryAdapter для тестов без сети)
+        if transport is not None:
+            self.session.mount(self.base_url, transport)
         self.session.headers.update({
             'Content-Type': 'application/json',
             'User-Agent': 'QA-APIClient/1.0'
@@ -0,0 +1,140 @@
+"""Браузеры для воркеров pytest-xdist: локальный пул или Selenium Grid
+
+Каждый воркер xdist (отдельный процесс) держит один долгоживущий браузер -
+BrowserSlot - и переиспользует его между тестами вместо запуска Chrome на
+каждый тест. Так `pytest -n N` дает пул из N headless Chrome:
+
+- локально - у каждого воркера свой chromedriver и Chrome (порт отладки
+  смещен на номер воркера, браузеры не конфликтуют);
+- удаленно - SELENIUM_HUB (`http://localhost:4444/wd/hub`, список через
+  запятую распределяется по воркерам), например локальный grid из
+  docker-compose.grid.yml.
+
+Перед выдачей браузер проверяется (health check), между тестами
+очищаются cookies и storage, а после recycle_after тестов или упавшего
+теста браузер пересоздается. Если браузер не запускается, ошибка
+запоминается и следующие тесты воркера пропускаются сразу.
+
+Модуль без зависимостей от selenium: драйвер создает factory из conftest.py.
+"""
+import json
+import os
+import time
+import urllib.request
+from typing import Callable, List, Optional
+
+DEFAULT_RECYCLE_AFTER = 50
+DEBUGGING_PORT = 9222
+
+RESET_SCRIPT = "window.localStorage.clear(); window.sessionStorage.clear();"
+
+
+def worker_index(environ=os.environ) -> int:
+    """Номер воркера xdist (gw3 -> 3), 0 без xdist"""
+    worker = environ.get("PYTEST_XDIST_WORKER", "gw0")
+    return int(worker[2:]) if worker[2:].isdigit() else 0
+
+
+def hub_urls(value: Optional[str]) -> List[str]:
+    """Адреса hub'ов из SELENIUM_HUB (через запятую)"""
+    return [url.strip().rstrip("/") for url in (value or "").split(",") if url.strip()]
+
+
+def assign_hub(urls: List[str], worker: int) -> str:
+    """Hub воркера: воркеры распределяются по hub'ам по кругу"""
+    return urls[worker % len(urls)]
+
+
+def hub_status(url: str, timeout: float = 5.0) -> dict:
+    """Ответ /status hub'а (Selenium 4: value.ready, value.message)"""
+    with urllib.request.urlopen(f"{url}/status", timeout=timeout) as response:
+        return json.load(response).get("value", {})
+
+
+def wait_for_hub(url: str, timeout: float = 60.0, interval: float = 1.0) -> dict:
+    """Дождаться готовности hub'а (есть свободные узлы); TimeoutError по истечении timeout"""
+    deadline = time.monotonic() + timeout
+    last_error = None
+    while True:
+        try:
+            status = hub_status(url)
+            if status.get("ready"):
+                return status
+            last_error = status.get("message", "not ready")
+        except (OSError, ValueError) as e:
+            last_error = e
+        if time.monotonic() >= deadline:
+            raise TimeoutError(f"Selenium hub {url} not ready in {timeout}s: {last_error}")
+        time.sleep(interval)
+
+
+def is_healthy(driver) -> bool:
+    """Браузер отвечает на команды (сессия жива, окно открыто)"""
+    try:
+        return driver.execute_script("return 1") == 1 and bool(driver.window_handles)
+    except Exception:
+        return False
+
+
+class BrowserSlot:
+    """Браузер воркера: ленивый запуск, проверка перед выдачей, пересоздание"""
+
+    def __init__(self, factory: Callable[[], object], recycle_after: int = DEFAULT_RECYCLE_AFTER):
+        self.factory = factory
+        self.recycle_after = recycle_after
+        self.driver = None
+        self.uses = 0
+        self.stats = {"started": 0, "recycled": 0, "unhealthy": 0}
+        self.error: Optional[str] = None
+
+    def acquire(self):
+        """Браузер для очередного теста; RuntimeError, если браузер не запускается"""
+        if self.error:
+            raise RuntimeError(self.error)
+        if self.driver is not None:
+            if self.recycle_after and self.uses >= self.recycle_after:
+                self.stats["recycled"] += 1
+                self._quit()
+            elif not is_healthy(self.driver):
+                self.stats["unhealthy"] += 1
+                self._quit()
+        if self.driver is None:
+            try:
+                self.driver = self.factory()
+            except Exception as e:
+                self.error = f"{type(e).__name__}: {e}"
+                raise RuntimeError(self.error) from e
+            self.stats["started"] += 1
+            self.uses = 0
+        self.uses += 1
+        return self.driver
+
+    def release(self, failed: bool = False):
+        """Вернуть браузер после теста: после падения - пересоздать, иначе очистить состояние"""
+        if self.driver is None:
+            return
+        if failed:
+            self.stats["recycled"] += 1
+            self._quit()
+            return
+        try:
+            self.driver.delete_all_cookies()
+            self.driver.execute_script(RESET_SCRIPT)
+        except Exception:
+            # about:blank и страницы без storage - не ошибка
+            pass
+        try:
+            self.driver.get("about:blank")
+        except Exception:
+            self._quit()
+
+    def close(self):
+        self._quit()
+
+    def _quit(self):
+        driver, self.driver = self.driver, None
+        if driver is not None:
+            try:
+                driver.quit()
+            except Exception:
+                pass
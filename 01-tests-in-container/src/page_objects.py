@@ -1,16 +1,49 @@
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException
-from typing import List
+from selenium.common.exceptions import TimeoutException, WebDriverException
+from typing import Dict, List, Optional
+import os
+import time
+
+from src import web_perf
 
 
 class BasePage:
-    """Базовый класс для всех страниц"""
+    """Базовый класс для всех страниц
+    
+    load() открывает URL и собирает метрики производительности страницы
+    (web_perf): self.metrics - последнего открытия. С perf_samples образец
+    дописывается в NDJSON для перцентилей по странице, с trace_dir -
+    сохраняется trace Chrome DevTools (если драйвер пишет performance-лог).
+    """
+    
+    # Имя страницы в метриках производительности
+    page_name = "page"
     
-    def __init__(self, driver):
+    def __init__(self, driver, perf_samples: Optional[str] = None, trace_dir: Optional[str] = None):
         self.driver = driver
         self.wait = WebDriverWait(driver, 10)
+        self.perf_samples = perf_samples
+        self.trace_dir = trace_dir
+        self.metrics: Dict[str, float] = {}
+    
+    def load(self, url: str):
+        """Открыть URL и собрать метрики производительности"""
+        self.driver.get(url)
+        try:
+            self.metrics = web_perf.collect(self.driver)
+        except WebDriverException:
+            # Метрики не должны ронять функциональные проверки страницы
+            self.metrics = {}
+            return self
+        
+        test = os.environ.get("PYTEST_CURRENT_TEST", "").split(" ")[0] or None
+        if self.perf_samples and self.metrics:
+            web_perf.append_sample(self.perf_samples, self.page_name, self.metrics, test=test)
+        if self.trace_dir:
+            web_perf.save_trace(self.driver, os.path.join(self.trace_dir, f"{self.page_name}-{time.time_ns()}.json"))
+        return self
     
     def find_element(self, locator):
         """Найти элемент с ожиданием"""
@@ -37,14 +70,15 @@ class GooglePage(BasePage):
     RESULT_TITLES = (By.CSS_SELECTOR, "h3")
     CONSENT_BUTTON = (By.ID, "L2AGLb")
     
-    def __init__(self, driver):
-        super().__init__(driver)
+    page_name = "google-search"
+    
+    def __init__(self, driver, **perf_options):
+        super().__init__(driver, **perf_options)
         self.url = "https://www.google.com"
     
     def open(self):
         """Открыть страницу Google"""
-        self.driver.get(self.url)
-        return self
+        return self.load(self.url)
     
     def accept_cookies_if_present(self):
         """Принять cookies если диалог появился"""
@@ -89,14 +123,15 @@ class DemoAppPage(BasePage):
     NAVIGATION = (By.CSS_SELECTOR, "nav ul")
     CONTENT = (By.ID, "content")
     
-    def __init__(self, driver, base_url: str = "http://localhost:8000"):
-        super().__init__(driver)
+    page_name = "demo-app"
+    
+    def __init__(self, driver, base_url: str = "http://localhost:8000", **perf_options):
+        super().__init__(driver, **perf_options)
         self.base_url = base_url
     
     def open(self):
         """Открыть главную страницу"""
-        self.driver.get(self.base_url)
-        return self
+        return self.load(self.base_url)
     
     def get_header_text(self) -> str:
         """Получить текст заголовка"""
@@ -0,0 +1,87 @@
+import json
+import re
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlsplit
+
+from requests.adapters import BaseAdapter
+from requests.models import PreparedRequest, Response
+from requests.structures import CaseInsensitiveDict
+
+
+Handler = Callable[..., Tuple[int, object]]
+
+
+class InMemoryRouter:
+    """Маршрутизатор запросов в памяти для подмены HTTP API в тестах
+
+    Обработчик получает описание вызова (method, url, params, json) и
+    параметры пути и возвращает кортеж (status_code, payload). Все
+    обработанные запросы сохраняются в ``calls`` для последующих проверок.
+    """
+
+    def __init__(self):
+        self._routes: List[Tuple[str, re.Pattern, Handler]] = []
+        self.calls: List[Dict] = []
+
+    def route(self, method: str, path: str):
+        """Зарегистрировать обработчик (декоратор), например ``/posts/{post_id}``"""
+        pattern = re.compile(
+            "^" + re.sub(r"\{(\w+)\}", r"(?P<\1>[^/]+)", path.rstrip('/')) + "/?$"
+        )
+
+        def decorator(handler: Handler) -> Handler:
+            self._routes.append((method.upper(), pattern, handler))
+            return handler
+
+        return decorator
+
+    def add(self, method: str, path: str, status_code: int = 200, payload: object = None):
+        """Зарегистрировать статический ответ"""
+        self.route(method, path)(lambda call, **params: (status_code, payload))
+
+    def dispatch(self, request: PreparedRequest) -> Tuple[int, object]:
+        """Найти обработчик и вызвать его"""
+        parts = urlsplit(request.url)
+        body = json.loads(request.body) if request.body else None
+        call = {
+            'method': request.method,
+            'url': f"{parts.scheme}://{parts.netloc}{parts.path}",
+            'params': dict(parse_qsl(parts.query)),
+            'json': body,
+        }
+        self.calls.append(call)
+
+        path = parts.path
+        for method, pattern, handler in self._routes:
+            if method != request.method:
+                continue
+            match = pattern.match(path)
+            if match:
+                return handler(call, **match.groupdict())
+
+        return 404, {}
+
+
+class InMemoryAdapter(BaseAdapter):
+    """Транспорт requests, который отвечает из InMemoryRouter без сокетов"""
+
+    def __init__(self, router: Optional[InMemoryRouter] = None):
+        super().__init__()
+        self.router = router or InMemoryRouter()
+
+    def send(self, request: PreparedRequest, stream=False, timeout=None,
+             verify=True, cert=None, proxies=None) -> Response:
+        status_code, payload = self.router.dispatch(request)
+
+        response = Response()
+        response.status_code = status_code
+        response.reason = 'OK' if status_code < 400 else 'Error'
+        response.headers = CaseInsensitiveDict({'Content-Type': 'application/json'})
+        response._content = b'' if payload is None else json.dumps(payload).encode('utf-8')
+        response.encoding = 'utf-8'
+        response.url = request.url
+        response.request = request
+        return response
+
+    def close(self):
+        pass
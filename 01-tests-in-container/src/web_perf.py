@@ -0,0 +1,225 @@
+"""Метрики производительности страниц в браузере и проверка порогов
+
+После каждого open() page object собирает из браузера Navigation Timing,
+Paint Timing и Resource Timing (COLLECT_SCRIPT) и сводит их в плоские
+метрики в миллисекундах и килобайтах (page_metrics). Каждое открытие -
+одна строка NDJSON-файла образцов (reports/page_perf_samples.ndjson): файл
+дописывается всеми воркерами xdist и накапливается между прогонами, так что
+перцентили по странице считаются по последним --history открытиям.
+
+Пороги - JSON {страница: {метрика: {перцентиль: значение}}}, ключ "*" -
+для всех страниц (benchmarks/page_perf.json):
+
+    {"demo-app": {"load_ms": {"p95": 1500}}, "*": {"ttfb_ms": {"p95": 800}}}
+
+    python src/web_perf.py reports/page_perf_samples.ndjson --thresholds benchmarks/page_perf.json
+
+Модуль без зависимостей от selenium: драйвер передается page object'ом.
+"""
+import argparse
+import json
+import math
+import os
+import sys
+import time
+from typing import Dict, Iterable, List, Optional
+
+DEFAULT_SAMPLES_FILE = os.environ.get("PAGE_PERF_SAMPLES", "reports/page_perf_samples.ndjson")
+DEFAULT_THRESHOLDS_FILE = os.environ.get("PAGE_PERF_THRESHOLDS", "benchmarks/page_perf.json")
+DEFAULT_HISTORY = 200
+PERCENTILES = (50, 90, 95)
+
+# Записи Performance API в JSON (toJSON у PerformanceEntry)
+COLLECT_SCRIPT = """
+const navigation = performance.getEntriesByType('navigation')[0];
+return {
+    url: location.href,
+    navigation: navigation ? navigation.toJSON() : null,
+    paint: performance.getEntriesByType('paint').map(entry => entry.toJSON()),
+    resources: performance.getEntriesByType('resource').map(entry => entry.toJSON()),
+};
+"""
+# Навигация завершена: loadEventEnd заполняется после обработчиков load
+LOAD_FINISHED_SCRIPT = """
+const navigation = performance.getEntriesByType('navigation')[0];
+return document.readyState === 'complete' && !!navigation && navigation.loadEventEnd > 0;
+"""
+# Метрики Chrome DevTools (Performance.getMetrics), секунды и байты
+CDP_METRICS = {
+    "TaskDuration": "cdp_task_ms",
+    "ScriptDuration": "cdp_script_ms",
+    "LayoutDuration": "cdp_layout_ms",
+    "RecalcStyleDuration": "cdp_style_ms",
+    "JSHeapUsedSize": "cdp_js_heap_kb",
+}
+
+
+def page_metrics(raw: dict) -> Dict[str, float]:
+    """Плоские метрики из записей Performance API (мс от начала навигации, КБ)"""
+    metrics = {}
+    navigation = raw.get("navigation")
+    if navigation:
+        metrics["ttfb_ms"] = navigation["responseStart"] - navigation["startTime"]
+        metrics["response_ms"] = navigation["responseEnd"] - navigation["responseStart"]
+        metrics["dom_interactive_ms"] = navigation["domInteractive"]
+        metrics["dom_content_loaded_ms"] = navigation["domContentLoadedEventEnd"]
+        metrics["load_ms"] = navigation["loadEventEnd"]
+        metrics["document_kb"] = navigation.get("transferSize", 0) / 1024
+    for entry in raw.get("paint", []):
+        metrics[entry["name"].replace("-", "_") + "_ms"] = entry["startTime"]
+
+    resources = raw.get("resources", [])
+    metrics["resource_count"] = len(resources)
+    metrics["resource_kb"] = sum(entry.get("transferSize", 0) for entry in resources) / 1024
+    metrics["slowest_resource_ms"] = max((entry["duration"] for entry in resources), default=0.0)
+    return {name: round(value, 2) for name, value in metrics.items()}
+
+
+def cdp_metrics(response: dict) -> Dict[str, float]:
+    """Метрики из ответа Performance.getMetrics"""
+    metrics = {}
+    for metric in response.get("metrics", []):
+        name = CDP_METRICS.get(metric["name"])
+        if name:
+            scale = 1 / 1024 if name.endswith("_kb") else 1000
+            metrics[name] = round(metric["value"] * scale, 2)
+    return metrics
+
+
+def collect(driver, timeout: float = 10.0) -> Dict[str, float]:
+    """Дождаться окончания загрузки и собрать метрики открытой страницы"""
+    deadline = time.monotonic() + timeout
+    while not driver.execute_script(LOAD_FINISHED_SCRIPT) and time.monotonic() < deadline:
+        time.sleep(0.05)
+    metrics = page_metrics(driver.execute_script(COLLECT_SCRIPT))
+    # CDP есть только у Chromium-драйверов (локальный Chrome)
+    if hasattr(driver, "execute_cdp_cmd"):
+        try:
+            metrics.update(cdp_metrics(driver.execute_cdp_cmd("Performance.getMetrics", {})))
+        except Exception:
+            pass
+    return metrics
+
+
+def save_trace(driver, path: str) -> Optional[str]:
+    """Записать накопленный performance-лог Chrome как trace (открывается в DevTools → Performance)
+
+    Лог есть, только если драйвер создан с perfLoggingPrefs (PAGE_PERF_TRACE=1
+    в conftest.py); чтение лога очищает его, поэтому trace - с прошлого вызова.
+    """
+    try:
+        entries = driver.get_log("performance")
+    except Exception:
+        return None
+    events = []
+    for entry in entries:
+        message = json.loads(entry["message"])["message"]
+        if message["method"] == "Tracing.dataCollected":
+            events.append(message["params"])
+    if not events:
+        return None
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"traceEvents": events}, f)
+    return path
+
+
+def append_sample(path: str, page: str, metrics: Dict[str, float], test: Optional[str] = None):
+    """Дописать образец в NDJSON (одна строка - атомарная запись, воркеры не мешают друг другу)"""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    line = json.dumps({"page": page, "time": round(time.time(), 3), "test": test, "metrics": metrics})
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(line + "\n")
+
+
+def load_samples(path: str, history: int = DEFAULT_HISTORY) -> Dict[str, List[Dict[str, float]]]:
+    """Последние history образцов каждой страницы: {страница: [метрики, ...]}"""
+    samples: Dict[str, List[Dict[str, float]]] = {}
+    try:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    sample = json.loads(line)
+                    samples.setdefault(sample["page"], []).append(sample["metrics"])
+    except FileNotFoundError:
+        return {}
+    return {page: values[-history:] for page, values in samples.items()}
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Перцентиль методом ближайшего ранга"""
+    values = sorted(values)
+    return values[min(len(values), max(1, math.ceil(q / 100 * len(values)))) - 1]
+
+
+def summarize(samples: Dict[str, List[Dict[str, float]]],
+              percentiles: Iterable[int] = PERCENTILES) -> Dict[str, dict]:
+    """{страница: {"runs": n, "metrics": {метрика: {"p50": ..., "p95": ..., "max": ...}}}}"""
+    summary = {}
+    for page, runs in sorted(samples.items()):
+        names = sorted({name for run in runs for name in run})
+        metrics = {}
+        for name in names:
+            values = [run[name] for run in runs if name in run]
+            stats = {f"p{q}": round(percentile(values, q), 2) for q in percentiles}
+            stats["max"] = round(max(values), 2)
+            metrics[name] = stats
+        summary[page] = {"runs": len(runs), "metrics": metrics}
+    return summary
+
+
+def check_thresholds(summary: Dict[str, dict], thresholds: Dict[str, dict]) -> List[str]:
+    """Превышения порогов; порог страницы перекрывает порог "*" той же метрики"""
+    violations = []
+    for page, stats in summary.items():
+        limits = {**thresholds.get("*", {}), **thresholds.get(page, {})}
+        for metric, by_percentile in sorted(limits.items()):
+            for name, limit in by_percentile.items():
+                value = stats["metrics"].get(metric, {}).get(name)
+                if value is not None and value > limit:
+                    violations.append(f"{page}: {metric} {name} {value} > {limit}")
+    return violations
+
+
+def load_thresholds(path: str) -> Dict[str, dict]:
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def format_summary(summary: Dict[str, dict], metrics: Iterable[str] = ("ttfb_ms", "first_contentful_paint_ms",
+                                                                      "dom_content_loaded_ms", "load_ms")) -> str:
+    lines = []
+    for page, stats in summary.items():
+        lines.append(f"{page} ({stats['runs']} runs)")
+        for name in metrics:
+            if name in stats["metrics"]:
+                values = stats["metrics"][name]
+                lines.append("  " + f"{name:<28}" + "  ".join(f"{key} {value:>8.1f}" for key, value in values.items()))
+    return "\n".join(lines)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Перцентили метрик страниц и проверка порогов")
+    parser.add_argument("samples", nargs="?", default=DEFAULT_SAMPLES_FILE)
+    parser.add_argument("--thresholds", default=DEFAULT_THRESHOLDS_FILE)
+    parser.add_argument("--history", type=int, default=DEFAULT_HISTORY, help="Последних открытий на страницу")
+    parser.add_argument("--output", help="Записать перцентили в JSON")
+    args = parser.parse_args()
+
+    summary = summarize(load_samples(args.samples, args.history))
+    print(format_summary(summary) or f"No samples in {args.samples}")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+
+    violations = check_thresholds(summary, load_thresholds(args.thresholds))
+    for violation in violations:
+        print(f"❌ {violation}")
+    return 1 if violations else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,13 +1,23 @@
 import pytest
+import json
 import os
 import sys
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.chrome.service import Service
+import time
 import requests
 
+# В API-only образе selenium не установлен: UI тесты не собираются
+try:
+    from selenium import webdriver
+    from selenium.webdriver.chrome.options import Options
+    from selenium.webdriver.chrome.service import Service
+except ImportError:
+    webdriver = None
+    collect_ignore = ["test_ui.py"]
 
-def get_chrome_options():
+from src import browser_pool, http_budget, sharding, web_perf
+
+
+def get_chrome_options(remote=False):
     """Настройки Chrome для контейнера и локального запуска"""
     options = Options()
     
@@ -21,7 +31,10 @@ def get_chrome_options():
     options.add_argument("--disable-images")
     options.add_argument("--disable-javascript")  # для простых тестов
     options.add_argument("--window-size=1920,1080")
-    options.add_argument("--remote-debugging-port=9222")
+    # Локальные браузеры воркеров xdist работают параллельно: у каждого свой порт
+    if not remote:
+        port = browser_pool.DEBUGGING_PORT + browser_pool.worker_index()
+        options.add_argument(f"--remote-debugging-port={port}")
     
     # Дополнительные опции для контейнеров
     if os.environ.get('CI') or os.environ.get('DOCKER'):
@@ -31,6 +44,15 @@ def get_chrome_options():
         options.add_argument("--disable-features=TranslateUI")
         options.add_argument("--disable-ipc-flooding-protection")
     
+    # Trace Chrome DevTools для page objects (web_perf.save_trace), заметно замедляет страницы
+    if os.environ.get('PAGE_PERF_TRACE') == '1':
+        options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+        options.add_experimental_option("perfLoggingPrefs", {
+            "enableNetwork": False,
+            "enablePage": False,
+            "traceCategories": "devtools.timeline,blink.user_timing,loading",
+        })
+    
     return options
 
 
@@ -76,64 +98,65 @@ def chrome_options():
     return get_chrome_options()
 
 
-@pytest.fixture(scope="function")
-def driver(chrome_options):
-    """WebDriver для UI тестов с улучшенной обработкой ошибок"""
-    driver = None
+def create_driver(hub_url=None):
+    """Новый Chrome: удаленный через Selenium Grid или локальный"""
+    if hub_url:
+        return webdriver.Remote(command_executor=hub_url, options=get_chrome_options(remote=True))
+    service = get_chrome_driver_service()
+    if service:
+        return webdriver.Chrome(service=service, options=get_chrome_options())
+    # Fallback - без явного сервиса
+    return webdriver.Chrome(options=get_chrome_options())
+
+
+@pytest.fixture(scope="session")
+def browser_slot(request):
+    """Браузер воркера xdist, переиспользуемый между UI тестами (src/browser_pool.py)"""
+    hub_url = None
+    urls = browser_pool.hub_urls(request.config.getoption("selenium_hub"))
+    if urls:
+        hub_url = browser_pool.assign_hub(urls, browser_pool.worker_index())
+        try:
+            browser_pool.wait_for_hub(hub_url, timeout=request.config.getoption("hub_timeout"))
+        except TimeoutError as e:
+            pytest.skip(str(e))
     
+    slot = browser_pool.BrowserSlot(lambda: create_driver(hub_url),
+                                    recycle_after=request.config.getoption("browser_recycle_after"))
+    yield slot
+    slot.close()
+
+
+@pytest.fixture(scope="function")
+def driver(request, browser_slot):
+    """WebDriver для UI тестов: браузер воркера, очищенный после прошлого теста"""
     try:
-        # Сначала пробуем с сервисом
-        service = get_chrome_driver_service()
-        
-        if service:
-            driver = webdriver.Chrome(service=service, options=chrome_options)
-        else:
-            # Fallback - без явного сервиса
-            driver = webdriver.Chrome(options=chrome_options)
-        
-        driver.implicitly_wait(10)
-        
-        # Проверяем, что драйвер работает
-        driver.get("about:blank")
-        
-        yield driver
-        
-    except Exception as e:
+        driver = browser_slot.acquire()
+    except RuntimeError as e:
         pytest.skip(f"Chrome WebDriver недоступен: {e}")
+    driver.implicitly_wait(10)
+    
+    yield driver
     
-    finally:
-        if driver:
-            try:
-                driver.quit()
-            except Exception:
-                pass
+    # После упавшего теста браузер пересоздается: состояние страницы могло сломаться
+    report = getattr(request.node, "rep_call", None)
+    browser_slot.release(failed=report is not None and report.failed)
 
 
 @pytest.fixture(scope="function")
-def headless_driver(chrome_options):
-    """Гарантированно headless драйвер (без UI)"""
-    # Убеждаемся, что headless включен
-    if "--headless" not in chrome_options.arguments:
-        chrome_options.add_argument("--headless")
-    
-    driver = None
-    try:
-        service = get_chrome_driver_service()
-        if service:
-            driver = webdriver.Chrome(service=service, options=chrome_options)
-        else:
-            driver = webdriver.Chrome(options=chrome_options)
-            
-        driver.implicitly_wait(5)
-        yield driver
-    except Exception as e:
-        pytest.skip(f"Headless Chrome недоступен: {e}")
-    finally:
-        if driver:
-            try:
-                driver.quit()
-            except Exception:
-                pass
+def headless_driver(driver):
+    """Гарантированно headless драйвер (без UI): браузеры пула всегда headless"""
+    driver.implicitly_wait(5)
+    return driver
+
+
+@pytest.fixture(scope="session")
+def page_perf(request):
+    """Параметры сбора метрик для page objects: DemoAppPage(driver, url, **page_perf)"""
+    return {
+        "perf_samples": request.config.getoption("page_perf_samples"),
+        "trace_dir": "reports/traces" if os.environ.get('PAGE_PERF_TRACE') == '1' else None,
+    }
 
 
 @pytest.fixture(scope="session")
@@ -186,6 +209,39 @@ def test_environment():
 
 
 # Хуки pytest для улучшенного вывода
+def pytest_addoption(parser):
+    """Опции шардирования, бюджетов HTTP-вызовов, метрик страниц и пула браузеров"""
+    group = parser.getgroup("sharding")
+    group.addoption("--shard-index", type=int, default=int(os.environ.get("SHARD_INDEX", 0)),
+                    help="Номер шарда (с нуля)")
+    group.addoption("--shard-count", type=int, default=int(os.environ.get("SHARD_COUNT", 1)),
+                    help="Количество шардов")
+    group.addoption("--durations-file", default=sharding.DEFAULT_DURATIONS_FILE,
+                    help="JSON с длительностями тестов из прошлых запусков")
+    group.addoption("--record-durations", default=None,
+                    help="Записать длительности тестов этого запуска в JSON")
+    http_budget.add_options(parser)
+    
+    group = parser.getgroup("page perf")
+    group.addoption("--page-perf-samples", default=web_perf.DEFAULT_SAMPLES_FILE,
+                    help="NDJSON с метриками открытий страниц (дописывается между прогонами)")
+    group.addoption("--page-perf-thresholds", default=web_perf.DEFAULT_THRESHOLDS_FILE,
+                    help="JSON с порогами перцентилей метрик по страницам")
+    group.addoption("--page-perf-history", type=int, default=web_perf.DEFAULT_HISTORY,
+                    help="Сколько последних открытий страницы учитывать в перцентилях")
+    group.addoption("--page-perf-gate", action="store_true", default=os.environ.get("PAGE_PERF_GATE") == "1",
+                    help="Провалить прогон при превышении порогов")
+    
+    group = parser.getgroup("browser pool")
+    group.addoption("--selenium-hub", default=os.environ.get("SELENIUM_HUB"),
+                    help="Selenium Grid (через запятую - несколько, по кругу на воркеры); без него - локальный Chrome")
+    group.addoption("--hub-timeout", type=float, default=float(os.environ.get("SELENIUM_HUB_TIMEOUT", 60)),
+                    help="Сколько секунд ждать готовности hub'а")
+    group.addoption("--browser-recycle-after", type=int,
+                    default=int(os.environ.get("BROWSER_RECYCLE_AFTER", browser_pool.DEFAULT_RECYCLE_AFTER)),
+                    help="Пересоздавать браузер воркера после K тестов (0 - не пересоздавать)")
+
+
 def pytest_configure(config):
     """Конфигурация pytest"""
     # Добавляем маркеры
@@ -193,6 +249,8 @@ def pytest_configure(config):
     config.addinivalue_line("markers", "ui: marks tests as UI tests")
     config.addinivalue_line("markers", "api: marks tests as API tests")
     config.addinivalue_line("markers", "smoke: marks tests as smoke tests")
+    # Учет HTTP-вызовов тестов и маркер http_budget
+    http_budget.register(config)
 
 
 def pytest_collection_modifyitems(config, items):
@@ -203,22 +261,77 @@ def pytest_collection_modifyitems(config, items):
             item.add_marker(pytest.mark.ui)
         elif "test_api" in item.nodeid:
             item.add_marker(pytest.mark.api)
+    
+    # Оставляем только тесты своего шарда (распределение по длительностям)
+    shard_count = config.getoption("shard_count")
+    if shard_count > 1:
+        durations = sharding.load_durations(config.getoption("durations_file"))
+        selected = set(sharding.select_shard(
+            [item.nodeid for item in items], durations,
+            config.getoption("shard_index"), shard_count
+        ))
+        deselected = [item for item in items if item.nodeid not in selected]
+        items[:] = [item for item in items if item.nodeid in selected]
+        config.hook.pytest_deselected(items=deselected)
 
 
-def pytest_runtest_setup(item):
-    """Настройка перед каждым тестом"""
-    # Пропускаем UI тесты если нет поддержки Chrome
-    if "ui" in item.keywords:
-        try:
-            options = get_chrome_options()
-            service = get_chrome_driver_service()
-            
-            # Быстрая проверка доступности Chrome
-            test_driver = webdriver.Chrome(service=service, options=options)
-            test_driver.quit()
-            
-        except Exception as e:
-            pytest.skip(f"UI тесты пропущены: Chrome недоступен ({e})")
+_test_durations = {}
+
+
+def pytest_runtest_logreport(report):
+    """Суммарная длительность теста (setup + call + teardown)"""
+    _test_durations[report.nodeid] = _test_durations.get(report.nodeid, 0.0) + report.duration
+
+
+_session_started_at = time.time()
+_page_perf = {"summary": {}, "violations": []}
+
+
+def pytest_sessionstart(session):
+    global _session_started_at
+    _session_started_at = time.time()
+
+
+def pytest_sessionfinish(session):
+    """Сохранение длительностей для следующего шардированного запуска и проверка метрик страниц"""
+    config = session.config
+    if hasattr(config, "workerinput"):
+        return
+    path = config.getoption("record_durations")
+    if path:
+        sharding.save_durations(path, _test_durations)
+    
+    # Перцентили страниц считаются, только если в этом прогоне были открытия
+    samples = config.getoption("page_perf_samples")
+    if os.path.exists(samples) and os.path.getmtime(samples) >= _session_started_at:
+        summary = web_perf.summarize(web_perf.load_samples(samples, config.getoption("page_perf_history")))
+        with open(os.path.join(os.path.dirname(samples) or ".", "page_perf.json"), "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+        _page_perf["summary"] = summary
+        _page_perf["violations"] = web_perf.check_thresholds(
+            summary, web_perf.load_thresholds(config.getoption("page_perf_thresholds"))
+        )
+        if _page_perf["violations"] and config.getoption("page_perf_gate") and session.exitstatus == 0:
+            session.exitstatus = pytest.ExitCode.TESTS_FAILED
+
+
+def pytest_terminal_summary(terminalreporter, config):
+    """Перцентили метрик страниц и превышения порогов"""
+    if not _page_perf["summary"]:
+        return
+    terminalreporter.section("Page performance")
+    terminalreporter.line(web_perf.format_summary(_page_perf["summary"]))
+    for violation in _page_perf["violations"]:
+        terminalreporter.line(f"Threshold exceeded: {violation}", red=config.getoption("page_perf_gate"),
+                              yellow=not config.getoption("page_perf_gate"))
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_makereport(item, call):
+    """Отчеты фаз теста в item.rep_<фаза> (фикстура driver пересоздает браузер после падения)"""
+    outcome = yield
+    report = outcome.get_result()
+    setattr(item, f"rep_{report.when}", report)
 
 
 # Фикстура для отладки
@@ -5,6 +5,7 @@ from unittest.mock import Mock, patch
 from src.api_client import JSONPlaceholderClient
 
 
+@pytest.mark.http_budget(max_calls=1, max_call_seconds=5.0)
 class TestAPIBasic:
     """Базовые API тесты"""
     
@@ -64,6 +65,7 @@ class TestAPIBasic:
             pytest.skip(f"API {base_url} недоступен")
 
 
+@pytest.mark.http_budget(max_calls=1, max_call_seconds=5.0)
 class TestAPIClientWrapper:
     """Тесты с использованием клиент-обертки"""
     
@@ -1,7 +1,8 @@
 import pytest
-import json
-from unittest.mock import Mock, patch
+import requests
+from unittest.mock import patch
 from src.api_client import JSONPlaceholderClient
+from src.transport import InMemoryAdapter, InMemoryRouter
 
 
 class TestAPILocal:
@@ -35,136 +36,134 @@ class TestAPILocal:
             "userId": 1
         }
     
-    def test_get_posts_success(self, mock_posts_data):
+    @pytest.fixture
+    def router(self):
+        """In-memory маршрутизатор вместо реального API"""
+        return InMemoryRouter()
+    
+    @pytest.fixture
+    def client(self, router):
+        """Клиент с транспортом в памяти (без сокетов и патчинга)"""
+        return JSONPlaceholderClient("https://example.com", transport=InMemoryAdapter(router))
+    
+    def test_get_posts_success(self, router, client, mock_posts_data):
         """Тест успешного получения списка постов"""
-        with patch('requests.Session.get') as mock_get:
-            # Настраиваем мок
-            mock_response = Mock()
-            mock_response.status_code = 200
-            mock_response.json.return_value = mock_posts_data
-            mock_response.raise_for_status.return_value = None
-            mock_get.return_value = mock_response
-            
-            # Создаем клиент и выполняем запрос
-            client = JSONPlaceholderClient("https://example.com")
-            posts = client.get_all_posts()
-            
-            # Проверяем результат
-            assert len(posts) == 2
-            assert posts[0]["id"] == 1
-            assert posts[0]["title"] == "Test Post 1"
-            assert "body" in posts[0]
-            
-            # Проверяем вызов
-            mock_get.assert_called_once_with("https://example.com/posts")
+        router.add("GET", "/posts", 200, mock_posts_data)
+        
+        posts = client.get_all_posts()
+        
+        # Проверяем результат
+        assert len(posts) == 2
+        assert posts[0]["id"] == 1
+        assert posts[0]["title"] == "Test Post 1"
+        assert "body" in posts[0]
+        
+        # Проверяем вызов
+        assert len(router.calls) == 1
+        assert router.calls[0]["method"] == "GET"
+        assert router.calls[0]["url"] == "https://example.com/posts"
     
-    def test_get_single_post_success(self, mock_single_post):
+    def test_get_single_post_success(self, router, client, mock_single_post):
         """Тест получения одного поста"""
-        with patch('requests.Session.get') as mock_get:
-            mock_response = Mock()
-            mock_response.status_code = 200
-            mock_response.json.return_value = mock_single_post
-            mock_response.raise_for_status.return_value = None
-            mock_get.return_value = mock_response
-            
-            client = JSONPlaceholderClient("https://example.com")
-            post = client.get_post(1)
-            
-            assert post["id"] == 1
-            assert post["title"] == "Test Post"
-            assert "body" in post
-            
-            mock_get.assert_called_once_with("https://example.com/posts/1")
+        router.add("GET", "/posts/1", 200, mock_single_post)
+        
+        post = client.get_post(1)
+        
+        assert post["id"] == 1
+        assert post["title"] == "Test Post"
+        assert "body" in post
+        
+        assert len(router.calls) == 1
+        assert router.calls[0]["url"] == "https://example.com/posts/1"
     
-    def test_create_post_success(self):
+    def test_create_post_success(self, router, client):
         """Тест создания поста"""
-        created_post = {
-            "id": 101,
-            "title": "New Test Post",
-            "body": "New test body",
-            "userId": 1
-        }
+        @router.route("POST", "/posts")
+        def create(call):
+            return 201, {"id": 101, **call["json"]}
+        
+        result = client.create_post("New Test Post", "New test body", 1)
+        
+        assert result["id"] == 101
+        assert result["title"] == "New Test Post"
+        assert result["body"] == "New test body"
         
-        with patch('requests.Session.post') as mock_post:
-            mock_response = Mock()
-            mock_response.status_code = 201
-            mock_response.json.return_value = created_post
-            mock_response.raise_for_status.return_value = None
-            mock_post.return_value = mock_response
-            
-            client = JSONPlaceholderClient("https://example.com")
-            result = client.create_post("New Test Post", "New test body", 1)
-            
-            assert result["id"] == 101
-            assert result["title"] == "New Test Post"
-            assert result["body"] == "New test body"
-            
-            # Проверяем параметры вызова
-            mock_post.assert_called_once_with(
-                "https://example.com/posts",
-                json={
-                    'title': "New Test Post",
-                    'body': "New test body", 
-                    'userId': 1
-                }
-            )
+        # Проверяем параметры вызова
+        assert len(router.calls) == 1
+        assert router.calls[0]["url"] == "https://example.com/posts"
+        assert router.calls[0]["json"] == {
+            'title': "New Test Post",
+            'body': "New test body", 
+            'userId': 1
+        }
     
-    def test_get_user_posts(self, mock_posts_data):
+    def test_get_user_posts(self, router, client, mock_posts_data):
         """Тест получения постов пользователя"""
-        user_posts = [post for post in mock_posts_data if post["userId"] == 1]
-        
-        with patch('requests.Session.get') as mock_get:
-            mock_response = Mock()
-            mock_response.status_code = 200
-            mock_response.json.return_value = user_posts
-            mock_response.raise_for_status.return_value = None
-            mock_get.return_value = mock_response
-            
-            client = JSONPlaceholderClient("https://example.com")
-            posts = client.get_user_posts(1)
-            
-            assert len(posts) == 2
-            assert all(post["userId"] == 1 for post in posts)
-            
-            mock_get.assert_called_once_with(
-                "https://example.com/posts",
-                params={'userId': 1}
-            )
+        @router.route("GET", "/posts")
+        def filter_posts(call):
+            user_id = int(call["params"]["userId"])
+            return 200, [post for post in mock_posts_data if post["userId"] == user_id]
+        
+        posts = client.get_user_posts(1)
+        
+        assert len(posts) == 2
+        assert all(post["userId"] == 1 for post in posts)
+        
+        assert len(router.calls) == 1
+        assert router.calls[0]["url"] == "https://example.com/posts"
+        assert router.calls[0]["params"] == {'userId': '1'}
     
-    def test_api_client_error_handling(self):
+    @pytest.mark.http_budget(max_calls=3)
+    def test_update_and_delete_post(self, router, client, mock_single_post):
+        """Тест обновления и удаления поста"""
+        router.add("GET", "/posts/1", 200, mock_single_post)
+        
+        @router.route("PUT", "/posts/{post_id}")
+        def update(call, post_id):
+            return 200, call["json"]
+        
+        router.add("DELETE", "/posts/{post_id}", 200, {})
+        
+        updated = client.update_post(1, title="Updated")
+        assert updated["title"] == "Updated"
+        assert updated["body"] == mock_single_post["body"]
+        
+        assert client.delete_post(1) is True
+        assert [call["method"] for call in router.calls] == ["GET", "PUT", "DELETE"]
+    
+    def test_api_client_error_handling(self, client):
         """Тест обработки ошибок API"""
-        with patch('requests.Session.get') as mock_get:
-            # Симулируем HTTP ошибку
-            mock_response = Mock()
-            mock_response.status_code = 404
-            mock_response.raise_for_status.side_effect = Exception("404 Not Found")
-            mock_get.return_value = mock_response
-            
-            client = JSONPlaceholderClient("https://example.com")
-            
-            with pytest.raises(Exception) as exc_info:
-                client.get_post(999)
-            
-            assert "404 Not Found" in str(exc_info.value)
+        # Маршрут не зарегистрирован - транспорт отвечает 404
+        with pytest.raises(requests.HTTPError) as exc_info:
+            client.get_post(999)
+        
+        assert exc_info.value.response.status_code == 404
     
     @pytest.mark.parametrize("post_id,expected_url", [
         (1, "https://example.com/posts/1"),
         (42, "https://example.com/posts/42"),
         (100, "https://example.com/posts/100"),
     ])
-    def test_get_post_urls(self, post_id, expected_url):
+    def test_get_post_urls(self, router, client, post_id, expected_url):
         """Параметризованный тест URL для получения постов"""
-        with patch('requests.Session.get') as mock_get:
-            mock_response = Mock()
-            mock_response.status_code = 200
-            mock_response.json.return_value = {"id": post_id}
-            mock_response.raise_for_status.return_value = None
-            mock_get.return_value = mock_response
-            
-            client = JSONPlaceholderClient("https://example.com")
-            client.get_post(post_id)
-            
-            mock_get.assert_called_once_with(expected_url)
+        @router.route("GET", "/posts/{post_id}")
+        def get_post(call, post_id):
+            return 200, {"id": int(post_id)}
+        
+        post = client.get_post(post_id)
+        
+        assert post == {"id": post_id}
+        assert router.calls[0]["url"] == expected_url
+    
+    @pytest.mark.http_budget(max_calls=1000, max_seconds=5.0)
+    def test_many_calls_without_network(self, router, client, mock_single_post):
+        """Тысячи вызовов клиента через транспорт в памяти"""
+        router.add("GET", "/posts/{post_id}", 200, mock_single_post)
+        
+        for post_id in range(1000):
+            assert client.get_post(post_id)["id"] == 1
+        
+        assert len(router.calls) == 1000
 
 
 class TestAPIIntegration:
@@ -0,0 +1,148 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pytest
+from src import browser_pool
+
+
+class FakeDriver:
+    """Драйвер без браузера: считает команды и умеет "зависать\""""
+
+    def __init__(self):
+        self.alive = True
+        self.quit_called = False
+        self.cookies_deleted = 0
+        self.url = None
+
+    def execute_script(self, script):
+        if not self.alive:
+            raise ConnectionError("browser is gone")
+        return 1
+
+    @property
+    def window_handles(self):
+        return ["main"]
+
+    def delete_all_cookies(self):
+        self.cookies_deleted += 1
+
+    def get(self, url):
+        self.url = url
+
+    def quit(self):
+        self.quit_called = True
+
+
+class TestBrowserSlot:
+    """Тесты переиспользования и пересоздания браузера воркера"""
+
+    @pytest.fixture
+    def drivers(self):
+        return []
+
+    @pytest.fixture
+    def slot(self, drivers):
+        def factory():
+            drivers.append(FakeDriver())
+            return drivers[-1]
+        return browser_pool.BrowserSlot(factory, recycle_after=3)
+
+    def test_driver_reused_between_tests(self, slot, drivers):
+        """Между тестами браузер очищается, но не перезапускается"""
+        first = slot.acquire()
+        slot.release()
+        second = slot.acquire()
+
+        assert first is second
+        assert len(drivers) == 1
+        assert first.cookies_deleted == 1
+        assert first.url == "about:blank"
+
+    def test_recycled_after_k_tests(self, slot, drivers):
+        for _ in range(4):
+            slot.acquire()
+            slot.release()
+
+        assert len(drivers) == 2
+        assert drivers[0].quit_called
+        assert slot.stats == {"started": 2, "recycled": 1, "unhealthy": 0}
+
+    def test_recycled_after_failed_test(self, slot, drivers):
+        slot.acquire()
+        slot.release(failed=True)
+        slot.acquire()
+
+        assert len(drivers) == 2
+        assert drivers[0].quit_called
+
+    def test_unhealthy_browser_replaced(self, slot, drivers):
+        """Браузер, переставший отвечать, пересоздается при следующей выдаче"""
+        slot.acquire().alive = False
+        driver = slot.acquire()
+
+        assert driver is drivers[1]
+        assert slot.stats["unhealthy"] == 1
+
+    def test_start_error_remembered(self):
+        """Ошибка запуска не повторяется на каждом тесте воркера"""
+        attempts = []
+
+        def factory():
+            attempts.append(1)
+            raise OSError("chromedriver not found")
+
+        slot = browser_pool.BrowserSlot(factory)
+        for _ in range(3):
+            with pytest.raises(RuntimeError, match="chromedriver not found"):
+                slot.acquire()
+        assert len(attempts) == 1
+
+
+class TestHub:
+    """Тесты распределения воркеров по hub'ам и ожидания готовности"""
+
+    @pytest.mark.parametrize("worker,expected", [(None, 0), ("gw0", 0), ("gw7", 7), ("master", 0)])
+    def test_worker_index(self, worker, expected):
+        environ = {"PYTEST_XDIST_WORKER": worker} if worker else {}
+        assert browser_pool.worker_index(environ) == expected
+
+    def test_workers_spread_over_hubs(self):
+        urls = browser_pool.hub_urls("http://grid-a:4444/wd/hub/, http://grid-b:4444")
+
+        assert urls == ["http://grid-a:4444/wd/hub", "http://grid-b:4444"]
+        assert [browser_pool.assign_hub(urls, worker) for worker in range(3)] == [urls[0], urls[1], urls[0]]
+        assert browser_pool.hub_urls(None) == []
+
+    @pytest.fixture
+    def hub(self):
+        """HTTP-заглушка /status, становится ready со второго запроса"""
+        requests_seen = []
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                requests_seen.append(self.path)
+                body = json.dumps({"value": {"ready": len(requests_seen) > 1, "message": "starting"}}).encode()
+                self.send_response(200)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        server = HTTPServer(("127.0.0.1", 0), Handler)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        yield f"http://127.0.0.1:{server.server_port}/wd/hub", requests_seen
+        server.shutdown()
+
+    def test_wait_for_hub(self, hub):
+        url, requests_seen = hub
+
+        assert browser_pool.wait_for_hub(url, timeout=5, interval=0.01)["ready"]
+        assert requests_seen == ["/wd/hub/status", "/wd/hub/status"]
+
+    def test_wait_for_hub_timeout(self):
+        with pytest.raises(TimeoutError, match="not ready"):
+            browser_pool.wait_for_hub("http://127.0.0.1:9", timeout=0.05, interval=0.01)
@@ -0,0 +1,92 @@
+import pytest
+import requests
+from src import http_budget
+from src.transport import InMemoryAdapter, InMemoryRouter
+
+
+class TestHttpRecorder:
+    """Тесты записи HTTP-вызовов"""
+
+    @pytest.fixture
+    def session(self):
+        router = InMemoryRouter()
+        router.add("GET", "/posts/{post_id}", 200, {"id": 1})
+        router.add("POST", "/posts", 201, {"id": 101})
+        session = requests.Session()
+        session.mount("https://example.com", InMemoryAdapter(router))
+        return session
+
+    @pytest.fixture
+    def recorder(self):
+        recorder = http_budget.HttpRecorder()
+        recorder.install()
+        yield recorder
+        recorder.uninstall()
+
+    def test_calls_recorded_by_endpoint(self, session, recorder):
+        """Вызовы группируются по эндпоинту с обобщенными id"""
+        # Вызовы до теста (например, из фикстур) не учитываются
+        recorder.drain()
+        session.get("https://example.com/posts/1")
+        session.get("https://example.com/posts/2?full=1")
+        session.post("https://example.com/posts", json={})
+
+        summary = http_budget.summarize(recorder.drain())
+
+        assert summary["calls"] == 3
+        assert summary["errors"] == 0
+        assert summary["endpoints"]["GET example.com/posts/{id}"]["calls"] == 2
+        assert summary["endpoints"]["POST example.com/posts"]["calls"] == 1
+        assert recorder.drain() == []
+
+    def test_uninstall_restores_send(self, recorder):
+        """После uninstall requests работает без записи"""
+        recorder.uninstall()
+        assert requests.Session.send is not None
+        assert recorder.calls == []
+
+
+class TestBudget:
+    """Тесты проверки бюджета и сравнения с прошлым отчетом"""
+
+    @pytest.fixture
+    def summary(self):
+        calls = [
+            {"endpoint": "GET example.com/posts", "status": 200, "seconds": 0.2, "error": None},
+            {"endpoint": "GET example.com/posts/{id}", "status": 503, "seconds": 0.5, "error": None},
+            {"endpoint": "GET example.com/posts/{id}", "status": None, "seconds": 1.5, "error": "Timeout"},
+        ]
+        return http_budget.summarize(calls)
+
+    def test_summary(self, summary):
+        assert summary["calls"] == 3
+        assert summary["seconds"] == pytest.approx(2.2)
+        assert summary["max_call_seconds"] == pytest.approx(1.5)
+        assert summary["errors"] == 2
+        # Эндпоинты по убыванию времени
+        assert list(summary["endpoints"]) == ["GET example.com/posts/{id}", "GET example.com/posts"]
+
+    def test_within_budget(self, summary):
+        assert http_budget.check_budget(summary, max_calls=3, max_seconds=3.0, max_call_seconds=2.0) == []
+
+    def test_budget_violations(self, summary):
+        violations = http_budget.check_budget(summary, max_calls=2, max_seconds=1.0, max_call_seconds=1.0)
+
+        assert len(violations) == 3
+        assert violations[0] == "3 HTTP calls, budget 2"
+
+    def test_call_regressions(self):
+        """Рост числа вызовов относительно прошлого отчета; новые тесты не считаются"""
+        baseline = {"tests": {"t::a": {"call": {"calls": 2}}, "t::b": {"call": {"calls": 5}}}}
+        current = {"tests": {"t::a": {"call": {"calls": 3}}, "t::b": {"call": {"calls": 4}},
+                             "t::c": {"call": {"calls": 9}}}}
+
+        assert http_budget.call_regressions(baseline, current) == [("t::a", 2, 3)]
+
+    @pytest.mark.parametrize("method,url,expected", [
+        ("GET", "https://example.com/posts/42/comments?x=1", "GET example.com/posts/{id}/comments"),
+        ("DELETE", "http://app:8000/users/7", "DELETE app:8000/users/{id}"),
+        ("GET", "http://app:8000", "GET app:8000/"),
+    ])
+    def test_endpoint(self, method, url, expected):
+        assert http_budget.endpoint(method, url) == expected
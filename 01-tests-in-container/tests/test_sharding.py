@@ -0,0 +1,119 @@
+import pytest
+import json
+from src import sharding
+
+
+class TestLPTSchedule:
+    """Тесты распределения тестов по шардам"""
+
+    @pytest.fixture
+    def durations(self):
+        return {
+            "tests/test_a.py::test_slow": 10.0,
+            "tests/test_a.py::test_medium": 6.0,
+            "tests/test_b.py::test_medium": 5.0,
+            "tests/test_b.py::test_fast": 1.0,
+            "tests/test_c.py::test_fast": 1.0,
+        }
+
+    def test_all_tests_assigned_once(self, durations):
+        """Каждый тест попадает ровно в один шард"""
+        shards = sharding.lpt_schedule(durations.keys(), durations, 3)
+
+        assigned = [test for shard in shards for test in shard]
+        assert sorted(assigned) == sorted(durations)
+
+    def test_longest_first_balancing(self, durations):
+        """Долгие тесты распределяются первыми, нагрузка шардов выравнивается"""
+        shards = sharding.lpt_schedule(durations.keys(), durations, 2)
+        loads = sorted(sum(durations[t] for t in shard) for shard in shards)
+
+        assert loads == [11.0, 12.0]
+
+    def test_deterministic_regardless_of_input_order(self, durations):
+        """Порядок сбора тестов не влияет на разбиение"""
+        forward = sharding.lpt_schedule(list(durations), durations, 3)
+        backward = sharding.lpt_schedule(list(reversed(list(durations))), durations, 3)
+
+        assert forward == backward
+
+    def test_unknown_tests_use_average(self, durations):
+        """Тесты без истории оцениваются средней длительностью"""
+        weights = sharding.estimate(["new::test", "tests/test_a.py::test_slow"], durations)
+
+        assert weights["new::test"] == 10.0
+
+    def test_empty_history(self):
+        """Без истории тесты распределяются равномерно по количеству"""
+        tests = [f"tests/test_x.py::test_{i}" for i in range(10)]
+        shards = sharding.lpt_schedule(tests, {}, 4)
+
+        assert sorted(len(shard) for shard in shards) == [2, 2, 3, 3]
+
+    def test_class_is_scheduled_as_one_unit(self, durations):
+        """При group=class_group тесты класса попадают в один шард"""
+        tests = ["t.py::TestA::test_1", "t.py::TestA::test_2", "t.py::TestB::test_1", "t.py::test_f"]
+        weights = {"t.py::TestA::test_1": 4.0, "t.py::TestA::test_2": 4.0,
+                   "t.py::TestB::test_1": 5.0, "t.py::test_f": 3.0}
+        shards = sharding.lpt_schedule(tests, weights, 2, group=sharding.class_group)
+
+        assert ["t.py::TestA::test_1", "t.py::TestA::test_2"] in shards
+        assert sorted(sum(weights[t] for t in shard) for shard in shards) == [8.0, 8.0]
+
+    @pytest.mark.parametrize("shard_index,shard_count", [(3, 3), (-1, 2), (0, 0)])
+    def test_invalid_shard_arguments(self, shard_index, shard_count):
+        """Некорректные параметры шардирования"""
+        with pytest.raises(ValueError):
+            sharding.select_shard(["t::a"], {}, shard_index, shard_count)
+
+
+class TestMergeReports:
+    """Тесты слияния отчетов шардов"""
+
+    def write_junit(self, path, cases, time, failures=0):
+        suite = (
+            f'<testsuites><testsuite name="pytest" tests="{len(cases)}" failures="{failures}" '
+            f'errors="0" skipped="0" time="{time}">'
+            + "".join(f'<testcase classname="tests" name="{name}" time="1"/>' for name in cases)
+            + "</testsuite></testsuites>"
+        )
+        path.write_text(suite)
+        return str(path)
+
+    def test_merge_junit(self, tmp_path):
+        """Счетчики суммируются, wall time - самый долгий шард"""
+        first = self.write_junit(tmp_path / "junit-0.xml", ["a", "b"], 4.0)
+        second = self.write_junit(tmp_path / "junit-1.xml", ["c"], 2.0, failures=1)
+        output = tmp_path / "merged.xml"
+
+        summary = sharding.merge_junit([first, second], str(output))
+
+        assert summary["tests"] == 3
+        assert summary["failures"] == 1
+        assert summary["total_time"] == 6.0
+        assert summary["wall_time"] == 4.0
+        assert summary["balance"] == 0.75
+        assert output.read_text().count("<testcase") == 3
+
+    def test_merge_durations(self, tmp_path):
+        """Новые длительности дополняют и перезаписывают историю"""
+        store = tmp_path / "durations.json"
+        store.write_text(json.dumps({"t::a": 1.0, "t::b": 2.0}))
+        shard = tmp_path / "durations-0.json"
+        shard.write_text(json.dumps({"t::b": 3.0, "t::c": 4.0}))
+
+        merged = sharding.merge_durations(str(store), [str(shard)])
+
+        assert merged == {"t::a": 1.0, "t::b": 3.0, "t::c": 4.0}
+        assert sharding.load_durations(str(store)) == merged
+
+    def test_merge_timings(self, tmp_path):
+        """Wall time запуска - от старта первого шарда до конца последнего"""
+        sharding.save_timing(str(tmp_path / "timing-0.json"), 0, 100.0, 110.0, 0)
+        sharding.save_timing(str(tmp_path / "timing-1.json"), 1, 103.0, 115.5, 1)
+
+        timings = sharding.merge_timings([str(tmp_path / "timing-0.json"), str(tmp_path / "timing-1.json")])
+
+        assert timings["run_wall_time"] == 15.5
+        assert timings["start_skew"] == 3.0
+        assert timings["exit_statuses"] == {"0": 0, "1": 1}
@@ -1,8 +1,9 @@
+import os
 import pytest
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from src.page_objects import GooglePage
+from src.page_objects import DemoAppPage, GooglePage
 
 
 class TestGoogleSearch:
@@ -35,9 +36,9 @@ class TestGoogleSearch:
         assert len(results) > 0
         assert any("docker" in result.text.lower() for result in results)
     
-    def test_google_search_with_page_object(self, driver):
+    def test_google_search_with_page_object(self, driver, page_perf):
         """Тест с использованием Page Object паттерна"""
-        google_page = GooglePage(driver)
+        google_page = GooglePage(driver, **page_perf)
         
         google_page.open()
         google_page.accept_cookies_if_present()
@@ -49,11 +50,12 @@ class TestGoogleSearch:
 
 
 class TestDemoApp:
-    """Тесты демо-приложения (если запущено локально)"""
+    """Тесты демо-приложения sample-app (если запущено локально)"""
     
     @pytest.fixture
     def app_url(self):
-        return "http://localhost:8000"  # URL нашего демо-приложения
+        # sample-app напрямую; через nginx - http://localhost:8080
+        return os.environ.get("DEMO_APP_URL", "http://localhost:5050")
     
     def test_home_page_loads(self, driver, app_url):
         """Тест загрузки главной страницы"""
@@ -66,4 +68,20 @@ class TestDemoApp:
             assert "Welcome" in header.text
             
         except Exception as e:
-            pytest.skip(f"Demo app not available: {e}")
\ No newline at end of file
+            pytest.skip(f"Demo app not available: {e}")
+    
+    def test_home_page_performance(self, driver, app_url, page_perf):
+        """Метрики загрузки главной страницы: образцы для перцентилей и порогов (benchmarks/page_perf.json)"""
+        page = DemoAppPage(driver, app_url, **page_perf)
+        try:
+            page.open()
+        except Exception as e:
+            pytest.skip(f"Demo app not available: {e}")
+        
+        for _ in range(int(os.environ.get("PAGE_PERF_RUNS", "5")) - 1):
+            assert page.has_navigation()
+            page.open()
+        
+        assert page.get_header_text()
+        assert page.metrics["load_ms"] > 0
+        assert page.metrics["ttfb_ms"] <= page.metrics["load_ms"]
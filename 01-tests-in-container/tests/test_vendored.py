@@ -0,0 +1,16 @@
+import importlib.util
+import os
+import pytest
+
+SCRIPT = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+                      "scripts", "sync_vendored.py")
+
+
+@pytest.mark.skipif(not os.path.exists(SCRIPT), reason="Вне репозитория (в образе тестов) копий нет")
+def test_vendored_copies_match_originals():
+    """Копии модулей из src/ в других проектах не разошлись с оригиналом"""
+    spec = importlib.util.spec_from_file_location("sync_vendored", SCRIPT)
+    sync_vendored = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(sync_vendored)
+
+    assert sync_vendored.drifted() == {}, "Run: python scripts/sync_vendored.py"
@@ -0,0 +1,92 @@
+import json
+import pytest
+from src import web_perf
+
+
+class TestPageMetrics:
+    """Тесты сведения записей Performance API в метрики"""
+
+    @pytest.fixture
+    def raw(self):
+        return {
+            "navigation": {
+                "startTime": 0, "responseStart": 42.5, "responseEnd": 50.0, "domInteractive": 120.0,
+                "domContentLoadedEventEnd": 130.25, "loadEventEnd": 310.0, "transferSize": 2048,
+            },
+            "paint": [{"name": "first-paint", "startTime": 140.0},
+                      {"name": "first-contentful-paint", "startTime": 150.0}],
+            "resources": [{"name": "/static/app.css", "duration": 12.0, "transferSize": 1024},
+                          {"name": "/api/users", "duration": 30.0, "transferSize": 3072}],
+        }
+
+    def test_navigation_and_paint(self, raw):
+        metrics = web_perf.page_metrics(raw)
+
+        assert metrics["ttfb_ms"] == 42.5
+        assert metrics["response_ms"] == 7.5
+        assert metrics["load_ms"] == 310.0
+        assert metrics["document_kb"] == 2.0
+        assert metrics["first_contentful_paint_ms"] == 150.0
+
+    def test_resources(self, raw):
+        metrics = web_perf.page_metrics(raw)
+
+        assert metrics["resource_count"] == 2
+        assert metrics["resource_kb"] == 4.0
+        assert metrics["slowest_resource_ms"] == 30.0
+
+    def test_cdp_metrics(self):
+        response = {"metrics": [{"name": "ScriptDuration", "value": 0.0125},
+                                {"name": "JSHeapUsedSize", "value": 2048},
+                                {"name": "Nodes", "value": 40}]}
+
+        assert web_perf.cdp_metrics(response) == {"cdp_script_ms": 12.5, "cdp_js_heap_kb": 2.0}
+
+
+class TestPercentiles:
+    """Тесты накопления образцов, перцентилей и порогов"""
+
+    @pytest.fixture
+    def samples_file(self, tmp_path):
+        path = str(tmp_path / "samples.ndjson")
+        for load in range(1, 21):
+            web_perf.append_sample(path, "demo-app", {"load_ms": load * 100.0, "ttfb_ms": 10.0})
+        web_perf.append_sample(path, "other", {"load_ms": 9000.0})
+        return path
+
+    def test_percentile_nearest_rank(self):
+        values = [float(v) for v in range(1, 101)]
+        assert web_perf.percentile(values, 50) == 50.0
+        assert web_perf.percentile(values, 95) == 95.0
+        assert web_perf.percentile([7.0], 95) == 7.0
+
+    def test_history_limits_samples(self, samples_file):
+        """В перцентилях - только последние history открытий страницы"""
+        samples = web_perf.load_samples(samples_file, history=10)
+
+        assert len(samples["demo-app"]) == 10
+        assert samples["demo-app"][0]["load_ms"] == 1100.0
+
+    def test_summary(self, samples_file):
+        summary = web_perf.summarize(web_perf.load_samples(samples_file))
+
+        assert summary["demo-app"]["runs"] == 20
+        assert summary["demo-app"]["metrics"]["load_ms"] == {"p50": 1000.0, "p90": 1800.0, "p95": 1900.0,
+                                                             "max": 2000.0}
+
+    def test_thresholds(self, samples_file, tmp_path):
+        """Порог страницы перекрывает общий порог "*" той же метрики"""
+        thresholds_file = tmp_path / "thresholds.json"
+        thresholds_file.write_text(json.dumps({
+            "*": {"load_ms": {"p95": 5000}},
+            "demo-app": {"load_ms": {"p95": 1500}, "ttfb_ms": {"p95": 50}},
+        }))
+        summary = web_perf.summarize(web_perf.load_samples(samples_file))
+
+        violations = web_perf.check_thresholds(summary, web_perf.load_thresholds(str(thresholds_file)))
+
+        assert violations == ["demo-app: load_ms p95 1900.0 > 1500", "other: load_ms p95 9000.0 > 5000"]
+
+    def test_missing_files(self, tmp_path):
+        assert web_perf.load_samples(str(tmp_path / "none.ndjson")) == {}
+        assert web_perf.load_thresholds(str(tmp_path / "none.json")) == {}
@@ -0,0 +1,168 @@
+"""Контроль допуска запросов (admission control) и сброс нагрузки
+
+У каждого маршрута свой адаптивный лимит одновременных запросов (AIMD):
+пока латентность близка к базовой, лимит растет на 1 за "окно" запросов,
+при росте латентности выше tolerance * baseline (и выше latency_floor) или
+ответе 5xx - умножается на backoff. Запрос сверх лимита сразу получает 503 с Retry-After, не занимая
+поток в пуле и не стоя в очереди до таймаута клиента.
+
+Middleware работает на уровне ASGI, до выполнения обработчика; исключенные
+маршруты (/health, /ready) не ограничиваются.
+"""
+from starlette.routing import Match
+from typing import Dict, Iterable, Optional
+import threading
+import time
+
+import orjson
+
+
+def route_key(scope) -> Optional[str]:
+    """Метод и шаблон пути маршрута ("GET /users/{user_id}/orders") или None, если маршрут не найден"""
+    for route in scope["app"].router.routes:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return f"{scope['method']} {route.path}"
+    return None
+
+
+class AdaptiveLimiter:
+    """Адаптивный лимит одновременных запросов (AIMD по латентности)"""
+
+    def __init__(self, initial_limit: int = 32, min_limit: int = 2, max_limit: int = 128,
+                 tolerance: float = 2.0, backoff: float = 0.9, latency_floor: float = 0.05):
+        self.limit = float(initial_limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.tolerance = tolerance
+        self.backoff = backoff
+        # Рост латентности ниже этого порога не считается перегрузкой (шум на быстрых маршрутах)
+        self.latency_floor = latency_floor
+        self.inflight = 0
+        self.baseline: Optional[float] = None
+        self._last_decrease = 0.0
+        self._lock = threading.Lock()
+        self.stats = {"accepted": 0, "rejected": 0}
+
+    def try_acquire(self) -> bool:
+        with self._lock:
+            if self.inflight >= int(self.limit):
+                self.stats["rejected"] += 1
+                return False
+            self.inflight += 1
+            self.stats["accepted"] += 1
+            return True
+
+    def release(self, latency: float, failed: bool = False):
+        with self._lock:
+            self.inflight -= 1
+            # Базовая латентность - минимум с медленным дрейфом вверх,
+            # чтобы лимит подстраивался под изменившуюся нормальную нагрузку
+            if self.baseline is None or latency < self.baseline:
+                self.baseline = latency
+            else:
+                self.baseline += (latency - self.baseline) * 0.01
+
+            now = time.monotonic()
+            if failed or latency > max(self.baseline * self.tolerance, self.latency_floor):
+                # Не чаще одного уменьшения за время запроса: один всплеск - одно снижение
+                if now - self._last_decrease > latency:
+                    self.limit = max(self.min_limit, self.limit * self.backoff)
+                    self._last_decrease = now
+            elif self.inflight + 1 >= int(self.limit) // 2:
+                # Растим лимит, только когда он реально используется
+                self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "limit": int(self.limit),
+                "inflight": self.inflight,
+                "baseline_ms": round(self.baseline * 1000, 2) if self.baseline is not None else None,
+                **self.stats,
+            }
+
+
+class AdmissionControl:
+    """Лимитеры по маршрутам (метод + шаблон пути)
+
+    route_settings - параметры AdaptiveLimiter для отдельных маршрутов
+    ("POST /orders"), остальные маршруты получают default_settings.
+    """
+
+    def __init__(self, exempt: Iterable[str] = ("/health", "/ready"),
+                 default_settings: Optional[dict] = None, route_settings: Optional[Dict[str, dict]] = None,
+                 retry_after: int = 1, reject_status: int = 503):
+        self.exempt = set(exempt)
+        self.default_settings = default_settings or {}
+        self.route_settings = route_settings or {}
+        self.retry_after = retry_after
+        self.reject_status = reject_status
+        self.limiters: Dict[str, AdaptiveLimiter] = {}
+        self._lock = threading.Lock()
+
+    def limiter_for(self, scope) -> Optional[AdaptiveLimiter]:
+        if scope["path"] in self.exempt:
+            return None
+        key = route_key(scope)
+        if key is None:
+            return None  # 404/405 обрабатывает сам роутер
+
+        limiter = self.limiters.get(key)
+        if limiter is None:
+            with self._lock:
+                limiter = self.limiters.setdefault(
+                    key, AdaptiveLimiter(**self.route_settings.get(key, self.default_settings))
+                )
+        return limiter
+
+    def snapshot(self) -> dict:
+        return {key: limiter.snapshot() for key, limiter in sorted(self.limiters.items())}
+
+
+class AdmissionMiddleware:
+    """ASGI middleware: запрос сверх лимита маршрута сразу получает отказ с Retry-After"""
+
+    def __init__(self, app, control: AdmissionControl):
+        self.app = app
+        self.control = control
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        limiter = self.control.limiter_for(scope)
+        if limiter is None:
+            await self.app(scope, receive, send)
+            return
+
+        if not limiter.try_acquire():
+            await self._reject(send)
+            return
+
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        started = time.monotonic()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            limiter.release(time.monotonic() - started, failed=status["code"] >= 500)
+
+    async def _reject(self, send):
+        body = orjson.dumps({"detail": "Service overloaded, retry later"})
+        await send({
+            "type": "http.response.start",
+            "status": self.control.reject_status,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(self.control.retry_after).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
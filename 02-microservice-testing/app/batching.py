@@ -0,0 +1,75 @@
+from concurrent.futures import Future
+from typing import Callable, Dict, Hashable, Iterable, List
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class BatchLoader:
+    """Объединение одновременных запросов по ключам в один batch (как dataloader)
+
+    Вызовы load() из разных потоков в течение окна window_seconds собираются
+    вместе, и batch_fn вызывается один раз для всех уникальных ключей.
+    batch_fn принимает список ключей и возвращает словарь {ключ: значение};
+    исключение batch_fn получают все ожидающие вызовы.
+    """
+
+    def __init__(self, batch_fn: Callable[[List[Hashable]], Dict], window_seconds: float = 0.002,
+                 max_batch_size: int = 100, timeout: float = 30.0):
+        self.batch_fn = batch_fn
+        self.window_seconds = window_seconds
+        self.max_batch_size = max_batch_size
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._pending: Dict[Hashable, List[Future]] = {}
+        self._timer = None
+        self.stats = {"loads": 0, "batches": 0}
+
+    def load(self, key: Hashable):
+        """Получить значение по ключу (блокирует до выполнения batch)"""
+        future = Future()
+        flush_now = False
+        with self._lock:
+            self.stats["loads"] += 1
+            self._pending.setdefault(key, []).append(future)
+            if len(self._pending) >= self.max_batch_size:
+                flush_now = True
+            elif self._timer is None:
+                self._timer = threading.Timer(self.window_seconds, self._flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+        if flush_now:
+            self._flush()
+        return future.result(timeout=self.timeout)
+
+    def _flush(self):
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            pending, self._pending = self._pending, {}
+            if not pending:
+                return
+            self.stats["batches"] += 1
+
+        keys = list(pending)
+        try:
+            results = self.batch_fn(keys)
+        except Exception as e:
+            logger.warning(f"Batch of {len(keys)} keys failed: {e}")
+            self._resolve(pending.values(), exception=e)
+            return
+
+        for key, futures in pending.items():
+            self._resolve([futures], result=results.get(key))
+
+    @staticmethod
+    def _resolve(groups: Iterable[List[Future]], result=None, exception=None):
+        for futures in groups:
+            for future in futures:
+                if exception is not None:
+                    future.set_exception(exception)
+                else:
+                    future.set_result(result)
@@ -1,42 +1,76 @@
-from models import SessionLocal, create_tables
+from models import engine
 from sqlalchemy import text
+from typing import Optional
+import os
+import random
+import threading
 import time
 import logging
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Экспоненциальная задержка между попытками подключения
+RETRY_INITIAL_DELAY = float(os.getenv("DB_RETRY_INITIAL_DELAY", "0.05"))
+RETRY_MAX_DELAY = float(os.getenv("DB_RETRY_MAX_DELAY", "0.5"))
 
-def init_database():
-    """Инициализация базы данных"""
-    max_retries = 30
-    retry_interval = 2
-    
-    for attempt in range(max_retries):
+# Устанавливается, когда БД ответила на SELECT 1
+_db_ready = threading.Event()
+
+
+def wait_for_database(timeout: Optional[float] = None) -> bool:
+    """Дождаться доступности БД (экспоненциальный backoff с jitter)
+
+    timeout=None - ждать бесконечно.
+    """
+    deadline = time.monotonic() + timeout if timeout is not None else None
+    delay = RETRY_INITIAL_DELAY
+    attempt = 0
+
+    while True:
+        attempt += 1
         try:
-            logger.info(f"Попытка подключения к БД: {attempt + 1}/{max_retries}")
-            
-            # Пробуем создать сессию
-            db = SessionLocal()
-            db.execute(text("SELECT 1"))
-            db.close()
-            
-            # Создаем таблицы
-            create_tables()
-            logger.info("База данных инициализирована успешно!")
+            with engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+            logger.info(f"База данных доступна (попытка {attempt})")
+            _db_ready.set()
             return True
-            
         except Exception as e:
-            logger.error(f"Ошибка подключения к БД: {e}")
-            if attempt < max_retries - 1:
-                logger.info(f"Повтор через {retry_interval} секунд...")
-                time.sleep(retry_interval)
-            else:
-                logger.error("Не удалось подключиться к базе данных!")
+            if deadline is not None and time.monotonic() + delay > deadline:
+                logger.error(f"Не удалось подключиться к базе данных: {e}")
                 return False
-    
-    return False
+            if attempt == 1 or attempt % 10 == 0:
+                logger.warning(f"БД недоступна (попытка {attempt}): {e}")
+            time.sleep(delay * random.uniform(0.5, 1.0))
+            delay = min(delay * 2, RETRY_MAX_DELAY)
+
+
+def init_database(timeout: Optional[float] = None) -> bool:
+    """Инициализация базы данных
+
+    Схема создается миграциями (python migrations.py) отдельным шагом
+    деплоя; DB_AUTO_MIGRATE=1 включает их применение при старте (для dev).
+    """
+    if not wait_for_database(timeout):
+        return False
+
+    if os.getenv("DB_AUTO_MIGRATE") == "1":
+        from migrations import migrate
+        migrate()
+    return True
+
+
+def start_background_init() -> threading.Thread:
+    """Подключаться к БД в фоне, не блокируя старт приложения"""
+    thread = threading.Thread(target=init_database, name="db-init", daemon=True)
+    thread.start()
+    return thread
+
+
+def is_database_ready() -> bool:
+    """Было ли успешное подключение к БД"""
+    return _db_ready.is_set()
 
 
 if __name__ == "__main__":
-    init_database()
+    init_database(timeout=float(os.getenv("DB_CONNECT_TIMEOUT", "60")))
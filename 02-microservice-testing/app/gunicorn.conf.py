@@ -0,0 +1,26 @@
+"""Конфигурация gunicorn для многопроцессного запуска приложения
+
+    gunicorn main:app -c gunicorn.conf.py
+
+Число воркеров задается WEB_CONCURRENCY (по умолчанию - число ядер).
+Схему БД воркеры не создают: миграции применяются отдельным шагом
+(python migrations.py), поэтому старт воркеров не конкурирует за DDL.
+"""
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+worker_class = "uvicorn.workers.UvicornWorker"
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "30"))
+graceful_timeout = 10
+keepalive = 5
+accesslog = "-"
+
+
+def on_starting(server):
+    """Передать итоговое число воркеров в расчет размера пула БД"""
+    # models импортируется воркерами после fork и читает WEB_CONCURRENCY
+    os.environ["WEB_CONCURRENCY"] = str(server.cfg.workers)
+    # Пул на воркер - доля общего бюджета подключений (models.pool_settings)
+    os.environ["DB_POOL_PER_WORKER"] = "1"
@@ -0,0 +1,224 @@
+"""Идемпотентность POST-запросов по заголовку Idempotency-Key
+
+Повтор запроса с тем же ключом получает сохраненный ответ без повторного
+вызова внешнего сервиса; одновременные запросы с одним ключом внутри процесса
+объединяются - обработчик выполняется один раз, остальные ждут его результат.
+
+Хранилища:
+- MemoryIdempotencyStore - LRU с TTL в памяти процесса (по умолчанию)
+- DatabaseIdempotencyStore - таблица idempotency_keys, общая для всех воркеров
+  и реплик; ключ резервируется строкой "в процессе", а одновременный запрос
+  в другом процессе опрашивает эту строку и получает тот же сохраненный ответ
+  (409 - только если ответа нет за wait_timeout); если первый запрос упал и
+  резерв снят, ожидающий выполняет запрос сам
+
+Сохраняются ответы со статусом < 500: после ошибки сервера или недоступности
+внешнего сервиса клиент может повторить запрос с тем же ключом.
+"""
+from models import engine
+from sqlalchemy import text
+from collections import OrderedDict
+from concurrent.futures import Future
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Optional, Tuple
+import hashlib
+import random
+import threading
+import time
+
+import orjson
+
+MAX_KEY_LENGTH = 255
+
+
+class IdempotencyError(Exception):
+    """Запрос нельзя выполнить с этим ключом (статус для ответа клиенту)"""
+
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+def fingerprint(payload) -> str:
+    """Отпечаток тела запроса: тот же ключ с другим телом - ошибка клиента"""
+    return hashlib.sha256(orjson.dumps(payload, option=orjson.OPT_SORT_KEYS)).hexdigest()
+
+
+class MemoryIdempotencyStore:
+    """Ответы в памяти процесса: не более max_keys ключей, каждый живет ttl секунд"""
+
+    def __init__(self, max_keys: int = 100000, ttl: float = 86400):
+        self.max_keys = max_keys
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._items: "OrderedDict[str, Tuple[float, dict]]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[dict]:
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                return None
+            expires_at, record = item
+            if expires_at <= time.monotonic():
+                del self._items[key]
+                return None
+            self._items.move_to_end(key)
+            return record
+
+    def reserve(self, key: str, request_fingerprint: str) -> bool:
+        # Одновременные запросы одного процесса уже объединены IdempotencyGuard
+        return True
+
+    def save(self, key: str, record: dict):
+        with self._lock:
+            self._items[key] = (time.monotonic() + self.ttl, record)
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_keys:
+                self._items.popitem(last=False)
+
+    def release(self, key: str):
+        pass
+
+
+class DatabaseIdempotencyStore:
+    """Ответы в таблице idempotency_keys (миграция 4)"""
+
+    def __init__(self, ttl: float = 86400, pending_timeout: float = 60, purge_probability: float = 0.01):
+        self.ttl = ttl
+        self.pending_timeout = pending_timeout
+        self.purge_probability = purge_probability
+
+    def get(self, key: str) -> Optional[dict]:
+        with engine.connect() as conn:
+            row = conn.execute(text(
+                """SELECT fingerprint, status_code, response FROM idempotency_keys
+                WHERE key = :key AND created_at > :cutoff"""
+            ), {"key": key, "cutoff": datetime.utcnow() - timedelta(seconds=self.ttl)}).first()
+        if row is None:
+            return None
+        return {
+            "fingerprint": row.fingerprint,
+            "status_code": row.status_code,  # None - запрос еще выполняется
+            "body": orjson.loads(row.response) if row.response is not None else None,
+        }
+
+    def reserve(self, key: str, request_fingerprint: str) -> bool:
+        """Занять ключ строкой "в процессе" (False - ключ уже занят)"""
+        now = datetime.utcnow()
+        with engine.begin() as conn:
+            # Истекшие ответы и зависшие резервы (процесс упал) больше не блокируют ключ
+            conn.execute(text(
+                """DELETE FROM idempotency_keys WHERE key = :key
+                AND (created_at <= :cutoff OR (status_code IS NULL AND created_at <= :pending_cutoff))"""
+            ), {
+                "key": key,
+                "cutoff": now - timedelta(seconds=self.ttl),
+                "pending_cutoff": now - timedelta(seconds=self.pending_timeout),
+            })
+            reserved = conn.execute(text(
+                """INSERT INTO idempotency_keys (key, fingerprint, created_at)
+                VALUES (:key, :fingerprint, :created_at) ON CONFLICT (key) DO NOTHING"""
+            ), {"key": key, "fingerprint": request_fingerprint, "created_at": now}).rowcount == 1
+        if random.random() < self.purge_probability:
+            self.purge()
+        return reserved
+
+    def save(self, key: str, record: dict):
+        with engine.begin() as conn:
+            conn.execute(text(
+                "UPDATE idempotency_keys SET status_code = :status_code, response = :response WHERE key = :key"
+            ), {"key": key, "status_code": record["status_code"], "response": orjson.dumps(record["body"]).decode()})
+
+    def release(self, key: str):
+        with engine.begin() as conn:
+            conn.execute(text("DELETE FROM idempotency_keys WHERE key = :key AND status_code IS NULL"),
+                         {"key": key})
+
+    def purge(self) -> int:
+        """Удалить истекшие ключи"""
+        with engine.begin() as conn:
+            return conn.execute(text("DELETE FROM idempotency_keys WHERE created_at <= :cutoff"),
+                                {"cutoff": datetime.utcnow() - timedelta(seconds=self.ttl)}).rowcount
+
+
+class IdempotencyGuard:
+    """Выполнение обработчика не более одного раза на ключ"""
+
+    def __init__(self, store, wait_timeout: float = 30.0, poll_interval: float = 0.05):
+        self.store = store
+        self.wait_timeout = wait_timeout
+        self.poll_interval = poll_interval
+        self._lock = threading.Lock()
+        self._inflight: Dict[str, Future] = {}
+
+    def execute(self, key: str, request_fingerprint: str,
+                handler: Callable[[], Tuple[int, dict]]) -> Tuple[int, dict, bool]:
+        """Вернуть (статус, тело, replayed); handler возвращает (статус, тело)"""
+        if not key or len(key) > MAX_KEY_LENGTH:
+            raise IdempotencyError(400, f"Idempotency-Key must be 1-{MAX_KEY_LENGTH} characters")
+
+        with self._lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._inflight[key] = Future()
+
+        if not leader:
+            record = future.result(timeout=self.wait_timeout)
+            return self._replay(record, request_fingerprint)
+
+        try:
+            deadline = time.monotonic() + self.wait_timeout
+            while True:
+                record = self.store.get(key)
+                if record is not None and record["status_code"] is None:
+                    # Ключ занят другим процессом: ждем его ответ
+                    record = self._await_record(key, deadline)
+                if record is not None:
+                    future.set_result(record)
+                    return self._replay(record, request_fingerprint)
+                # Ответа нет (или резерв снят после ошибки) - занимаем ключ сами
+                if self.store.reserve(key, request_fingerprint):
+                    break
+
+            try:
+                status_code, body = handler()
+            except Exception:
+                self.store.release(key)
+                raise
+
+            record = {"fingerprint": request_fingerprint, "status_code": status_code, "body": body}
+            if status_code < 500:
+                self.store.save(key, record)
+            else:
+                self.store.release(key)
+            future.set_result(record)
+            return status_code, body, False
+        except BaseException as e:
+            if not future.done():
+                future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def _await_record(self, key: str, deadline: float) -> Optional[dict]:
+        """Сохраненный ответ чужого запроса; None - резерв снят и ключ можно занять снова"""
+        interval = self.poll_interval
+        while True:
+            record = self.store.get(key)
+            if record is None or record["status_code"] is not None:
+                return record
+            if time.monotonic() >= deadline:
+                raise IdempotencyError(409, "A request with this Idempotency-Key is already in progress")
+            time.sleep(interval)
+            interval = min(interval * 2, 0.5)
+
+    @staticmethod
+    def _replay(record: dict, request_fingerprint: str) -> Tuple[int, dict, bool]:
+        if record["status_code"] is None:
+            raise IdempotencyError(409, "A request with this Idempotency-Key is already in progress")
+        if record["fingerprint"] != request_fingerprint:
+            raise IdempotencyError(422, "Idempotency-Key was already used with a different request body")
+        return record["status_code"], record["body"], True
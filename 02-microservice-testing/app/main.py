@@ -1,34 +1,208 @@
-from fastapi import FastAPI, HTTPException, Depends
+from fastapi import FastAPI, HTTPException, Depends, Query, Header
+from fastapi.responses import ORJSONResponse, PlainTextResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import text
+from sqlalchemy import text, select
 import requests
 import os
-from models import SessionLocal, User, Order
-from database import init_database
-from typing import List
+import sys
+from models import SessionLocal, User, engine
+from database import start_background_init, is_database_ready
+from migrations import LATEST_VERSION, current_version
+from batching import BatchLoader
+from schemas import UserCreate, UserOut, OrderCreate
+from queries import local_orders_page, user_exists, find_user, email_exists, insert_user, insert_order
+from summary import record_order, get_summary, get_summaries
+from writebehind import OrderWriter
+from admission import AdmissionControl, AdmissionMiddleware, route_key
+
+# Модули, общие с mock-сервером (shared/): в образе - /shared, локально - соседний каталог
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "shared"))
+import profiling
+import tracing
+from idempotency import (
+    IdempotencyGuard, IdempotencyError, MemoryIdempotencyStore, DatabaseIdempotencyStore, fingerprint
+)
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import List, Optional
+from datetime import datetime
 import logging
+import time
 
 # Настройка логирования
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-app = FastAPI(title="QA Demo Microservice", version="1.0.0")
+# orjson сериализует ответы быстрее стандартного json
+app = FastAPI(title="QA Demo Microservice", version="1.0.0", default_response_class=ORJSONResponse)
 
 # Конфигурация
 EXTERNAL_API_URL = os.getenv("EXTERNAL_API_URL", "http://localhost:8001")
+# Окно объединения запросов заказов в один batch (0 - без объединения)
+ORDERS_BATCH_WINDOW_MS = float(os.getenv("ORDERS_BATCH_WINDOW_MS", "2"))
+ORDERS_BATCH_MAX_SIZE = int(os.getenv("ORDERS_BATCH_MAX_SIZE", "100"))
+# Ограничение параллельных запросов к внешнему сервису из /users/{id}/overview
+UPSTREAM_MAX_CONCURRENCY = int(os.getenv("UPSTREAM_MAX_CONCURRENCY", "16"))
+OVERVIEW_TIMEOUT = float(os.getenv("OVERVIEW_TIMEOUT", "5"))
+# Максимум пользователей в одном запросе /orders/summary
+SUMMARY_MAX_USERS = int(os.getenv("SUMMARY_MAX_USERS", "1000"))
+# Запись локальных заказов: sync - до ответа, async - фоновыми пачками (write-behind)
+ORDERS_WRITE_MODE = os.getenv("ORDERS_WRITE_MODE", "sync")
+# Хранилище ответов для Idempotency-Key: memory (на процесс) или database (общее)
+IDEMPOTENCY_STORE = os.getenv("IDEMPOTENCY_STORE", "memory")
+IDEMPOTENCY_TTL = float(os.getenv("IDEMPOTENCY_TTL", "86400"))
+# Адаптивные лимиты одновременных запросов на маршрут (0 - выключено)
+ADMISSION_CONTROL = os.getenv("ADMISSION_CONTROL", "1") == "1"
+
+
+class UpstreamError(Exception):
+    """Внешний сервис ответил ошибкой"""
+    
+    def __init__(self, status_code: int):
+        super().__init__(f"External service returned {status_code}")
+        self.status_code = status_code
+
+
+def call_upstream(method: str, path: str, name: str, **kwargs) -> requests.Response:
+    """Запрос к внешнему сервису
+
+    С трассировкой - client span `upstream <METHOD> <name>` (name - шаблон пути)
+    и заголовок traceparent, чтобы span'ы mock-сервера попали в ту же трассу.
+    """
+    with tracing.span(f"upstream {method} {name}", "client") as span:
+        headers = tracing.inject(kwargs.pop("headers", None))
+        response = requests.request(method, f"{EXTERNAL_API_URL}{path}", headers=headers, **kwargs)
+        if span is not None:
+            span.set("http.status_code", response.status_code)
+        return response
+
+
+def fetch_orders_batch(user_ids: List[int]) -> dict:
+    """Заказы нескольких пользователей одним запросом к внешнему сервису"""
+    # Batch выполняется в потоке таймера и общий для нескольких трасс:
+    # в трассе запроса его время - span orders.batch_wait
+    response = call_upstream(
+        "GET", "/orders", "/orders",
+        params={"user_ids": ",".join(str(user_id) for user_id in user_ids)},
+        timeout=10
+    )
+    if response.status_code != 200:
+        raise UpstreamError(response.status_code)
+    orders_by_user = response.json()["orders_by_user"]
+    return {user_id: orders_by_user.get(str(user_id), []) for user_id in user_ids}
+
+
+orders_loader = BatchLoader(
+    fetch_orders_batch,
+    window_seconds=ORDERS_BATCH_WINDOW_MS / 1000,
+    max_batch_size=ORDERS_BATCH_MAX_SIZE
+) if ORDERS_BATCH_WINDOW_MS > 0 else None
+
+order_writer = OrderWriter(
+    max_queue=int(os.getenv("ORDERS_WRITE_QUEUE_SIZE", "10000")),
+    batch_size=int(os.getenv("ORDERS_WRITE_BATCH_SIZE", "500")),
+    flush_interval=float(os.getenv("ORDERS_WRITE_FLUSH_MS", "50")) / 1000,
+    enqueue_timeout=float(os.getenv("ORDERS_WRITE_ENQUEUE_TIMEOUT_MS", "100")) / 1000,
+    outbox_path=os.getenv("ORDERS_OUTBOX_PATH"),
+    replay_lease=float(os.getenv("ORDERS_OUTBOX_REPLAY_LEASE", "300"))
+) if ORDERS_WRITE_MODE == "async" else None
+
+idempotency_guard = IdempotencyGuard(
+    DatabaseIdempotencyStore(ttl=IDEMPOTENCY_TTL) if IDEMPOTENCY_STORE == "database"
+    else MemoryIdempotencyStore(max_keys=int(os.getenv("IDEMPOTENCY_MAX_KEYS", "100000")), ttl=IDEMPOTENCY_TTL)
+)
+
+# Маршруты, которые ходят во внешний сервис, ограничиваются отдельно и строже:
+# их медленные ответы не должны занимать весь пул потоков и мешать маршрутам БД
+UPSTREAM_LIMITS = {
+    "initial_limit": int(os.getenv("ADMISSION_UPSTREAM_LIMIT", "32")),
+    "min_limit": 4,
+    "max_limit": int(os.getenv("ADMISSION_UPSTREAM_MAX_LIMIT", "64")),
+}
+admission_control = AdmissionControl(
+    exempt=("/health", "/ready", "/admission"),
+    default_settings={
+        "initial_limit": int(os.getenv("ADMISSION_LIMIT", "64")),
+        "min_limit": 8,
+        "max_limit": int(os.getenv("ADMISSION_MAX_LIMIT", "128")),
+    },
+    route_settings={
+        "POST /orders": UPSTREAM_LIMITS,
+        "GET /users/{user_id}/orders": UPSTREAM_LIMITS,
+        "GET /users/{user_id}/overview": UPSTREAM_LIMITS,
+    },
+    retry_after=int(os.getenv("ADMISSION_RETRY_AFTER", "1")),
+)
+if ADMISSION_CONTROL:
+    app.add_middleware(AdmissionMiddleware, control=admission_control)
+
+# Трассировка (TRACING_ENABLED=1): внешний middleware, чтобы в span запроса
+# попадали и отказы admission control
+if tracing.is_enabled():
+    tracing.instrument_engine(engine)
+    app.add_middleware(
+        tracing.TracingMiddleware,
+        name_for=lambda scope: route_key(scope) or f"{scope['method']} (unmatched)",
+        service="app",
+        exempt=("/health", "/admission", "/debug/traces"),
+    )
+
+# Общий пул потоков для параллельных запросов к внешнему сервису
+upstream_executor = ThreadPoolExecutor(max_workers=UPSTREAM_MAX_CONCURRENCY, thread_name_prefix="upstream")
+
+
+def fetch_user_orders(user_id: int) -> list:
+    """Заказы пользователя из внешнего сервиса (через batch, если включен)"""
+    if orders_loader is not None:
+        with tracing.span("orders.batch_wait", category="upstream batch"):
+            return orders_loader.load(user_id)
+    
+    response = call_upstream("GET", f"/orders/{user_id}", "/orders/{user_id}", timeout=10)
+    if response.status_code == 200:
+        return response.json()["orders"]
+    elif response.status_code == 404:
+        return []
+    raise UpstreamError(response.status_code)
+
+
+def fetch_optional(path: str, name: str) -> Optional[dict]:
+    """GET к внешнему сервису: None при 404, UpstreamError при других ошибках"""
+    response = call_upstream("GET", path, name, timeout=OVERVIEW_TIMEOUT)
+    if response.status_code == 200:
+        return response.json()
+    elif response.status_code == 404:
+        return None
+    raise UpstreamError(response.status_code)
+
+
+def submit_upstream(fn, *args):
+    """Задача в upstream_executor с контекстом трассировки текущего запроса"""
+    return upstream_executor.submit(tracing.wrap(fn), *args)
 
-# Инициализация базы данных при старте
+# Подключение к базе данных в фоне: /health отвечает сразу,
+# /ready - когда БД доступна и схема мигрирована
 @app.on_event("startup")
 async def startup_event():
     logger.info("Инициализация приложения...")
-    if not init_database():
-        logger.error("Не удалось инициализировать базу данных!")
-        raise RuntimeError("Database initialization failed")
-    logger.info("Приложение инициализировано успешно!")
+    start_background_init()
+    if order_writer is not None:
+        order_writer.start()
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    if order_writer is not None:
+        # Очередь дописывается в БД до завершения воркера, остаток - в outbox
+        order_writer.close(timeout=float(os.getenv("ORDERS_WRITE_SHUTDOWN_TIMEOUT", "10")))
 
 
 def get_db():
-    """Получить сессию базы данных"""
+    """Получить сессию базы данных
+    
+    Горячие маршруты (заказы, создание пользователя, overview) открывают сессию
+    сами через `with SessionLocal()`: sync-зависимость с yield выполняется
+    в пуле потоков дважды (вход и выход), а соединение из пула не держится
+    во время запросов к внешнему сервису.
+    """
     db = SessionLocal()
     try:
         yield db
@@ -37,25 +211,83 @@ def get_db():
 
 
 @app.get("/health")
-def health_check():
-    """Health check эндпоинт"""
+async def health_check():
+    """Health check эндпоинт (async: не занимает поток в пуле и отвечает при перегрузке)"""
     return {"status": "healthy", "service": "qa-demo-microservice"}
 
 
+@app.get("/admission")
+async def admission_status():
+    """Текущие лимиты, число запросов в работе и отказы по маршрутам (лимитеры свои у каждого воркера)"""
+    return {"enabled": ADMISSION_CONTROL, "routes": admission_control.snapshot()}
+
+
+def run_profiling(token: Optional[str], action):
+    """Проверить токен администратора и выполнить действие профилирования"""
+    try:
+        profiling.check_token(token)
+        return action()
+    except profiling.ProfilingError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+
+
+# Профилирование: без PROFILING_ENABLED=1 и PROFILING_TOKEN маршруты не регистрируются
+if profiling.is_enabled():
+    @app.get("/debug/profile/cpu", response_class=PlainTextResponse)
+    def profile_cpu(seconds: float = 10, interval_ms: float = 5,
+                    x_profiling_token: Optional[str] = Header(None)):
+        """CPU-профиль за seconds секунд в collapsed-формате (для flamegraph)"""
+        return run_profiling(x_profiling_token, lambda: profiling.sample_cpu(seconds, interval_ms / 1000))
+    
+    @app.post("/debug/tracemalloc/start")
+    def tracemalloc_start(frames: int = 10, x_profiling_token: Optional[str] = Header(None)):
+        return run_profiling(x_profiling_token, lambda: profiling.memory_tracker.start(frames))
+    
+    @app.post("/debug/tracemalloc/stop")
+    def tracemalloc_stop(x_profiling_token: Optional[str] = Header(None)):
+        return run_profiling(x_profiling_token, profiling.memory_tracker.stop)
+    
+    @app.get("/debug/tracemalloc/snapshot")
+    def tracemalloc_snapshot(limit: int = 20, x_profiling_token: Optional[str] = Header(None)):
+        """Топ аллокаций; снимок становится базой для /debug/tracemalloc/diff"""
+        return run_profiling(x_profiling_token, lambda: profiling.memory_tracker.snapshot(limit))
+    
+    @app.get("/debug/tracemalloc/diff")
+    def tracemalloc_diff(limit: int = 20, x_profiling_token: Optional[str] = Header(None)):
+        """Рост аллокаций с предыдущего снимка"""
+        return run_profiling(x_profiling_token, lambda: profiling.memory_tracker.diff(limit))
+
+
+# Трассировка: последние span'ы процесса из кольцевого буфера (для scripts/trace_report.py)
+if tracing.is_enabled():
+    @app.get("/debug/traces")
+    async def debug_traces(trace_id: Optional[str] = None):
+        return {"service": "app", "spans": tracing.exporter.spans(trace_id)}
+
+
 @app.get("/ready")
 def readiness_check(db: Session = Depends(get_db)):
     """Readiness check эндпоинт"""
+    if not is_database_ready():
+        raise HTTPException(status_code=503, detail="Service not ready: database is not connected yet")
+    
     try:
-        # Проверяем подключение к базе
+        # Проверяем подключение к базе и версию схемы
         db.execute(text("SELECT 1"))
+        if db.get_bind().dialect.name == "postgresql":
+            schema_version = current_version(db)
+            if schema_version < LATEST_VERSION:
+                raise RuntimeError(f"schema version {schema_version}, expected {LATEST_VERSION}")
         
         # Проверяем внешний сервис
-        response = requests.get(f"{EXTERNAL_API_URL}/health", timeout=5)
+        response = call_upstream("GET", "/health", "/health", timeout=5)
         external_healthy = response.status_code == 200
         
         return {
             "status": "ready",
             "database": "connected",
+            # Версия, до которой должна быть мигрирована схема (migrations.LATEST_VERSION)
+            "schema_version": LATEST_VERSION,
             "external_service": "connected" if external_healthy else "disconnected"
         }
     except Exception as e:
@@ -63,107 +295,270 @@ def readiness_check(db: Session = Depends(get_db)):
         raise HTTPException(status_code=503, detail=f"Service not ready: {str(e)}")
 
 
-@app.get("/users", response_model=List[dict])
+@app.get("/users", response_model=List[UserOut])
 def get_users(db: Session = Depends(get_db)):
     """Получить список пользователей"""
     try:
-        users = db.query(User).all()
-        return [{"id": user.id, "name": user.name, "email": user.email} for user in users]
+        # Только нужные колонки без создания ORM-объектов; готовый ORJSONResponse
+        # не проходит повторную валидацию response_model для каждого элемента
+        rows = db.execute(select(User.id, User.name, User.email)).mappings()
+        return ORJSONResponse([dict(row) for row in rows])
     except Exception as e:
         logger.error(f"Error getting users: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
-@app.post("/users", response_model=dict)
-def create_user(user_data: dict, db: Session = Depends(get_db)):
+@app.post("/users", response_model=UserOut)
+def create_user(user_data: UserCreate):
     """Создать пользователя"""
+    with SessionLocal() as db:
+        try:
+            # Проверяем уникальность email
+            if email_exists(db, user_data.email):
+                raise HTTPException(status_code=400, detail="Email already exists")
+            
+            user = insert_user(db, user_data.name, user_data.email)
+            db.commit()
+            
+            logger.info(f"User created: {user.id}")
+            return ORJSONResponse({"id": user.id, "name": user.name, "email": user.email})
+            
+        except HTTPException:
+            raise
+        except Exception as e:
+            logger.error(f"Error creating user: {e}")
+            db.rollback()
+            raise HTTPException(status_code=500, detail="Internal server error")
+
+
+@app.get("/users/{user_id}/orders")
+def get_user_orders(
+    user_id: int,
+    source: str = Query("upstream", pattern="^(upstream|local)$"),
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = None
+):
+    """Получить заказы пользователя
+    
+    source=local - заказы из локальной БД с keyset-пагинацией (limit, cursor).
+    """
     try:
-        # Проверяем обязательные поля
-        if "name" not in user_data or "email" not in user_data:
-            raise HTTPException(status_code=400, detail="Name and email are required")
-        
-        # Проверяем уникальность email
-        existing_user = db.query(User).filter(User.email == user_data["email"]).first()
-        if existing_user:
-            raise HTTPException(status_code=400, detail="Email already exists")
-        
-        user = User(name=user_data["name"], email=user_data["email"])
-        db.add(user)
-        db.commit()
-        db.refresh(user)
+        # Соединение с БД возвращается в пул до запроса к внешнему сервису
+        with SessionLocal() as db:
+            # Проверяем существование пользователя
+            if not user_exists(db, user_id):
+                raise HTTPException(status_code=404, detail="User not found")
+            
+            if source == "local":
+                try:
+                    return local_orders_page(db, user_id, limit, cursor)
+                except ValueError as e:
+                    raise HTTPException(status_code=400, detail=str(e))
         
-        logger.info(f"User created: {user.id}")
-        return {"id": user.id, "name": user.name, "email": user.email}
+        # Получаем заказы из внешнего сервиса (одновременные запросы объединяются в batch)
+        return {"orders": fetch_user_orders(user_id)}
         
+    except requests.RequestException as e:
+        logger.error(f"External service error: {e}")
+        raise HTTPException(status_code=503, detail="External service unavailable")
+    except UpstreamError as e:
+        raise HTTPException(status_code=e.status_code, detail="External service error")
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error creating user: {e}")
-        db.rollback()
+        logger.error(f"Error getting user orders: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
-@app.get("/users/{user_id}/orders")
-def get_user_orders(user_id: int, db: Session = Depends(get_db)):
-    """Получить заказы пользователя"""
+@app.get("/users/{user_id}/orders/summary")
+def get_user_orders_summary(user_id: int, db: Session = Depends(get_db)):
+    """Количество заказов, сумма и время последнего заказа пользователя"""
     try:
-        # Проверяем существование пользователя
-        user = db.query(User).filter(User.id == user_id).first()
-        if not user:
+        summary = get_summary(db, user_id)
+        # Сводки нет - проверяем, существует ли пользователь
+        if summary["order_count"] == 0 and not user_exists(db, user_id):
             raise HTTPException(status_code=404, detail="User not found")
-        
-        # Получаем заказы из внешнего сервиса
-        response = requests.get(f"{EXTERNAL_API_URL}/orders/{user_id}", timeout=10)
-        if response.status_code == 200:
-            return response.json()
-        elif response.status_code == 404:
-            return {"orders": []}
-        else:
-            raise HTTPException(status_code=response.status_code, detail="External service error")
-            
-    except requests.RequestException as e:
-        logger.error(f"External service error: {e}")
-        raise HTTPException(status_code=503, detail="External service unavailable")
+        return summary
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error getting user orders: {e}")
+        logger.error(f"Error getting orders summary: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
+@app.get("/orders/summary")
+def get_orders_summary(
+    user_ids: str = Query(..., description="ID пользователей через запятую"),
+    db: Session = Depends(get_db)
+):
+    """Сводки заказов нескольких пользователей (для дашбордов)"""
+    try:
+        ids = [int(user_id) for user_id in user_ids.split(",") if user_id.strip()]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="user_ids must be comma-separated integers")
+    if not ids:
+        raise HTTPException(status_code=400, detail="user_ids is required")
+    if len(ids) > SUMMARY_MAX_USERS:
+        raise HTTPException(status_code=400, detail=f"At most {SUMMARY_MAX_USERS} user_ids per request")
+    
+    try:
+        return {"summaries": list(get_summaries(db, ids).values())}
+    except Exception as e:
+        logger.error(f"Error getting orders summary: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
+def describe_upstream_error(error: Exception) -> str:
+    """Короткое описание ошибки внешнего сервиса для ответа клиенту"""
+    if isinstance(error, UpstreamError):
+        return str(error)
+    if isinstance(error, requests.Timeout) or isinstance(error, TimeoutError):
+        return "timeout"
+    if isinstance(error, requests.RequestException):
+        return "External service unavailable"
+    return "Internal error"
+
+
+@app.get("/users/{user_id}/overview")
+def get_user_overview(user_id: int):
+    """Сводка по пользователю: профиль, заказы и статусы платежей
+    
+    Запросы к внешнему сервису выполняются параллельно; ошибка отдельной
+    части не ломает ответ, а попадает в "errors" (partial: true).
+    """
+    started = time.monotonic()
+    deadline = started + OVERVIEW_TIMEOUT
+    errors = {}
+    
+    # Внешние запросы стартуют сразу, параллельно с запросом в локальную БД
+    profile_future = submit_upstream(fetch_optional, f"/users/{user_id}/profile", "/users/{user_id}/profile")
+    orders_future = submit_upstream(fetch_user_orders, user_id)
+    
+    try:
+        with SessionLocal() as db:
+            user = find_user(db, user_id)
+    except Exception as e:
+        logger.error(f"Error getting user overview: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
+    if not user:
+        profile_future.cancel()
+        orders_future.cancel()
+        raise HTTPException(status_code=404, detail="User not found")
+    
+    try:
+        orders = orders_future.result(timeout=max(0, deadline - time.monotonic()))
+    except Exception as e:
+        logger.warning(f"Overview: orders for user {user_id} unavailable: {e}")
+        errors["orders"] = describe_upstream_error(e)
+        orders = []
+    
+    # Статусы платежей по каждому заказу - тоже параллельно
+    payment_futures = {
+        order["id"]: submit_upstream(fetch_optional, f"/payments/{order['id']}", "/payments/{order_id}")
+        for order in orders
+    }
+    wait(list(payment_futures.values()) + [profile_future], timeout=max(0, deadline - time.monotonic()))
+    
+    def collect(name, future):
+        if not future.done():
+            future.cancel()
+            errors[name] = "timeout"
+            return None
+        try:
+            return future.result()
+        except Exception as e:
+            logger.warning(f"Overview: {name} for user {user_id} unavailable: {e}")
+            errors[name] = describe_upstream_error(e)
+            return None
+    
+    profile = collect("profile", profile_future)
+    orders = [
+        {**order, "payment": collect(f"payment:{order['id']}", payment_futures[order["id"]])}
+        for order in orders
+    ]
+    
+    return {
+        "user": {"id": user.id, "name": user.name, "email": user.email},
+        "profile": profile,
+        "orders": orders,
+        "partial": bool(errors),
+        "errors": errors,
+        "elapsed_ms": round((time.monotonic() - started) * 1000, 1),
+    }
 
 
 @app.post("/orders", status_code=201)
-def create_order(order_data: dict, db: Session = Depends(get_db)):
-    """Создать заказ"""
+def create_order(
+    order_data: OrderCreate,
+    idempotency_key: Optional[str] = Header(None)
+):
+    """Создать заказ
+    
+    С заголовком Idempotency-Key повтор запроса возвращает сохраненный ответ
+    (заголовок Idempotent-Replayed: true) без повторного вызова внешнего сервиса.
+    """
+    if idempotency_key is None:
+        return place_order(order_data)
+    
+    # Повтор с сохраненным ответом не открывает сессию БД
+    def handler():
+        try:
+            return 201, place_order(order_data)
+        except HTTPException as e:
+            return e.status_code, {"detail": e.detail}
+    
+    try:
+        status_code, body, replayed = idempotency_guard.execute(
+            idempotency_key, fingerprint(order_data.model_dump()), handler
+        )
+    except IdempotencyError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+    except Exception as e:
+        logger.error(f"Idempotent order creation failed: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+    headers = {"Idempotent-Replayed": "true"} if replayed else None
+    return ORJSONResponse(body, status_code=status_code, headers=headers)
+
+
+def place_order(order_data: OrderCreate) -> dict:
+    """Создать заказ во внешнем сервисе и сохранить локально
+    
+    Соединение с БД не держится во время запроса к внешнему сервису:
+    проверка пользователя и вставка заказа - в отдельных коротких сессиях.
+    """
     try:
-        # Проверяем обязательные поля
-        required_fields = ["user_id", "items", "total"]
-        for field in required_fields:
-            if field not in order_data:
-                raise HTTPException(status_code=400, detail=f"Missing field: {field}")
-        
         # Проверяем пользователя
-        user = db.query(User).filter(User.id == order_data["user_id"]).first()
-        if not user:
-            raise HTTPException(status_code=404, detail="User not found")
+        with SessionLocal() as db:
+            if not user_exists(db, order_data.user_id):
+                raise HTTPException(status_code=404, detail="User not found")
         
         # Создаем заказ через внешний сервис
-        response = requests.post(f"{EXTERNAL_API_URL}/orders", json=order_data, timeout=10)
-        if response.status_code == 201:
-            # Сохраняем информацию о заказе в локальной БД
-            order = Order(
-                user_id=order_data["user_id"],
-                total=order_data["total"],
-                status="created"
-            )
-            db.add(order)
-            db.commit()
-            db.refresh(order)
-            
-            result = response.json()
-            result["local_order_id"] = order.id
-            return result
-        else:
+        response = call_upstream("POST", "/orders", "/orders", json=order_data.model_dump(), timeout=10)
+        if response.status_code != 201:
             raise HTTPException(status_code=response.status_code, detail="Failed to create order")
+        
+        result = response.json()
+        record = {
+            "user_id": order_data.user_id,
+            "total": order_data.total,
+            "status": "created",
+            "created_at": datetime.utcnow(),
+        }
+        
+        # write-behind: ответ не ждет БД; при переполненной очереди - синхронная запись
+        if order_writer is not None and order_writer.submit(record):
+            result["local_order_id"] = None
+            result["local_order_status"] = "queued"
+            return result
+        
+        # Сохраняем заказ и сводку по пользователю в одной транзакции
+        with SessionLocal.begin() as db:
+            order_id = insert_order(db, **record)
+            record_order(db, record["user_id"], record["total"], record["created_at"])
+        
+        result["local_order_id"] = order_id
+        result["local_order_status"] = "saved"
+        return result
             
     except requests.RequestException as e:
         logger.error(f"External service error: {e}")
@@ -172,10 +567,14 @@ def create_order(order_data: dict, db: Session = Depends(get_db)):
         raise
     except Exception as e:
         logger.error(f"Error creating order: {e}")
-        db.rollback()
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
+    workers = int(os.getenv("WEB_CONCURRENCY", "1"))
+    if workers > 1:
+        # Воркеры заново импортируют models и делят бюджет подключений (models.pool_settings)
+        os.environ["DB_POOL_PER_WORKER"] = "1"
+    # Несколько воркеров требуют импорт приложения по строке
+    uvicorn.run("main:app", host="0.0.0.0", port=8000, workers=workers)
\ No newline at end of file
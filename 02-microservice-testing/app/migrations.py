@@ -0,0 +1,182 @@
+"""Версионированные миграции схемы БД
+
+Запускаются один раз на деплой (Job в k8s, сервис migrate в docker-compose),
+а не каждой репликой при старте:
+
+    python migrations.py            # применить новые миграции
+    python migrations.py --status   # текущая версия схемы
+
+Примененные версии хранятся в таблице schema_migrations. Запуск держит
+сессионный advisory lock, поэтому параллельный запуск безопасен. Каждая
+миграция выполняется в своей транзакции, кроме NON_TRANSACTIONAL: индексы
+на таблицах с живой записью строятся CREATE INDEX CONCURRENTLY (вне
+транзакции, без блокировки INSERT на время деплоя). Для не-Postgres БД
+(локальные эксперименты) схема создается через metadata.create_all.
+"""
+from models import engine, Base, SCHEMA_LOCK_ID
+from sqlalchemy import text
+import argparse
+import logging
+import os
+import re
+import sys
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# (версия, описание, SQL) - существующие миграции не редактируются, только добавляются новые
+MIGRATIONS = [
+    (1, "initial schema", [
+        """CREATE TABLE IF NOT EXISTS users (
+            id SERIAL PRIMARY KEY,
+            name VARCHAR NOT NULL,
+            email VARCHAR NOT NULL,
+            created_at TIMESTAMP WITHOUT TIME ZONE
+        )""",
+        "CREATE INDEX IF NOT EXISTS ix_users_id ON users (id)",
+        "CREATE UNIQUE INDEX IF NOT EXISTS ix_users_email ON users (email)",
+        """CREATE TABLE IF NOT EXISTS orders (
+            id SERIAL PRIMARY KEY,
+            user_id INTEGER NOT NULL,
+            total FLOAT NOT NULL,
+            status VARCHAR,
+            created_at TIMESTAMP WITHOUT TIME ZONE
+        )""",
+        "CREATE INDEX IF NOT EXISTS ix_orders_id ON orders (id)",
+    ]),
+    (2, "orders (user_id, created_at) index", [
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_orders_user_id_created_at ON orders (user_id, created_at, id)",
+    ]),
+    (3, "user order summary", [
+        """CREATE TABLE IF NOT EXISTS user_order_summary (
+            user_id INTEGER PRIMARY KEY,
+            order_count INTEGER NOT NULL DEFAULT 0,
+            total_amount FLOAT NOT NULL DEFAULT 0,
+            last_order_at TIMESTAMP WITHOUT TIME ZONE
+        )""",
+        # Существующие заказы; дальше таблица обновляется вместе с заказами.
+        # SHARE блокирует вставку заказов до конца транзакции миграции
+        "LOCK TABLE orders IN SHARE MODE",
+        """INSERT INTO user_order_summary (user_id, order_count, total_amount, last_order_at)
+        SELECT user_id, COUNT(*), SUM(total), MAX(created_at) FROM orders GROUP BY user_id
+        ON CONFLICT (user_id) DO NOTHING""",
+    ]),
+    (4, "idempotency keys", [
+        """CREATE TABLE IF NOT EXISTS idempotency_keys (
+            key VARCHAR(255) PRIMARY KEY,
+            fingerprint VARCHAR(64) NOT NULL,
+            status_code INTEGER,
+            response TEXT,
+            created_at TIMESTAMP WITHOUT TIME ZONE NOT NULL
+        )""",
+        "CREATE INDEX IF NOT EXISTS ix_idempotency_keys_created_at ON idempotency_keys (created_at)",
+    ]),
+    (5, "orders dedupe key", [
+        # Колонка без DEFAULT - изменение только каталога, таблица не переписывается
+        "ALTER TABLE orders ADD COLUMN IF NOT EXISTS dedupe_key VARCHAR(64)",
+        "CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS ix_orders_dedupe_key ON orders (dedupe_key)",
+    ]),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+# Миграции вне транзакции (CONCURRENTLY); версия записывается после всех операторов
+NON_TRANSACTIONAL = {2, 5}
+
+_CONCURRENT_INDEX = re.compile(r"CREATE (?:UNIQUE )?INDEX CONCURRENTLY IF NOT EXISTS (\w+)", re.IGNORECASE)
+
+
+def current_version(conn) -> int:
+    """Текущая версия схемы (0, если миграции не применялись)"""
+    exists = conn.execute(text("SELECT to_regclass('schema_migrations') IS NOT NULL")).scalar()
+    if not exists:
+        return 0
+    return conn.execute(text("SELECT COALESCE(MAX(version), 0) FROM schema_migrations")).scalar()
+
+
+def drop_invalid_index(conn, statement: str):
+    """Удалить индекс, оставшийся невалидным после прерванного CREATE INDEX CONCURRENTLY
+
+    IF NOT EXISTS такой индекс не пересоздает, а планировщик его не использует.
+    """
+    match = _CONCURRENT_INDEX.search(statement)
+    if not match:
+        return
+    invalid = conn.execute(
+        text("SELECT NOT indisvalid FROM pg_index WHERE indexrelid = to_regclass(:name)"),
+        {"name": match.group(1)}
+    ).scalar()
+    if invalid:
+        logger.warning(f"Индекс {match.group(1)} невалиден (прерванная сборка), пересоздаем")
+        conn.execute(text(f"DROP INDEX CONCURRENTLY {match.group(1)}"))
+
+
+def record_version(conn, version: int, name: str):
+    conn.execute(
+        text("INSERT INTO schema_migrations (version, name) VALUES (:version, :name)"),
+        {"version": version, "name": name}
+    )
+
+
+def migrate() -> int:
+    """Применить недостающие миграции и вернуть версию схемы"""
+    if engine.dialect.name != "postgresql":
+        Base.metadata.create_all(bind=engine)
+        return LATEST_VERSION
+
+    # Соединение в autocommit держит сессионный advisory lock между транзакциями
+    # миграций и выполняет миграции без транзакции
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as lock_conn:
+        lock_conn.execute(text("SELECT pg_advisory_lock(:id)"), {"id": SCHEMA_LOCK_ID})
+        try:
+            lock_conn.execute(text(
+                """CREATE TABLE IF NOT EXISTS schema_migrations (
+                    version INTEGER PRIMARY KEY,
+                    name VARCHAR NOT NULL,
+                    applied_at TIMESTAMP WITHOUT TIME ZONE NOT NULL DEFAULT (now() AT TIME ZONE 'utc')
+                )"""
+            ))
+
+            applied = current_version(lock_conn)
+            for version, name, statements in MIGRATIONS:
+                if version <= applied:
+                    continue
+                logger.info(f"Применение миграции {version}: {name}")
+                if version in NON_TRANSACTIONAL:
+                    for statement in statements:
+                        drop_invalid_index(lock_conn, statement)
+                        lock_conn.execute(text(statement))
+                    record_version(lock_conn, version, name)
+                    continue
+                with engine.begin() as conn:
+                    for statement in statements:
+                        conn.execute(text(statement))
+                    record_version(conn, version, name)
+        finally:
+            lock_conn.execute(text("SELECT pg_advisory_unlock(:id)"), {"id": SCHEMA_LOCK_ID})
+
+    logger.info(f"Схема БД актуальна (версия {LATEST_VERSION})")
+    return LATEST_VERSION
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Миграции схемы БД")
+    parser.add_argument("--status", action="store_true", help="Показать версию схемы")
+    args = parser.parse_args()
+
+    from database import wait_for_database
+    if not wait_for_database(timeout=float(os.getenv("DB_CONNECT_TIMEOUT", "60"))):
+        return 1
+
+    if args.status:
+        with engine.connect() as conn:
+            version = current_version(conn) if engine.dialect.name == "postgresql" else LATEST_VERSION
+        print(f"schema version: {version} (latest: {LATEST_VERSION})")
+        return 0
+
+    migrate()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,106 @@
+"""Запросы горячих путей приложения
+
+Поиск пользователя и вставки собраны через lambda_stmt: SQLAlchemy кэширует
+и конструкцию запроса, и его компиляцию, а значения из замыкания (user_id,
+email) подставляются как параметры. Результат - строки колонок без создания
+ORM-объектов и identity map.
+"""
+from models import Order, User
+from sqlalchemy import select, insert, tuple_, lambda_stmt
+from sqlalchemy.engine import Row
+from sqlalchemy.orm import Session
+from datetime import datetime
+from typing import Optional, Tuple
+import base64
+
+
+def user_exists(db: Session, user_id: int) -> bool:
+    """Есть ли пользователь с таким id"""
+    stmt = lambda_stmt(lambda: select(User.id).where(User.id == user_id))
+    return db.execute(stmt).first() is not None
+
+
+def find_user(db: Session, user_id: int) -> Optional[Row]:
+    """Пользователь (id, name, email) или None"""
+    stmt = lambda_stmt(lambda: select(User.id, User.name, User.email).where(User.id == user_id))
+    return db.execute(stmt).first()
+
+
+def email_exists(db: Session, email: str) -> bool:
+    """Занят ли email"""
+    stmt = lambda_stmt(lambda: select(User.id).where(User.email == email))
+    return db.execute(stmt).first() is not None
+
+
+def insert_user(db: Session, name: str, email: str) -> Row:
+    """Вставить пользователя и вернуть (id, name, email) одним запросом (INSERT ... RETURNING)"""
+    created_at = datetime.utcnow()
+    stmt = lambda_stmt(
+        lambda: insert(User)
+        .values(name=name, email=email, created_at=created_at)
+        .returning(User.id, User.name, User.email)
+    )
+    return db.execute(stmt).one()
+
+
+def insert_order(db: Session, user_id: int, total: float, status: str, created_at: datetime) -> int:
+    """Вставить заказ и вернуть его id"""
+    stmt = lambda_stmt(
+        lambda: insert(Order)
+        .values(user_id=user_id, total=total, status=status, created_at=created_at)
+        .returning(Order.id)
+    )
+    return db.execute(stmt).scalar_one()
+
+
+def encode_cursor(created_at: datetime, order_id: int) -> str:
+    """Курсор keyset-пагинации: позиция последнего заказа на странице"""
+    raw = f"{created_at.isoformat()}|{order_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Разобрать курсор (ValueError, если он некорректный)"""
+    try:
+        created_at, order_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(created_at), int(order_id)
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+
+def local_orders_page(db: Session, user_id: int, limit: int, cursor: Optional[str] = None) -> dict:
+    """Страница заказов пользователя из локальной БД, новые первыми
+
+    Использует индекс (user_id, created_at, id): каждая страница - диапазонное
+    чтение индекса от позиции курсора, без OFFSET и сканирования таблицы.
+    """
+    query = (
+        select(Order.id, Order.user_id, Order.total, Order.status, Order.created_at)
+        .where(Order.user_id == user_id)
+        .order_by(Order.created_at.desc(), Order.id.desc())
+        .limit(limit + 1)
+    )
+    if cursor:
+        created_at, order_id = decode_cursor(cursor)
+        query = query.where(tuple_(Order.created_at, Order.id) < (created_at, order_id))
+
+    rows = db.execute(query).all()
+    page = rows[:limit]
+    next_cursor = None
+    if len(rows) > limit:
+        last = page[-1]
+        next_cursor = encode_cursor(last.created_at, last.id)
+
+    return {
+        "orders": [
+            {
+                "id": row.id,
+                "user_id": row.user_id,
+                "total": row.total,
+                "status": row.status,
+                "created_at": row.created_at.isoformat() if row.created_at else None,
+            }
+            for row in page
+        ],
+        "next_cursor": next_cursor,
+    }
@@ -0,0 +1,26 @@
+from pydantic import BaseModel, ConfigDict, Field
+from typing import Any, Dict, List
+
+
+class UserCreate(BaseModel):
+    """Данные для создания пользователя"""
+    name: str = Field(min_length=1)
+    email: str = Field(min_length=3)
+
+
+class UserOut(BaseModel):
+    """Пользователь в ответах API"""
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    name: str
+    email: str
+
+
+class OrderCreate(BaseModel):
+    """Данные для создания заказа (передаются во внешний сервис как есть)"""
+    model_config = ConfigDict(extra="allow")
+
+    user_id: int
+    items: List[Dict[str, Any]]
+    total: float
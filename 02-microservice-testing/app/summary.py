@@ -0,0 +1,170 @@
+"""Сводка заказов по пользователям (таблица user_order_summary)
+
+Строка на пользователя: количество заказов, сумма и время последнего заказа.
+Обновляется в той же транзакции, что и вставка заказа (record_order),
+поэтому чтение сводки - одна строка по первичному ключу вместо агрегации orders.
+
+    python summary.py backfill   # пересчитать сводку по таблице orders
+    python summary.py check      # найти расхождения (код возврата 1, если есть)
+"""
+from models import engine, UserOrderSummary
+from sqlalchemy import text, select, bindparam, Integer, Float, DateTime
+from sqlalchemy.orm import Session
+from datetime import datetime
+from typing import Dict, Iterable, List
+import argparse
+import logging
+import os
+import sys
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Допустимое расхождение суммы (накопленная ошибка округления float)
+AMOUNT_TOLERANCE = 1e-6
+
+# ON CONFLICT поддерживают и Postgres, и SQLite; конкурентные заказы одного
+# пользователя сериализуются блокировкой строки сводки
+_UPSERT_ORDER = text(
+    """INSERT INTO user_order_summary (user_id, order_count, total_amount, last_order_at)
+    VALUES (:user_id, :order_count, :total, :created_at)
+    ON CONFLICT (user_id) DO UPDATE SET
+        order_count = user_order_summary.order_count + excluded.order_count,
+        total_amount = user_order_summary.total_amount + excluded.total_amount,
+        last_order_at = CASE
+            WHEN user_order_summary.last_order_at IS NULL
+                OR excluded.last_order_at > user_order_summary.last_order_at
+            THEN excluded.last_order_at
+            ELSE user_order_summary.last_order_at
+        END"""
+).bindparams(bindparam("created_at", type_=DateTime))
+
+# Типы колонок для текстовых запросов (SQLite хранит даты строками)
+_SUMMARY_COLUMNS = {
+    "user_id": Integer, "order_count": Integer, "total_amount": Float, "last_order_at": DateTime,
+}
+
+_AGGREGATE_ORDERS = """SELECT user_id, COUNT(*) AS order_count, SUM(total) AS total_amount,
+    MAX(created_at) AS last_order_at FROM orders GROUP BY user_id"""
+
+
+def record_order(db: Session, user_id: int, total: float, created_at: datetime):
+    """Учесть новый заказ в сводке (коммитит вызывающий код вместе с заказом)"""
+    db.execute(_UPSERT_ORDER, {"user_id": user_id, "order_count": 1, "total": total, "created_at": created_at})
+
+
+def record_orders(db: Session, orders: Iterable[dict]):
+    """Учесть пачку заказов: один upsert на пользователя, а не на заказ"""
+    by_user: Dict[int, dict] = {}
+    for order in orders:
+        row = by_user.setdefault(order["user_id"], {
+            "user_id": order["user_id"], "order_count": 0, "total": 0.0, "created_at": order["created_at"]
+        })
+        row["order_count"] += 1
+        row["total"] += order["total"]
+        row["created_at"] = max(row["created_at"], order["created_at"])
+    if by_user:
+        # Одинаковый порядок блокировки строк у всех процессов - без взаимных блокировок
+        db.execute(_UPSERT_ORDER, [by_user[user_id] for user_id in sorted(by_user)])
+
+
+def serialize(user_id: int, row) -> dict:
+    """Сводка пользователя для ответа API (нули, если заказов нет)"""
+    if row is None:
+        return {"user_id": user_id, "order_count": 0, "total_amount": 0.0, "last_order_at": None}
+    return {
+        "user_id": user_id,
+        "order_count": row.order_count,
+        "total_amount": row.total_amount,
+        "last_order_at": row.last_order_at.isoformat() if row.last_order_at else None,
+    }
+
+
+def get_summaries(db: Session, user_ids: Iterable[int]) -> Dict[int, dict]:
+    """Сводки нескольких пользователей одним запросом по первичному ключу"""
+    user_ids = list(dict.fromkeys(user_ids))
+    rows = db.execute(
+        select(
+            UserOrderSummary.user_id,
+            UserOrderSummary.order_count,
+            UserOrderSummary.total_amount,
+            UserOrderSummary.last_order_at,
+        ).where(UserOrderSummary.user_id.in_(user_ids))
+    ).all()
+    by_user = {row.user_id: row for row in rows}
+    return {user_id: serialize(user_id, by_user.get(user_id)) for user_id in user_ids}
+
+
+def get_summary(db: Session, user_id: int) -> dict:
+    """Сводка одного пользователя"""
+    return get_summaries(db, [user_id])[user_id]
+
+
+def backfill() -> int:
+    """Пересчитать сводку по orders и вернуть количество пользователей с заказами
+
+    На Postgres таблица orders блокируется от записи на время пересчета,
+    чтобы заказы, созданные параллельно, не потерялись.
+    """
+    with engine.begin() as conn:
+        if engine.dialect.name == "postgresql":
+            conn.execute(text("LOCK TABLE orders IN SHARE MODE"))
+        conn.execute(text("DELETE FROM user_order_summary"))
+        result = conn.execute(text(
+            f"""INSERT INTO user_order_summary (user_id, order_count, total_amount, last_order_at)
+            {_AGGREGATE_ORDERS}"""
+        ))
+        users = result.rowcount
+    logger.info(f"Сводка заказов пересчитана: {users} пользователей")
+    return users
+
+
+def check_consistency() -> List[dict]:
+    """Сравнить сводку с агрегатами orders и вернуть расхождения"""
+    with engine.connect() as conn:
+        if engine.dialect.name == "postgresql":
+            # Оба запроса видят один снимок, параллельные заказы не дают ложных расхождений
+            conn.execution_options(isolation_level="REPEATABLE READ")
+        actual = {row.user_id: row for row in conn.execute(
+            text(_AGGREGATE_ORDERS).columns(**_SUMMARY_COLUMNS)
+        )}
+        stored = {row.user_id: row for row in conn.execute(text(
+            "SELECT user_id, order_count, total_amount, last_order_at FROM user_order_summary"
+        ).columns(**_SUMMARY_COLUMNS))}
+
+    mismatches = []
+    for user_id in sorted(set(actual) | set(stored)):
+        expected = serialize(user_id, actual.get(user_id))
+        found = serialize(user_id, stored.get(user_id))
+        if (expected["order_count"] != found["order_count"]
+                or abs(expected["total_amount"] - found["total_amount"]) > AMOUNT_TOLERANCE
+                or expected["last_order_at"] != found["last_order_at"]):
+            mismatches.append({"user_id": user_id, "expected": expected, "stored": found})
+    return mismatches
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Сводка заказов по пользователям")
+    parser.add_argument("command", choices=["backfill", "check"])
+    args = parser.parse_args()
+
+    from database import wait_for_database
+    if not wait_for_database(timeout=float(os.getenv("DB_CONNECT_TIMEOUT", "60"))):
+        return 1
+
+    if args.command == "backfill":
+        backfill()
+        return 0
+
+    mismatches = check_consistency()
+    for mismatch in mismatches[:20]:
+        print(f"user {mismatch['user_id']}: expected {mismatch['expected']}, stored {mismatch['stored']}")
+    if mismatches:
+        print(f"{len(mismatches)} mismatches, run `python summary.py backfill` to rebuild")
+        return 1
+    print("user_order_summary is consistent with orders")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
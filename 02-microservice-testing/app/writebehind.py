@@ -0,0 +1,230 @@
+"""Асинхронная запись заказов в локальную БД (write-behind)
+
+POST /orders кладет запись заказа в ограниченную очередь и сразу отвечает;
+фоновый поток забирает записи пачками и вставляет их одним multi-row INSERT
+вместе с обновлением сводки user_order_summary в одной транзакции.
+
+- Backpressure: если очередь полна дольше enqueue_timeout, submit() возвращает
+  False и вызывающий код пишет заказ синхронно (запрос замедляется, а не теряется)
+- Outbox: пачка, которую не удалось записать после повторов, и записи, оставшиеся
+  в очереди при остановке, дописываются в NDJSON-файл outbox_path. Файлы outbox
+  повторно записываются в БД при старте и после каждой успешной пачки. Файл,
+  который забрал на запись упавший процесс (*.replaying), забирается снова,
+  если процесса-владельца нет или файл не обновлялся дольше replay_lease
+- Повтор идемпотентен: у каждого заказа в очереди свой dedupe_key (уникальный
+  индекс orders), вставка идет с ON CONFLICT DO NOTHING, а сводка считается
+  только по вставленным строкам (RETURNING). Падение между коммитом пачки и
+  удалением outbox-файла не дает дублей при повторе
+- Записи, находящиеся в очереди в момент аварийного завершения процесса
+  (kill -9, OOM), теряются - это цена ответа без ожидания БД
+"""
+from models import SessionLocal, Order
+from summary import record_orders
+from sqlalchemy.dialects import postgresql, sqlite
+from datetime import datetime
+from typing import Callable, List, Optional
+import glob
+import json
+import logging
+import os
+import queue
+import threading
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+
+class OrderWriter:
+    """Фоновая пакетная запись заказов"""
+
+    def __init__(self, session_factory: Callable = SessionLocal, max_queue: int = 10000,
+                 batch_size: int = 500, flush_interval: float = 0.05, enqueue_timeout: float = 0.1,
+                 max_retries: int = 5, outbox_path: Optional[str] = None, replay_lease: float = 300.0):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.enqueue_timeout = enqueue_timeout
+        self.max_retries = max_retries
+        self.outbox_path = outbox_path
+        self.replay_lease = replay_lease
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self._stopping = threading.Event()
+        self._outbox_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._thread = None
+        self.stats = {"queued": 0, "written": 0, "batches": 0, "rejected": 0, "spilled": 0, "replayed": 0,
+                      "duplicates": 0}
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="order-writer", daemon=True)
+            self._thread.start()
+
+    def submit(self, order: dict) -> bool:
+        """Поставить заказ в очередь (False - очередь полна, писать синхронно)"""
+        if self._stopping.is_set():
+            return False
+        try:
+            # Копия: при отказе вызывающий код пишет исходный заказ синхронно
+            self._queue.put({**order, "dedupe_key": uuid.uuid4().hex}, timeout=self.enqueue_timeout)
+        except queue.Full:
+            self._count("rejected")
+            return False
+        self._count("queued")
+        return True
+
+    def _count(self, name: str, value: int = 1):
+        with self._stats_lock:
+            self.stats[name] += value
+
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    def close(self, timeout: float = 10.0):
+        """Дописать очередь в БД; то, что не успело за timeout, - в outbox"""
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        leftover = self._drain(limit=None)
+        if leftover:
+            logger.warning(f"Order writer stopped with {len(leftover)} pending orders")
+            self._spill(leftover)
+
+    def _run(self):
+        self._replay_outbox()
+        while not (self._stopping.is_set() and self._queue.empty()):
+            try:
+                first = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            batch = [first] + self._drain(limit=self.batch_size - 1)
+            if self._write_with_retry(batch):
+                self._replay_outbox()
+
+    def _drain(self, limit: Optional[int]) -> List[dict]:
+        items = []
+        while limit is None or len(items) < limit:
+            try:
+                items.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return items
+
+    def write_batch(self, orders: List[dict]) -> int:
+        """Заказы и сводка - одной транзакцией, один INSERT на пачку
+
+        Заказы с уже записанным dedupe_key пропускаются; возвращает число
+        вставленных строк.
+        """
+        db = self.session_factory()
+        try:
+            dialect = postgresql if db.get_bind().dialect.name == "postgresql" else sqlite
+            stmt = (
+                dialect.insert(Order)
+                .on_conflict_do_nothing(index_elements=["dedupe_key"])
+                .returning(Order.user_id, Order.total, Order.created_at)
+            )
+            inserted = db.execute(stmt, orders).mappings().all()
+            record_orders(db, inserted)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+        if len(inserted) < len(orders):
+            self._count("duplicates", len(orders) - len(inserted))
+            logger.info(f"{len(orders) - len(inserted)} orders already written, skipped")
+        return len(inserted)
+
+    def _write_with_retry(self, orders: List[dict]) -> bool:
+        delay = 0.1
+        for attempt in range(1, self.max_retries + 1):
+            try:
+                self._count("written", self.write_batch(orders))
+                self._count("batches")
+                return True
+            except Exception as e:
+                logger.warning(f"Order batch of {len(orders)} failed (attempt {attempt}): {e}")
+                if attempt < self.max_retries and not self._stopping.is_set():
+                    time.sleep(delay)
+                    delay = min(delay * 2, 2.0)
+        self._spill(orders)
+        return False
+
+    def _spill(self, orders: List[dict]):
+        """Сохранить незаписанные заказы в outbox-файл"""
+        if not self.outbox_path:
+            logger.error(f"{len(orders)} orders lost: ORDERS_OUTBOX_PATH is not set")
+            return
+        with self._outbox_lock, open(f"{self.outbox_path}.{os.getpid()}", "a") as outbox:
+            for order in orders:
+                outbox.write(json.dumps({**order, "created_at": order["created_at"].isoformat()}) + "\n")
+            outbox.flush()
+            os.fsync(outbox.fileno())
+        self._count("spilled", len(orders))
+        logger.warning(f"{len(orders)} orders saved to outbox {self.outbox_path}")
+
+    def _replay_outbox(self):
+        """Записать в БД заказы из outbox-файлов (в том числе оставшихся от прошлых запусков)"""
+        if not self.outbox_path:
+            return
+        for path in glob.glob(f"{glob.escape(self.outbox_path)}.*"):
+            if path.endswith(".replaying"):
+                if not self._abandoned(path):
+                    continue
+                # <outbox>.<pid>.<владелец>.replaying -> <outbox>.<pid>
+                source = path.rsplit(".", 2)[0]
+            else:
+                source = path
+            claimed = f"{source}.{os.getpid()}.replaying"
+            try:
+                with self._outbox_lock:
+                    # rename атомарен: файл забирает один процесс
+                    os.rename(path, claimed)
+                    # rename не меняет mtime: аренда отсчитывается от захвата
+                    os.utime(claimed)
+            except OSError:
+                continue
+
+            with open(claimed) as outbox:
+                orders = [json.loads(line) for line in outbox if line.strip()]
+            for order in orders:
+                order["created_at"] = datetime.fromisoformat(order["created_at"])
+
+            for start in range(0, len(orders), self.batch_size):
+                batch = orders[start:start + self.batch_size]
+                try:
+                    # Пачки, записанные до падения прошлого владельца, пропускаются по dedupe_key
+                    replayed = self.write_batch(batch)
+                except Exception as e:
+                    logger.warning(f"Outbox replay failed: {e}")
+                    self._spill(orders[start:])
+                    break
+                self._count("replayed", replayed)
+                # Продлить аренду, чтобы долгий повтор не забрал другой процесс
+                os.utime(claimed)
+            os.remove(claimed)
+
+    def _abandoned(self, path: str) -> bool:
+        """Файл *.replaying брошен: владелец не запущен или аренда истекла
+
+        Свой pid в имени - файл прошлого процесса с тем же pid (перезапуск
+        контейнера): повтор outbox идет только в потоке записи, и свой файл
+        он удаляет до следующего обхода.
+        """
+        try:
+            owner = int(path.rsplit(".", 2)[1])
+            age = time.time() - os.path.getmtime(path)
+        except (ValueError, OSError):
+            return False
+        if owner == os.getpid() or age > self.replay_lease:
+            return True
+        try:
+            os.kill(owner, 0)
+        except ProcessLookupError:
+            return True
+        except PermissionError:
+            pass
+        return False
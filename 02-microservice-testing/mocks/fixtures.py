@@ -0,0 +1,263 @@
+"""Хранилища больших наборов данных mock-сервера (FIXTURES_PATH)
+
+Оба хранилища отдают записи готовыми байтами JSON: обработчик пишет их в
+ответ как есть, без разбора и повторной сериализации через jsonify.
+
+- NdjsonFixtureStore - каталог с users.ndjson, orders.ndjson и payments.ndjson
+  (см. generate_fixtures.py); файлы читаются построчно, в памяти процесса -
+  строки записей в словарях по ключам
+- MmapFixtureStore - файл, собранный `python fixtures.py pack`: отсортированные
+  ключи, таблица смещений и сырые JSON-записи. Файл отображается в память
+  (mmap) только на чтение, поэтому все воркеры и процессы на узле делят одни
+  страницы в page cache, а поиск - бинарный поиск по ключам без загрузки
+
+Формат pack-файла (little-endian):
+
+    заголовок   MAGIC, число секций (u32), резерв (u32), начало данных (u64)
+    секции      имя (16 байт), число ключей, число записей, смещение ключей,
+                смещение таблицы (u64)
+    ключи       i64[count], по возрастанию
+    смещения    u64[count + 1] относительно начала данных; запись i - [off[i], off[i+1])
+    данные      JSON-записи подряд
+
+Секции: users (id -> профиль), orders (user_id -> JSON-массив заказов),
+payments (order_id -> платеж). Число записей секции - исходные строки NDJSON
+(для orders - заказы, а не пользователи с заказами): stats() обоих хранилищ
+считает одинаково.
+
+    python fixtures.py pack fixtures/ fixtures.pack
+    FIXTURES_PATH=fixtures.pack python mock_server.py
+"""
+from array import array
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Iterator, List, Optional, Tuple
+import argparse
+import json
+import logging
+import mmap
+import os
+import shutil
+import struct
+import sys
+import time
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"FXPACK02"
+HEADER = struct.Struct("<8sIIQ")
+SECTION = struct.Struct("<16sQQQQ")
+# Секция -> (файл, поле-ключ, записи сгруппированы в массив по ключу)
+SECTIONS = {
+    "users": ("users.ndjson", "id", False),
+    "orders": ("orders.ndjson", "user_id", True),
+    "payments": ("payments.ndjson", "order_id", False),
+}
+
+
+def read_ndjson(path: str, key_field: str) -> Iterator[Tuple[int, bytes]]:
+    """Пары (ключ, сырая строка JSON) из NDJSON-файла; пустые строки пропускаются"""
+    with open(path, "rb") as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield int(json.loads(line)[key_field]), line
+            except (ValueError, KeyError, TypeError) as e:
+                raise ValueError(f"{path}:{line_number}: invalid record: {e}") from e
+
+
+def _json_array(records: List[bytes]) -> bytes:
+    return b"[" + b",".join(records) + b"]"
+
+
+class NdjsonFixtureStore:
+    """Строки записей из NDJSON-файлов каталога в словарях по ключам"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.users = {}
+        self.orders_by_user = defaultdict(list)
+        self.payments_by_order = {}
+        self.load_seconds = 0.0
+
+    @classmethod
+    def load(cls, path: str) -> "NdjsonFixtureStore":
+        store = cls(path)
+        started = time.perf_counter()
+        for user_id, line in read_ndjson(os.path.join(path, "users.ndjson"), "id"):
+            store.users[user_id] = line
+        for user_id, line in read_ndjson(os.path.join(path, "orders.ndjson"), "user_id"):
+            store.orders_by_user[user_id].append(line)
+        for order_id, line in read_ndjson(os.path.join(path, "payments.ndjson"), "order_id"):
+            store.payments_by_order[order_id] = line
+        store.load_seconds = time.perf_counter() - started
+        logger.info(f"Loaded fixtures from {path} in {store.load_seconds:.1f}s: {store.stats()['counts']}")
+        return store
+
+    def get_user(self, user_id: int) -> Optional[bytes]:
+        return self.users.get(user_id)
+
+    def get_orders(self, user_id: int) -> bytes:
+        """JSON-массив заказов пользователя (пустой, если заказов нет)"""
+        return _json_array(self.orders_by_user.get(user_id, []))
+
+    def get_payment(self, order_id: int) -> Optional[bytes]:
+        return self.payments_by_order.get(order_id)
+
+    def stats(self) -> dict:
+        return {
+            "path": self.path,
+            "format": "ndjson",
+            "load_seconds": round(self.load_seconds, 3),
+            "counts": {
+                "users": len(self.users),
+                "orders": sum(len(orders) for orders in self.orders_by_user.values()),
+                "payments": len(self.payments_by_order),
+            },
+        }
+
+
+def _section_records(path: str, key_field: str, grouped: bool) -> Iterator[Tuple[int, bytes, int]]:
+    """(ключ, запись, число строк NDJSON в ней) по возрастанию ключа; при grouped - массив записей на ключ"""
+    previous, group = None, []
+    for key, line in read_ndjson(path, key_field):
+        if previous is not None and key < previous:
+            raise ValueError(f"{path}: records must be sorted by {key_field} ({key} after {previous})")
+        if key == previous and not grouped:
+            raise ValueError(f"{path}: duplicate {key_field} {key}")
+        if grouped and key != previous and group:
+            yield previous, _json_array(group), len(group)
+            group = []
+        if grouped:
+            group.append(line)
+        else:
+            yield key, line, 1
+        previous = key
+    if group:
+        yield previous, _json_array(group), len(group)
+
+
+def build_pack(source_dir: str, path: str) -> dict:
+    """Собрать pack-файл из NDJSON-каталога, вернуть число записей по секциям
+
+    Данные пишутся во временный файл потоково, в памяти только ключи и
+    смещения (16 байт на ключ). Готовый файл подменяется атомарно
+    (os.replace): процессы, отобразившие старый файл, дочитывают его.
+    """
+    tables = {}
+    data_path, tmp_path = f"{path}.data.tmp", f"{path}.tmp"
+    try:
+        with open(data_path, "wb") as data:
+            for name, (filename, key_field, grouped) in SECTIONS.items():
+                keys, offsets, records = array("q"), array("Q", [data.tell()]), 0
+                for key, record, lines in _section_records(os.path.join(source_dir, filename), key_field, grouped):
+                    keys.append(key)
+                    data.write(record)
+                    offsets.append(data.tell())
+                    records += lines
+                tables[name] = (keys, offsets, records)
+
+        position = HEADER.size + SECTION.size * len(tables)
+        entries = []
+        for name, (keys, offsets, records) in tables.items():
+            entries.append(SECTION.pack(name.encode(), len(keys), records, position, position + 8 * len(keys)))
+            position += 8 * len(keys) + 8 * len(offsets)
+
+        with open(tmp_path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, len(tables), 0, position))
+            f.write(b"".join(entries))
+            for keys, offsets, _ in tables.values():
+                f.write(keys.tobytes())
+                f.write(offsets.tobytes())
+            with open(data_path, "rb") as data:
+                shutil.copyfileobj(data, f, 1 << 20)
+        os.replace(tmp_path, path)
+    finally:
+        for leftover in (data_path, tmp_path):
+            if os.path.exists(leftover):
+                os.remove(leftover)
+    return {name: records for name, (_, _, records) in tables.items()}
+
+
+class MmapFixtureStore:
+    """Поиск записей в pack-файле, отображенном в память только на чтение"""
+
+    def __init__(self, path: str):
+        if sys.byteorder != "little":
+            raise ValueError("Fixture pack requires a little-endian platform")
+        self.path = path
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, section_count, _, self._data = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a fixture pack ({MAGIC.decode()}), rebuild it with `fixtures.py pack`")
+
+        view = memoryview(self._mm)
+        self._sections, self._records = {}, {}
+        for i in range(section_count):
+            name, count, records, keys_offset, offsets_offset = SECTION.unpack_from(
+                self._mm, HEADER.size + i * SECTION.size
+            )
+            name = name.rstrip(b"\0").decode()
+            keys = view[keys_offset:keys_offset + 8 * count].cast("q")
+            offsets = view[offsets_offset:offsets_offset + 8 * (count + 1)].cast("Q")
+            self._sections[name] = (keys, offsets)
+            self._records[name] = records
+
+    @classmethod
+    def load(cls, path: str) -> "MmapFixtureStore":
+        store = cls(path)
+        logger.info(f"Mapped fixture pack {path}: {store.stats()['counts']}")
+        return store
+
+    def _find(self, section: str, key: int) -> Optional[bytes]:
+        keys, offsets = self._sections[section]
+        i = bisect_left(keys, key)
+        if i == len(keys) or keys[i] != key:
+            return None
+        return self._mm[self._data + offsets[i]:self._data + offsets[i + 1]]
+
+    def get_user(self, user_id: int) -> Optional[bytes]:
+        return self._find("users", user_id)
+
+    def get_orders(self, user_id: int) -> bytes:
+        """JSON-массив заказов пользователя (пустой, если заказов нет)"""
+        return self._find("orders", user_id) or b"[]"
+
+    def get_payment(self, order_id: int) -> Optional[bytes]:
+        return self._find("payments", order_id)
+
+    def stats(self) -> dict:
+        return {
+            "path": self.path,
+            "format": "mmap",
+            "size_bytes": len(self._mm),
+            "counts": dict(self._records),
+        }
+
+
+def open_store(path: str):
+    """Хранилище по FIXTURES_PATH: каталог - NDJSON, файл - pack (mmap)"""
+    if os.path.isdir(path):
+        return NdjsonFixtureStore.load(path)
+    return MmapFixtureStore.load(path)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Сборка pack-файла для mock-сервера из NDJSON")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    pack = subparsers.add_parser("pack", help="Собрать pack-файл из каталога NDJSON")
+    pack.add_argument("source_dir")
+    pack.add_argument("output")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    counts = build_pack(args.source_dir, args.output)
+    print(f"{args.output}: {counts} in {time.perf_counter() - started:.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
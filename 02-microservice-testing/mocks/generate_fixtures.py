@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""Генератор больших наборов данных для mock-сервера
+
+Пишет users.ndjson, orders.ndjson и payments.ndjson (одна JSON-запись на
+строку) потоково, без накопления данных в памяти. Распределения:
+
+- число заказов на пользователя - Парето (--skew): у большинства 0-3 заказа,
+  у немногих - сотни (до --max-orders)
+- статус платежа - completed/pending/failed/refunded по весам PAYMENT_STATUSES,
+  статус заказа согласован с платежом; часть заказов без платежа (404)
+
+Одинаковые --seed и параметры дают побайтно одинаковые файлы. Заказы идут
+по возрастанию user_id, платежи - по возрастанию order_id.
+
+    python generate_fixtures.py --users 1000000 --seed 42 --out fixtures/
+    FIXTURES_PATH=fixtures/ python mock_server.py
+"""
+from datetime import datetime, timedelta, timezone
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+FIRST_NAMES = ["Alice", "Bob", "Carol", "David", "Eve", "Frank", "Grace", "Henry", "Ivy", "Jack",
+               "Kate", "Liam", "Mia", "Noah", "Olivia", "Paul", "Quinn", "Rose", "Sam", "Tina"]
+LAST_NAMES = ["Johnson", "Smith", "Brown", "Wilson", "Taylor", "Davis", "Clark", "Lewis", "Walker",
+              "Hall", "Young", "King", "Wright", "Green", "Baker", "Adams", "Nelson", "Hill"]
+STREETS = ["Main St", "Oak Ave", "Pine Rd", "Maple Dr", "Cedar Ln", "Elm St", "Park Ave", "Lake Rd"]
+CITIES = [("Anytown", "CA"), ("Another City", "NY"), ("Springfield", "IL"), ("Riverside", "TX"),
+          ("Fairview", "WA"), ("Georgetown", "MA"), ("Madison", "WI"), ("Franklin", "TN")]
+PRODUCTS = [("Laptop", 999.99), ("Book", 15.99), ("Headphones", 79.99), ("Mouse", 24.99),
+            ("Keyboard", 49.99), ("Monitor", 229.99), ("Phone", 699.0), ("Cable", 9.99),
+            ("Backpack", 59.5), ("Coffee", 12.49)]
+PAYMENT_METHODS = (["credit_card", "paypal", "debit_card", "bank_transfer"], [55, 25, 15, 5])
+# Статус платежа -> возможные статусы заказа
+PAYMENT_STATUSES = {
+    "completed": (82, ["completed", "shipped", "delivered"]),
+    "pending": (8, ["created"]),
+    "failed": (6, ["cancelled"]),
+    "refunded": (4, ["cancelled", "returned"]),
+}
+ORDERS_WITHOUT_PAYMENT = 0.03
+FIRST_ORDER_ID = 1001
+PERIOD_START = datetime(2023, 1, 1, tzinfo=timezone.utc)
+PERIOD_SECONDS = 365 * 24 * 3600
+
+
+def _timestamp(moment: datetime) -> str:
+    return moment.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _dump(record: dict) -> str:
+    return json.dumps(record, separators=(",", ":"), ensure_ascii=False) + "\n"
+
+
+def order_count(rng: random.Random, skew: float, max_orders: int) -> int:
+    """Число заказов пользователя: Парето с параметром skew (меньше - тяжелее хвост)"""
+    return min(int(rng.paretovariate(skew)) - 1, max_orders)
+
+
+def make_user(rng: random.Random, user_id: int) -> dict:
+    first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+    city, state = rng.choice(CITIES)
+    return {
+        "id": user_id,
+        "name": f"{first} {last}",
+        "email": f"{first.lower()}.{last.lower()}.{user_id}@example.com",
+        "phone": f"+1-555-{rng.randrange(10000):04d}",
+        "address": {
+            "street": f"{rng.randrange(1, 1000)} {rng.choice(STREETS)}",
+            "city": city,
+            "state": state,
+            "zip": f"{rng.randrange(10000, 100000)}",
+        },
+    }
+
+
+def make_order(rng: random.Random, order_id: int, user_id: int, created_at: datetime, payment_status) -> dict:
+    items = []
+    for product, price in rng.sample(PRODUCTS, rng.choice((1, 1, 1, 2, 2, 3))):
+        items.append({"product": product, "quantity": rng.choice((1, 1, 1, 2, 3)), "price": price})
+    status = rng.choice(PAYMENT_STATUSES[payment_status][1]) if payment_status else "created"
+    return {
+        "id": order_id,
+        "user_id": user_id,
+        "items": items,
+        "total": round(sum(item["quantity"] * item["price"] for item in items), 2),
+        "status": status,
+        "created_at": _timestamp(created_at),
+    }
+
+
+def make_payment(rng: random.Random, order: dict, created_at: datetime, status: str) -> dict:
+    return {
+        "id": f"PAY-{order['id']:07d}",
+        "order_id": order["id"],
+        "amount": order["total"],
+        "currency": "USD",
+        "status": status,
+        "payment_method": rng.choices(*PAYMENT_METHODS)[0],
+        "created_at": _timestamp(created_at + timedelta(seconds=rng.randrange(60, 1800))),
+    }
+
+
+def generate(out_dir: str, users: int, seed: int, skew: float = 1.3, max_orders: int = 1000) -> dict:
+    """Записать набор данных в out_dir, вернуть счетчики записей"""
+    rng = random.Random(seed)
+    statuses = list(PAYMENT_STATUSES)
+    weights = [PAYMENT_STATUSES[status][0] for status in statuses]
+    counts = {"users": 0, "orders": 0, "payments": 0}
+    order_id = FIRST_ORDER_ID
+
+    os.makedirs(out_dir, exist_ok=True)
+    files = {name: open(os.path.join(out_dir, f"{name}.ndjson"), "w", encoding="utf-8", buffering=1 << 20)
+             for name in counts}
+    try:
+        for user_id in range(1, users + 1):
+            files["users"].write(_dump(make_user(rng, user_id)))
+            moments = sorted(rng.randrange(PERIOD_SECONDS) for _ in range(order_count(rng, skew, max_orders)))
+            for offset in moments:
+                created_at = PERIOD_START + timedelta(seconds=offset)
+                payment_status = None if rng.random() < ORDERS_WITHOUT_PAYMENT else rng.choices(statuses, weights)[0]
+                order = make_order(rng, order_id, user_id, created_at, payment_status)
+                files["orders"].write(_dump(order))
+                if payment_status:
+                    files["payments"].write(_dump(make_payment(rng, order, created_at, payment_status)))
+                    counts["payments"] += 1
+                order_id += 1
+            counts["orders"] += len(moments)
+        counts["users"] = users
+    finally:
+        for f in files.values():
+            f.close()
+
+    with open(os.path.join(out_dir, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump({"seed": seed, "skew": skew, "max_orders": max_orders, "counts": counts}, f, indent=2)
+    return counts
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Генерация users/orders/payments в NDJSON для mock-сервера")
+    parser.add_argument("--users", type=int, default=100000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--skew", type=float, default=1.3, help="Параметр Парето для числа заказов на пользователя")
+    parser.add_argument("--max-orders", type=int, default=1000, help="Максимум заказов на пользователя")
+    parser.add_argument("--out", default="fixtures")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    counts = generate(args.out, args.users, args.seed, args.skew, args.max_orders)
+    elapsed = time.perf_counter() - started
+    print(f"{counts['users']} users, {counts['orders']} orders, {counts['payments']} payments "
+          f"-> {args.out} in {elapsed:.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,12 +1,22 @@
-from flask import Flask, jsonify, request, make_response
+from flask import Flask, g, jsonify, request, make_response
 from flask_cors import CORS
 import json
 import os
 import logging
+import sys
 import time
 import random
+import threading
+from collections import Counter
 from datetime import datetime
 
+import fixtures
+
+# Модули, общие с приложением (shared/): в образе - /shared, локально - соседний каталог
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "shared"))
+import profiling
+import tracing
+
 # Настройка логирования
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -16,10 +26,26 @@ CORS(app)  # Разрешаем CORS для всех доменов
 
 # Путь к файлам с заготовленными ответами
 RESPONSES_PATH = os.getenv("RESPONSES_PATH", "/app/responses")
+# Большой набор данных: каталог NDJSON (generate_fixtures.py) или pack-файл
+# (fixtures.py pack, mmap); если задан, заказы, платежи и профили отдаются
+# из него, а не из RESPONSES_PATH
+FIXTURES_PATH = os.getenv("FIXTURES_PATH")
+fixture_store = fixtures.open_store(FIXTURES_PATH) if FIXTURES_PATH else None
 
 # Глобальные переменные для симуляции состояния
 request_count = 0
 start_time = time.time()
+# Запросы заказов по user_id (одиночные и batch): тест объединения запросов
+# смотрит на счетчик своего пользователя, а не на общий request_count, в
+# который попадают запросы других тестов и шардов
+order_lookups = Counter()
+order_lookups_lock = threading.Lock()
+
+
+def count_order_lookups(user_ids):
+    with order_lookups_lock:
+        for user_id in set(user_ids):
+            order_lookups[user_id] += 1
 
 
 def load_response(filename: str):
@@ -38,6 +64,11 @@ def load_response(filename: str):
         return {"error": f"Invalid JSON in {filename}"}
 
 
+def json_bytes(body: bytes, status_code: int = 200):
+    """Ответ из готовых байтов JSON (записи хранилища fixtures) без jsonify"""
+    return make_response(body, status_code, {"Content-Type": "application/json"})
+
+
 @app.before_request
 def log_request():
     """Логирование каждого запроса"""
@@ -46,10 +77,23 @@ def log_request():
     logger.info(f"Request #{request_count}: {request.method} {request.url}")
 
 
+# Трассировка (TRACING_ENABLED=1): server span на запрос, продолжает трассу
+# приложения из заголовка traceparent
+TRACING_EXEMPT = {"/health", "/status", "/debug/traces"}
+
+
+@app.before_request
+def start_trace():
+    if tracing.is_enabled() and request.path not in TRACING_EXEMPT:
+        name = f"{request.method} {request.url_rule.rule if request.url_rule else '(unmatched)'}"
+        g.trace_span = tracing.start_server_span(request.headers.get(tracing.TRACEPARENT_HEADER), name, "mock-server")
+
+
 @app.after_request
 def log_response(response):
     """Логирование ответов"""
     logger.info(f"Response: {response.status_code}")
+    tracing.end_server_span(g.pop("trace_span", None), response.status_code)
     return response
 
 
@@ -78,12 +122,15 @@ def status():
             "/health",
             "/status", 
             "/orders/<user_id>",
+            "/orders?user_ids=1,2,3",
+            "/orders/<user_id>/lookups",
             "/orders (POST)",
             "/payments/<order_id>",
             "/users/<user_id>/profile",
             "/simulate-error/<status_code>",
             "/slow-response/<delay>"
         ],
+        "fixtures": fixture_store.stats() if fixture_store else None,
         "timestamp": datetime.utcnow().isoformat()
     })
 
@@ -92,6 +139,10 @@ def status():
 def get_user_orders(user_id: int):
     """Получить заказы пользователя (mock)"""
     logger.info(f"Getting orders for user {user_id}")
+    count_order_lookups([user_id])
+    
+    if fixture_store is not None:
+        return json_bytes(b'{"orders":' + fixture_store.get_orders(user_id) + b'}')
     
     orders_data = load_response("orders.json")
     
@@ -110,6 +161,50 @@ def get_user_orders(user_id: int):
     return jsonify(response), 200
 
 
+@app.route('/orders/<int:user_id>/lookups')
+def get_order_lookups(user_id: int):
+    """Сколько запросов заказов (одиночных и batch) затронули пользователя"""
+    with order_lookups_lock:
+        return jsonify({"user_id": user_id, "requests": order_lookups[user_id]})
+
+
+@app.route('/orders', methods=['GET'])
+def get_orders_batch():
+    """Получить заказы нескольких пользователей одним запросом (mock)
+
+    GET /orders?user_ids=1,2,3 -> {"orders_by_user": {"1": [...], "2": [...], "3": []}}
+    """
+    raw_ids = request.args.get("user_ids", "")
+    try:
+        user_ids = [int(user_id) for user_id in raw_ids.split(",") if user_id.strip()]
+    except ValueError:
+        return jsonify({"error": "user_ids must be a comma-separated list of integers"}), 400
+    
+    if not user_ids:
+        return jsonify({"error": "user_ids query parameter is required"}), 400
+    
+    logger.info(f"Getting orders for {len(user_ids)} users (batch)")
+    count_order_lookups(user_ids)
+    
+    if fixture_store is not None:
+        # Повторные id в запросе дают один ключ, как и в словаре ниже
+        entries = [b'"%d":%s' % (user_id, fixture_store.get_orders(user_id)) for user_id in dict.fromkeys(user_ids)]
+        return json_bytes(b'{"orders_by_user":{' + b",".join(entries) + b'}}')
+    
+    orders_data = load_response("orders.json")
+    
+    if "error" in orders_data:
+        return jsonify(orders_data), 500
+    
+    orders_by_user = {str(user_id): [] for user_id in user_ids}
+    for order in orders_data.get("orders", []):
+        key = str(order.get("user_id"))
+        if key in orders_by_user:
+            orders_by_user[key].append(order)
+    
+    return jsonify({"orders_by_user": orders_by_user}), 200
+
+
 @app.route('/orders', methods=['POST'])
 def create_order():
     """Создать заказ (mock)"""
@@ -155,6 +250,12 @@ def get_payment_status(order_id: int):
     """Получить статус платежа (mock)"""
     logger.info(f"Getting payment status for order {order_id}")
     
+    if fixture_store is not None:
+        payment = fixture_store.get_payment(order_id)
+        if payment is None:
+            return jsonify({"error": "Payment not found"}), 404
+        return json_bytes(payment)
+    
     payments_data = load_response("payments.json")
     
     if "error" in payments_data:
@@ -179,6 +280,12 @@ def get_user_profile(user_id: int):
     """Получить профиль пользователя (mock)"""
     logger.info(f"Getting profile for user {user_id}")
     
+    if fixture_store is not None:
+        user = fixture_store.get_user(user_id)
+        if user is None:
+            return jsonify({"error": "User not found"}), 404
+        return json_bytes(user)
+    
     users_data = load_response("users.json")
     
     if "error" in users_data:
@@ -253,6 +360,53 @@ def random_response():
     return jsonify(response_data), status_code
 
 
+def run_profiling(action):
+    """Проверить токен администратора и выполнить действие профилирования"""
+    try:
+        profiling.check_token(request.headers.get(profiling.TOKEN_HEADER))
+        return action()
+    except profiling.ProfilingError as e:
+        return jsonify({"error": e.detail}), e.status_code
+
+
+# Профилирование: без PROFILING_ENABLED=1 и PROFILING_TOKEN маршруты не регистрируются
+if profiling.is_enabled():
+    @app.route('/debug/profile/cpu')
+    def profile_cpu():
+        """CPU-профиль за seconds секунд в collapsed-формате (для flamegraph)"""
+        seconds = request.args.get('seconds', 10, type=float)
+        interval = request.args.get('interval_ms', 5, type=float) / 1000
+        return run_profiling(lambda: (profiling.sample_cpu(seconds, interval), 200, {"Content-Type": "text/plain"}))
+
+    @app.route('/debug/tracemalloc/start', methods=['POST'])
+    def tracemalloc_start():
+        frames = request.args.get('frames', 10, type=int)
+        return run_profiling(lambda: jsonify(profiling.memory_tracker.start(frames)))
+
+    @app.route('/debug/tracemalloc/stop', methods=['POST'])
+    def tracemalloc_stop():
+        return run_profiling(lambda: jsonify(profiling.memory_tracker.stop()))
+
+    @app.route('/debug/tracemalloc/snapshot')
+    def tracemalloc_snapshot():
+        """Топ аллокаций; снимок становится базой для /debug/tracemalloc/diff"""
+        limit = request.args.get('limit', 20, type=int)
+        return run_profiling(lambda: jsonify(profiling.memory_tracker.snapshot(limit)))
+
+    @app.route('/debug/tracemalloc/diff')
+    def tracemalloc_diff():
+        """Рост аллокаций с предыдущего снимка"""
+        limit = request.args.get('limit', 20, type=int)
+        return run_profiling(lambda: jsonify(profiling.memory_tracker.diff(limit)))
+
+
+# Трассировка: последние span'ы процесса из кольцевого буфера (для scripts/trace_report.py)
+if tracing.is_enabled():
+    @app.route('/debug/traces')
+    def debug_traces():
+        return jsonify({"service": "mock-server", "spans": tracing.exporter.spans(request.args.get('trace_id'))})
+
+
 # Обработка ошибок
 @app.errorhandler(404)
 def not_found(error):
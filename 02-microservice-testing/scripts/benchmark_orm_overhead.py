@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""Микробенчмарк накладных расходов ORM на запрос
+
+БД заменена SQLite в памяти (без сети и диска), поэтому измеряется
+только стоимость SQLAlchemy: построение запроса, ключ кэша/компиляция,
+создание сессии и ORM-объектов. Сравниваются прежние пути обработчиков
+(`db.query(User).filter(...)`, ORM add/commit/refresh) и lambda-запросы
+из app/queries.py.
+
+    python scripts/benchmark_orm_overhead.py --iterations 20000
+"""
+import argparse
+import itertools
+import os
+import statistics
+import sys
+import time
+
+os.environ["DATABASE_URL"] = "sqlite://"
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app"))
+
+from models import Base, SessionLocal, User, engine  # noqa: E402
+from queries import email_exists, insert_user, user_exists  # noqa: E402
+
+USERS = 1000
+# Уникальные email для создаваемых пользователей во всех прогонах
+_emails = itertools.count()
+
+
+def legacy_lookup(user_id: int):
+    db = SessionLocal()
+    try:
+        return db.query(User).filter(User.id == user_id).first() is not None
+    finally:
+        db.close()
+
+
+def lambda_lookup(user_id: int):
+    with SessionLocal() as db:
+        return user_exists(db, user_id)
+
+
+def legacy_create(_: int):
+    n = next(_emails)
+    db = SessionLocal()
+    try:
+        if db.query(User).filter(User.email == f"legacy{n}@example.com").first():
+            return
+        user = User(name="Bench", email=f"legacy{n}@example.com")
+        db.add(user)
+        db.commit()
+        db.refresh(user)
+        return user.id
+    finally:
+        db.close()
+
+
+def lambda_create(_: int):
+    n = next(_emails)
+    with SessionLocal() as db:
+        if email_exists(db, f"lambda{n}@example.com"):
+            return
+        user = insert_user(db, "Bench", f"lambda{n}@example.com")
+        db.commit()
+        return user.id
+
+
+def measure(fn, iterations: int, repeats: int) -> float:
+    """Медиана времени одного вызова по нескольким прогонам, мкс"""
+    results = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        for i in range(iterations):
+            fn(i % USERS + 1)
+        results.append((time.perf_counter() - started) / iterations * 1e6)
+    return statistics.median(results)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Накладные расходы ORM на запрос (БД - SQLite в памяти)")
+    parser.add_argument("--iterations", type=int, default=20000)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    with SessionLocal() as db:
+        db.add_all(User(name=f"User {i}", email=f"user{i}@example.com") for i in range(USERS))
+        db.commit()
+
+    cases = [
+        ("user lookup", legacy_lookup, lambda_lookup),
+        ("create user", legacy_create, lambda_create),
+    ]
+    print(f"{'path':<14} {'legacy us':>10} {'lambda us':>10} {'speedup':>8}")
+    for name, legacy, compiled in cases:
+        # Прогрев: заполнение кэша компиляции
+        measure(legacy, 200, 1)
+        measure(compiled, 200, 1)
+        before = measure(legacy, args.iterations, args.repeats)
+        after = measure(compiled, args.iterations, args.repeats)
+        print(f"{name:<14} {before:>10.1f} {after:>10.1f} {before / after:>7.2f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""Goodput приложения при росте нагрузки выше насыщения
+
+Для каждого уровня параллельности клиенты в течение --duration секунд шлют
+запросы на эндпоинт. Печатаются goodput (успешные ответы быстрее --slo-ms в секунду),
+отклоненные admission control (503/429) и p99 латентности успешных ответов.
+Отклоненный клиент ждет Retry-After, как это делал бы нормальный клиент.
+С включенным admission control goodput после насыщения должен оставаться
+ровным, без него - падать из-за очереди в пуле потоков.
+
+    python scripts/benchmark_overload.py --url http://localhost:8000 \\
+        --path /users/1/overview --concurrency 8 32 128 256
+"""
+import argparse
+import sys
+import threading
+import time
+
+import requests
+
+
+def client(url: str, deadline: float, slo: float, honor_retry_after: bool, results: dict,
+           lock: threading.Lock):
+    session = requests.Session()
+    good = shed = errors = 0
+    latencies = []
+    while time.monotonic() < deadline:
+        started = time.monotonic()
+        try:
+            response = session.get(url, timeout=30)
+        except requests.RequestException:
+            errors += 1
+            continue
+        latency = time.monotonic() - started
+        if response.status_code in (429, 503) and "Retry-After" in response.headers:
+            shed += 1
+            if honor_retry_after:
+                time.sleep(min(float(response.headers["Retry-After"]), max(0, deadline - time.monotonic())))
+        elif response.status_code == 200:
+            latencies.append(latency)
+            if latency <= slo:
+                good += 1
+        else:
+            errors += 1
+    with lock:
+        results["good"] += good
+        results["shed"] += shed
+        results["errors"] += errors
+        results["latencies"].extend(latencies)
+
+
+def run_level(url: str, concurrency: int, duration: float, slo: float, honor_retry_after: bool) -> dict:
+    results = {"good": 0, "shed": 0, "errors": 0, "latencies": []}
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+    threads = [
+        threading.Thread(target=client, args=(url, deadline, slo, honor_retry_after, results, lock))
+        for _ in range(concurrency)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    latencies = sorted(results["latencies"])
+    results["p99_ms"] = latencies[int(len(latencies) * 0.99) - 1] * 1000 if latencies else 0
+    return results
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Goodput под перегрузкой")
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--path", default="/users/1/overview")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[8, 32, 128, 256])
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--slo-ms", type=float, default=1000.0, help="Ответ медленнее считается потерянным")
+    parser.add_argument("--ignore-retry-after", action="store_true",
+                        help="Повторять отклоненный запрос сразу, а не через Retry-After")
+    args = parser.parse_args()
+
+    url = f"{args.url}{args.path}"
+    print(f"endpoint: {url}, duration: {args.duration}s, SLO: {args.slo_ms:.0f} ms")
+    print(f"{'clients':>8} {'goodput/s':>10} {'shed/s':>8} {'errors':>7} {'p99 ms':>8}")
+    for concurrency in args.concurrency:
+        result = run_level(url, concurrency, args.duration, args.slo_ms / 1000,
+                           not args.ignore_retry_after)
+        print(f"{concurrency:>8} {result['good'] / args.duration:>10.0f} "
+              f"{result['shed'] / args.duration:>8.0f} {result['errors']:>7} {result['p99_ms']:>8.0f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -34,12 +34,10 @@ fi
 
 # Ждем готовности приложения
 log_info "Ожидание готовности сервисов..."
-for i in {1..30}; do
-    if curl -s http://localhost:8000/health > /dev/null; then
-        break
-    fi
-    sleep 1
-done
+python3 tests/wait_ready.py --timeout 30 app=http://localhost:8000/ready || {
+    log_error "Приложение не готово"
+    exit 1
+}
 
 log_info "Создание тестовых пользователей..."
 
@@ -49,7 +49,8 @@ check_service() {
     fi
 }
 
-check_service "http://localhost:8000/health" "Приложение"
+# /ready, а не /health: тестам нужны БД и примененные миграции
+check_service "http://localhost:8000/ready" "Приложение"
 check_service "http://localhost:8001/health" "Mock-сервер"
 
 # Создаем директорию для отчетов
@@ -58,18 +59,30 @@ log_info "Создана директория reports/"
 
 log_info "Запуск тестов через docker-compose..."
 
-# Запускаем тесты в отдельном контейнере
-docker-compose run --rm \
-    -e PYTHONPATH=/app \
-    tests \
-    python -m pytest /app/tests \
+# SHARD_COUNT>1 - шарды параллельными процессами в контейнере тестов, как pod'ы
+# Indexed Job в k8s (tests/run_shards.py), со слиянием отчетов
+if [[ "${SHARD_COUNT:-1}" -gt 1 ]]; then
+    TEST_COMMAND=(python /app/tests/run_shards.py --shards "$SHARD_COUNT" --reports /app/reports \
+        --durations-file /app/reports/test_durations.json -- --tb=short -p no:warnings)
+else
+    TEST_COMMAND=(python -m pytest /app/tests \
         -v \
         --tb=short \
         --html=/app/reports/integration-report.html \
         --self-contained-html \
         --junit-xml=/app/reports/integration-junit.xml \
+        --http-report=/app/reports/http_calls.json \
         --maxfail=5 \
-        -p no:warnings || {
+        -p no:warnings)
+fi
+
+# Запускаем тесты в отдельном контейнере
+# DB_RESET_MODE=template - вернуть БД к шаблону перед тестами (tests/db_reset.py)
+docker-compose run --rm \
+    -e PYTHONPATH=/app \
+    -e DB_RESET_MODE="${DB_RESET_MODE:-none}" \
+    tests \
+    "${TEST_COMMAND[@]}" || {
     
     log_error "Тесты завершились с ошибками"
     
@@ -111,6 +124,10 @@ if [[ -f "reports/integration-junit.xml" ]]; then
     log_success "JUnit XML: $(pwd)/reports/integration-junit.xml"
 fi
 
+if [[ -f "reports/http_calls.json" ]]; then
+    log_success "HTTP-вызовы тестов: $(pwd)/reports/http_calls.json"
+fi
+
 echo ""
 echo "🎉 Тестирование завершено!"
 echo "========================="
@@ -59,49 +59,18 @@ docker-compose down --remove-orphans
 log_info "Сборка и запуск сервисов..."
 docker-compose up -d --build
 
-# Ждем запуска сервисов
+# Ждем запуска сервисов: БД и mock-сервер параллельно, приложение - после них.
+# Приложение ждем по /ready: /health отвечает до подключения к БД и миграций
 log_info "Ожидание запуска сервисов..."
-
-# Функция проверки готовности сервиса
-wait_for_service() {
-    local service_name=$1
-    local url=$2
-    local max_attempts=30
-    local attempt=1
-    
-    while [[ $attempt -le $max_attempts ]]; do
-        if curl -s -f "$url" > /dev/null 2>&1; then
-            log_success "$service_name готов"
-            return 0
-        fi
-        
-        echo -n "."
-        sleep 2
-        ((attempt++))
-    done
-    
-    log_error "$service_name не запустился за $((max_attempts * 2)) секунд"
-    return 1
+python3 tests/wait_ready.py --timeout 120 --report reports/readiness.json \
+    db='cmd:docker-compose exec -T db pg_isready -U user -d testdb' \
+    mock=http://localhost:8001/health \
+    app=http://localhost:8000/ready \
+    --after app=db,mock || {
+    log_error "Сервисы не запустились (см. docker-compose logs)"
+    exit 1
 }
 
-# Проверяем готовность сервисов
-echo -n "Проверка базы данных"
-for i in {1..15}; do
-    if docker-compose exec -T db pg_isready -U user -d testdb > /dev/null 2>&1; then
-        echo
-        log_success "База данных готова"
-        break
-    fi
-    echo -n "."
-    sleep 2
-done
-
-echo -n "Проверка mock-сервера"
-wait_for_service "Mock-сервер" "http://localhost:8001/health"
-
-echo -n "Проверка приложения" 
-wait_for_service "Приложение" "http://localhost:8000/health"
-
 # Показываем статус сервисов
 echo ""
 log_info "Статус сервисов:"
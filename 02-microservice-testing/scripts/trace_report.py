@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""Критический путь запросов по трассам (W3C traceparent)
+
+Span'ы берутся из NDJSON-файлов (TRACING_FILE приложения и mock-сервера) или
+из эндпоинтов /debug/traces запущенных сервисов (TRACING_ENABLED=1).
+Для каждой трассы строится дерево span'ов и критический путь - цепочка, от
+которой зависит время ответа: от конца span'а назад выбирается дочерний
+span, закончившийся последним, время между дочерними - собственное время
+родителя. Время на пути делится по категориям:
+
+- app, mock-server - код сервиса (server/internal span'ы без дочерних)
+- db - запросы и удержание соединения (db.session, db.query)
+- network - клиентская часть HTTP-вызова вне обработчика вызываемого
+  сервиса: соединение, передача, сериализация, очередь до обработчика
+- атрибут category span'а задает категорию явно (orders.batch_wait -
+  ожидание общего batch-запроса заказов, "upstream batch")
+
+Отчет по эндпоинтам: число трасс, p50/p95, доли категорий и самые дорогие
+span'ы на критическом пути.
+
+    # отправить запросы с traceparent и разобрать их трассы
+    python scripts/trace_report.py run --app http://localhost:8000 --mock http://localhost:8001 \\
+        --request "GET /users/1/overview" --request 'POST /orders {"user_id": 1, "items": [], "total": 10}' -n 50
+
+    # разобрать уже записанные span'ы (например, после нагрузочного теста)
+    python scripts/trace_report.py analyze traces/app.ndjson traces/mock.ndjson
+"""
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+
+import requests
+
+CLIENT_SERVICE = "client"
+
+
+def load_spans(sources) -> list:
+    """Span'ы из NDJSON-файлов и URL сервисов (GET <url>/debug/traces)"""
+    spans = []
+    for source in sources:
+        if source.startswith(("http://", "https://")):
+            response = requests.get(f"{source.rstrip('/')}/debug/traces", timeout=30)
+            response.raise_for_status()
+            spans.extend(response.json()["spans"])
+        else:
+            with open(source, encoding="utf-8") as f:
+                spans.extend(json.loads(line) for line in f if line.strip())
+    # Span может прийти и из файла, и из буфера процесса
+    return list({span["span_id"]: span for span in spans}.values())
+
+
+def category(span: dict) -> str:
+    if "category" in span["attributes"]:
+        return span["attributes"]["category"]
+    if span["name"].startswith("db."):
+        return "db"
+    if span["kind"] == "client" or span["service"] == CLIENT_SERVICE:
+        return "network"
+    return span["service"]
+
+
+def critical_path(span: dict, children: dict, start: float, end: float, path: list):
+    """Добавить в path пары (span, собственное время на пути) для интервала [start, end] span'а"""
+    cursor = end
+    for child in sorted(children.get(span["span_id"], []), key=lambda s: s["start"] + s["duration"], reverse=True):
+        child_start = max(child["start"], start)
+        child_end = min(child["start"] + child["duration"], cursor)
+        if child_start >= cursor or child_end <= child_start:
+            continue  # выполнялся параллельно с уже выбранным дочерним span'ом
+        path.append((span, cursor - child_end))
+        critical_path(child, children, child_start, child_end, path)
+        cursor = child_start
+    path.append((span, max(0.0, cursor - start)))
+
+
+def build_traces(spans: list) -> dict:
+    """trace_id -> (корневой span, {span_id: [дочерние span'ы]})"""
+    by_trace = defaultdict(list)
+    for span in spans:
+        by_trace[span["trace_id"]].append(span)
+
+    traces = {}
+    for trace_id, trace_spans in by_trace.items():
+        ids = {span["span_id"] for span in trace_spans}
+        children = defaultdict(list)
+        roots = []
+        for span in trace_spans:
+            if span["parent_id"] in ids:
+                children[span["parent_id"]].append(span)
+            else:
+                roots.append(span)
+        # Корень - самый ранний span без родителя в трассе (клиент или приложение)
+        traces[trace_id] = (min(roots, key=lambda s: s["start"]), children)
+    return traces
+
+
+def endpoint_of(root: dict, children: dict) -> str:
+    """Имя эндпоинта приложения: первый server span от корня"""
+    span = root
+    while span["kind"] != "server" or span["service"] == CLIENT_SERVICE:
+        nested = children.get(span["span_id"])
+        if not nested:
+            return root["name"]
+        span = min(nested, key=lambda s: s["start"])
+    return span["name"]
+
+
+def percentile(values: list, q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))] if values else 0.0
+
+
+def analyze(spans: list, trace_ids=None, top: int = 5) -> dict:
+    """Отчет по эндпоинтам: длительности и разбивка критического пути"""
+    endpoints = defaultdict(lambda: {"durations": [], "categories": defaultdict(float), "spans": defaultdict(float)})
+    for trace_id, (root, children) in build_traces(spans).items():
+        if trace_ids is not None and trace_id not in trace_ids:
+            continue
+        stats = endpoints[endpoint_of(root, children)]
+        stats["durations"].append(root["duration"])
+        path = []
+        critical_path(root, children, root["start"], root["start"] + root["duration"], path)
+        for span, seconds in path:
+            stats["categories"][category(span)] += seconds
+            stats["spans"][f"{span['service']}: {span['name']}"] += seconds
+
+    report = {}
+    for endpoint, stats in sorted(endpoints.items()):
+        total = sum(stats["categories"].values()) or 1.0
+        count = len(stats["durations"])
+        report[endpoint] = {
+            "traces": count,
+            "p50_ms": round(percentile(stats["durations"], 0.5) * 1000, 2),
+            "p95_ms": round(percentile(stats["durations"], 0.95) * 1000, 2),
+            "critical_path": {
+                name: {"avg_ms": round(seconds / count * 1000, 2), "share": round(seconds / total, 3)}
+                for name, seconds in sorted(stats["categories"].items(), key=lambda item: -item[1])
+            },
+            "top_spans": [
+                {"span": name, "avg_ms": round(seconds / count * 1000, 2), "share": round(seconds / total, 3)}
+                for name, seconds in sorted(stats["spans"].items(), key=lambda item: -item[1])[:top]
+            ],
+        }
+    return report
+
+
+def print_report(report: dict):
+    if not report:
+        print("No traces found")
+        return
+    for endpoint, stats in report.items():
+        print(f"\n{endpoint}: {stats['traces']} traces, p50 {stats['p50_ms']:.1f} ms, p95 {stats['p95_ms']:.1f} ms")
+        print("  critical path:  " + ", ".join(
+            f"{name} {part['avg_ms']:.1f} ms ({part['share']:.0%})" for name, part in stats["critical_path"].items()
+        ))
+        for part in stats["top_spans"]:
+            print(f"  {part['share']:>6.1%} {part['avg_ms']:>9.2f} ms  {part['span']}")
+
+
+def traced_request(session: requests.Session, base_url: str, method: str, path: str, body) -> dict:
+    """Запрос с новым traceparent; возвращает client span"""
+    trace_id, span_id = f"{random.getrandbits(128):032x}", f"{random.getrandbits(64):016x}"
+    headers = {"traceparent": f"00-{trace_id}-{span_id}-01"}
+    started = time.time()
+    response = session.request(method, f"{base_url}{path}", json=body, headers=headers, timeout=30)
+    return {
+        "trace_id": trace_id,
+        "span_id": span_id,
+        "parent_id": None,
+        "name": f"{method} {path}",
+        "service": CLIENT_SERVICE,
+        "kind": "client",
+        "start": round(started, 6),
+        "duration": round(time.time() - started, 6),
+        "attributes": {"http.status_code": response.status_code},
+    }
+
+
+def parse_request(spec: str):
+    """'METHOD /path [JSON]' -> (method, path, body)"""
+    parts = spec.split(None, 2)
+    if len(parts) < 2:
+        raise ValueError(f"Expected 'METHOD /path [JSON body]', got '{spec}'")
+    return parts[0].upper(), parts[1], json.loads(parts[2]) if len(parts) > 2 else None
+
+
+def run(args) -> list:
+    """Отправить запросы и вернуть client span'ы"""
+    requests_to_send = [parse_request(spec) for spec in args.request] * args.count
+    local = threading.local()
+
+    def send(request):
+        if not hasattr(local, "session"):
+            local.session = requests.Session()
+        return traced_request(local.session, args.app.rstrip("/"), *request)
+
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        client_spans = list(pool.map(send, requests_to_send))
+    # Span'ы сервисов отдаются после завершения ответа; ждем запись в буфер
+    time.sleep(args.settle)
+    return client_spans
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Критический путь запросов по трассам")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="Отправить запросы с traceparent и разобрать их трассы")
+    run_parser.add_argument("--app", default="http://localhost:8000")
+    run_parser.add_argument("--mock", default="http://localhost:8001", help="'' - без span'ов mock-сервера")
+    run_parser.add_argument("--request", action="append", required=True, metavar="'METHOD /path [JSON]'")
+    run_parser.add_argument("-n", "--count", type=int, default=20, help="Повторов каждого запроса")
+    run_parser.add_argument("--concurrency", type=int, default=1)
+    run_parser.add_argument("--settle", type=float, default=0.2, help="Пауза перед чтением /debug/traces")
+
+    analyze_parser = subparsers.add_parser("analyze", help="Разобрать span'ы из файлов или сервисов")
+    analyze_parser.add_argument("sources", nargs="+", help="NDJSON-файлы или URL сервисов с /debug/traces")
+    analyze_parser.add_argument("--trace-id", action="append",
+                                help="Только эти трассы (trace_id теста - свойство trace_id в JUnit)")
+
+    for sub in (run_parser, analyze_parser):
+        sub.add_argument("--top", type=int, default=5, help="Самых дорогих span'ов на эндпоинт")
+        sub.add_argument("--json", help="Записать отчет в JSON-файл")
+    args = parser.parse_args()
+
+    if args.command == "run":
+        try:
+            client_spans = run(args)
+        except ValueError as e:
+            parser.error(str(e))
+        spans = client_spans + load_spans([url for url in (args.app, args.mock) if url])
+        report = analyze(spans, trace_ids={span["trace_id"] for span in client_spans}, top=args.top)
+    else:
+        report = analyze(load_spans(args.sources), trace_ids=set(args.trace_id) if args.trace_id else None,
+                         top=args.top)
+
+    print_report(report)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
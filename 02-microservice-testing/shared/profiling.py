@@ -0,0 +1,166 @@
+"""Профилирование работающего процесса по запросу (CPU и память)
+
+- sample_cpu(): сэмплирующий профайлер - фоновый поток снимает стеки всех
+  потоков через sys._current_frames() с заданным интервалом и возвращает
+  их в collapsed-формате (`frame;frame;frame count`), который принимают
+  flamegraph.pl, speedscope и inferno
+- MemoryTracker: tracemalloc - снимок топа аллокаций и разница с предыдущим
+  снимком для поиска утечек
+
+Эндпоинты регистрируются, только если PROFILING_ENABLED=1 и задан
+PROFILING_TOKEN (заголовок X-Profiling-Token); по умолчанию их нет,
+tracemalloc не запущен, фоновых потоков нет.
+
+Модуль без зависимостей, общий для приложения (app/) и mock-сервера (mocks/):
+лежит в shared/, в образы копируется в /shared (см. tracing.py).
+"""
+from collections import Counter
+from typing import Optional
+import hmac
+import os
+import sys
+import threading
+import time
+import tracemalloc
+
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED") == "1"
+PROFILING_TOKEN = os.getenv("PROFILING_TOKEN", "")
+TOKEN_HEADER = "X-Profiling-Token"
+MAX_PROFILE_SECONDS = float(os.getenv("PROFILING_MAX_SECONDS", "60"))
+MIN_SAMPLE_INTERVAL = 0.001
+
+
+class ProfilingError(Exception):
+    """Профилирование нельзя выполнить (статус для ответа клиенту)"""
+
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+def is_enabled() -> bool:
+    """Включено ли профилирование (без токена эндпоинты не регистрируются)"""
+    return PROFILING_ENABLED and bool(PROFILING_TOKEN)
+
+
+def check_token(token: Optional[str]):
+    """Проверить токен администратора из заголовка X-Profiling-Token"""
+    if not token or not hmac.compare_digest(token, PROFILING_TOKEN):
+        raise ProfilingError(403, "Invalid profiling token")
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name}@{os.path.basename(code.co_filename)}:{code.co_firstlineno}"
+
+
+_cpu_lock = threading.Lock()
+
+
+def sample_cpu(seconds: float, interval: float = 0.005) -> str:
+    """Сэмплировать стеки всех потоков seconds секунд, вернуть collapsed stacks
+
+    Первый фрейм каждого стека - имя потока. Одновременно выполняется
+    только одно профилирование.
+    """
+    if not 0 < seconds <= MAX_PROFILE_SECONDS:
+        raise ProfilingError(400, f"seconds must be in (0, {MAX_PROFILE_SECONDS:g}]")
+    if not MIN_SAMPLE_INTERVAL <= interval <= seconds:
+        # Нулевой интервал - цикл без пауз, который сам съедает CPU профилируемого процесса
+        raise ProfilingError(400, f"interval must be in [{MIN_SAMPLE_INTERVAL * 1000:g} ms, seconds]")
+    if not _cpu_lock.acquire(blocking=False):
+        raise ProfilingError(409, "CPU profile is already running")
+
+    try:
+        own_thread = threading.get_ident()
+        stacks = Counter()
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_thread:
+                    continue
+                labels = []
+                while frame is not None:
+                    labels.append(_frame_label(frame))
+                    frame = frame.f_back
+                labels.append(names.get(thread_id, f"thread-{thread_id}").replace(" ", "_"))
+                stacks[";".join(reversed(labels))] += 1
+            time.sleep(interval)
+    finally:
+        _cpu_lock.release()
+
+    return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+
+
+class MemoryTracker:
+    """tracemalloc: запуск, снимки и разница между снимками"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._baseline = None
+
+    def start(self, frames: int = 10) -> dict:
+        with self._lock:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(frames)
+            self._baseline = None
+        return self.status()
+
+    def stop(self) -> dict:
+        with self._lock:
+            tracemalloc.stop()
+            self._baseline = None
+        return self.status()
+
+    def status(self) -> dict:
+        tracing = tracemalloc.is_tracing()
+        current, peak = tracemalloc.get_traced_memory() if tracing else (0, 0)
+        return {"tracing": tracing, "current_bytes": current, "peak_bytes": peak}
+
+    def _take(self):
+        if not tracemalloc.is_tracing():
+            raise ProfilingError(409, "tracemalloc is not started")
+        return tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        ))
+
+    def snapshot(self, limit: int = 20) -> dict:
+        """Топ аллокаций по строкам кода; снимок становится базой для diff()"""
+        with self._lock:
+            snapshot = self._take()
+            self._baseline = snapshot
+        stats = snapshot.statistics("lineno")
+        return {
+            **self.status(),
+            "top": [
+                {"location": str(stat.traceback[0]), "size_bytes": stat.size, "count": stat.count}
+                for stat in stats[:limit]
+            ],
+        }
+
+    def diff(self, limit: int = 20) -> dict:
+        """Рост аллокаций с предыдущего снимка; текущий снимок становится новой базой"""
+        with self._lock:
+            if self._baseline is None:
+                raise ProfilingError(409, "Take a snapshot first")
+            snapshot = self._take()
+            stats = snapshot.compare_to(self._baseline, "lineno")
+            self._baseline = snapshot
+        return {
+            **self.status(),
+            "top": [
+                {
+                    "location": str(stat.traceback[0]),
+                    "size_diff_bytes": stat.size_diff,
+                    "count_diff": stat.count_diff,
+                    "size_bytes": stat.size,
+                }
+                for stat in stats[:limit]
+            ],
+        }
+
+
+memory_tracker = MemoryTracker()
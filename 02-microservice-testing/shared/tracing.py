@@ -0,0 +1,314 @@
+"""Распределенная трассировка запросов (W3C Trace Context)
+
+Контекст передается заголовком `traceparent`
+(`00-<trace_id 32 hex>-<span_id 16 hex>-<flags>`): тестовый клиент ->
+приложение -> mock-сервер. Каждый процесс пишет свои span'ы:
+
+- в кольцевой буфер в памяти (последние TRACING_BUFFER_SIZE span'ов,
+  эндпоинт /debug/traces)
+- и, если задан TRACING_FILE, в NDJSON-файл (одна запись на строку);
+  `{pid}` в имени заменяется на PID процесса - отдельный файл на воркер
+
+Span: trace_id, span_id, parent_id, name, service, kind (server, client,
+internal), start (unix time, с), duration (с), attributes. Отчет по
+критическому пути - scripts/trace_report.py.
+
+Накладные расходы: без трассировки (TRACING_ENABLED != 1 или запрос не
+попал в выборку) span() - одна проверка contextvar; запись span'а - добавление
+в список под блокировкой, сериализация и запись файла - в фоновом потоке.
+
+Модуль без зависимостей, общий для приложения (app/) и mock-сервера (mocks/):
+лежит в shared/, в образы копируется в /shared (контекст сборки обоих
+образов - 02-microservice-testing).
+"""
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar, copy_context
+from typing import Iterable, Optional
+import atexit
+import json
+import os
+import random
+import re
+import threading
+import time
+
+TRACING_ENABLED = os.getenv("TRACING_ENABLED") == "1"
+TRACING_FILE = os.getenv("TRACING_FILE")
+TRACING_SAMPLE_RATE = float(os.getenv("TRACING_SAMPLE_RATE", "1"))
+TRACING_BUFFER_SIZE = int(os.getenv("TRACING_BUFFER_SIZE", "10000"))
+TRACING_FLUSH_INTERVAL = float(os.getenv("TRACING_FLUSH_INTERVAL", "0.5"))
+TRACEPARENT_HEADER = "traceparent"
+
+_TRACEPARENT = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+# Время начала span'а: unix time первого вызова + монотонный счетчик
+_EPOCH = time.time() - time.perf_counter()
+
+
+def is_enabled() -> bool:
+    return TRACING_ENABLED
+
+
+def now() -> float:
+    return _EPOCH + time.perf_counter()
+
+
+def parse_traceparent(header: Optional[str]):
+    """(trace_id, parent_span_id, sampled) из заголовка или None, если заголовка нет или он некорректен"""
+    match = _TRACEPARENT.match(header.strip().lower()) if header else None
+    if not match or match.group(1) == "0" * 32 or match.group(2) == "0" * 16:
+        return None
+    return match.group(1), match.group(2), int(match.group(3), 16) & 1 == 1
+
+
+class Span:
+    __slots__ = ("trace_id", "span_id", "parent_id", "name", "service", "kind", "start", "end", "attributes",
+                 "token")
+
+    def __init__(self, trace_id: str, parent_id: Optional[str], name: str, service: str, kind: str,
+                 attributes: Optional[dict] = None):
+        self.trace_id = trace_id
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_id = parent_id
+        self.name = name
+        self.service = service
+        self.kind = kind
+        self.start = now()
+        self.end = None
+        self.attributes = attributes or {}
+        self.token = None
+
+    def set(self, key: str, value):
+        self.attributes[key] = value
+
+    @property
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+    def finish(self):
+        if self.end is None:
+            self.end = now()
+            exporter.export(self)
+
+    def to_dict(self) -> dict:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "service": self.service,
+            "kind": self.kind,
+            "start": round(self.start, 6),
+            "duration": round((self.end or now()) - self.start, 6),
+            "attributes": self.attributes,
+        }
+
+
+class SpanExporter:
+    """Кольцевой буфер последних span'ов и фоновая запись в NDJSON-файл"""
+
+    def __init__(self, path: Optional[str] = None, buffer_size: int = 10000, flush_interval: float = 0.5):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.buffer = deque(maxlen=buffer_size)
+        self._pending = []
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def export(self, span: Span):
+        with self._lock:
+            self.buffer.append(span)
+            if self.path:
+                self._pending.append(span)
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="trace-exporter", daemon=True)
+                    self._thread.start()
+
+    def spans(self, trace_id: Optional[str] = None) -> list:
+        with self._lock:
+            spans = list(self.buffer)
+        return [span.to_dict() for span in spans if trace_id is None or span.trace_id == trace_id]
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, []
+        if pending and self.path:
+            with open(self.path.replace("{pid}", str(os.getpid())), "a", encoding="utf-8") as f:
+                f.write("".join(json.dumps(span.to_dict(), separators=(",", ":")) + "\n" for span in pending))
+
+    def _run(self):
+        while True:
+            time.sleep(self.flush_interval)
+            self.flush()
+
+
+exporter = SpanExporter(TRACING_FILE, TRACING_BUFFER_SIZE, TRACING_FLUSH_INTERVAL)
+atexit.register(exporter.flush)
+
+_current: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+def current_span() -> Optional[Span]:
+    return _current.get()
+
+
+def start_server_span(traceparent: Optional[str], name: str, service: str) -> Optional[Span]:
+    """Span входящего запроса: продолжает трассу из traceparent или начинает новую
+
+    Возвращает None без трассировки (выключена или запрос не попал в выборку);
+    span становится текущим до end_server_span().
+    """
+    if not TRACING_ENABLED:
+        return None
+    parent = parse_traceparent(traceparent)
+    if parent is not None:
+        trace_id, parent_id, sampled = parent
+    else:
+        trace_id, parent_id = f"{random.getrandbits(128):032x}", None
+        sampled = random.random() < TRACING_SAMPLE_RATE
+    if not sampled:
+        return None
+    span = Span(trace_id, parent_id, name, service, "server")
+    span.token = _current.set(span)
+    return span
+
+
+def end_server_span(span: Optional[Span], status_code: int):
+    if span is None:
+        return
+    span.set("http.status_code", status_code)
+    span.finish()
+    try:
+        _current.reset(span.token)
+    except ValueError:
+        # Обработчик завершился в другом контексте (другом потоке)
+        _current.set(None)
+
+
+@contextmanager
+def span(name: str, kind: str = "internal", **attributes):
+    """Дочерний span текущего; без текущего span'а - ничего не делает (yield None)"""
+    parent = _current.get()
+    if parent is None:
+        yield None
+        return
+    child = Span(parent.trace_id, parent.span_id, name, parent.service, kind, attributes)
+    token = _current.set(child)
+    try:
+        yield child
+    finally:
+        _current.reset(token)
+        child.finish()
+
+
+def child_span(parent: Optional[Span], name: str, kind: str = "internal", **attributes) -> Optional[Span]:
+    """Span с явным родителем (не становится текущим), для событий вне контекста запроса"""
+    if parent is None:
+        return None
+    return Span(parent.trace_id, parent.span_id, name, parent.service, kind, attributes)
+
+
+def inject(headers: Optional[dict] = None) -> Optional[dict]:
+    """Добавить traceparent текущего span'а в заголовки исходящего запроса"""
+    current = _current.get()
+    if current is None:
+        return headers
+    headers = dict(headers or {})
+    headers[TRACEPARENT_HEADER] = current.traceparent
+    return headers
+
+
+def wrap(fn):
+    """Функция для пула потоков с контекстом трассировки вызывающего потока"""
+    if _current.get() is None:
+        return fn
+    context = copy_context()
+    return lambda *args, **kwargs: context.run(fn, *args, **kwargs)
+
+
+class TracingMiddleware:
+    """ASGI middleware: server span на запрос; name_for(scope) - имя span'а (метод и шаблон пути)"""
+
+    def __init__(self, app, name_for, service: str, exempt: Iterable[str] = ()):
+        self.app = app
+        self.name_for = name_for
+        self.service = service
+        self.exempt = set(exempt)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not TRACING_ENABLED or scope["path"] in self.exempt:
+            await self.app(scope, receive, send)
+            return
+
+        traceparent = None
+        for key, value in scope["headers"]:
+            if key == b"traceparent":
+                traceparent = value.decode("latin-1")
+                break
+        span = start_server_span(traceparent, self.name_for(scope), self.service)
+        if span is None:
+            await self.app(scope, receive, send)
+            return
+
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            end_server_span(span, status["code"])
+
+
+_STATEMENT = re.compile(r"^\s*(select|insert\s+into|update|delete\s+from|lock\s+table)\b(?:.*?\bfrom\b)?\s*\"?(\w+)?",
+                        re.IGNORECASE | re.DOTALL)
+
+
+def statement_name(statement: str) -> str:
+    """Короткое имя запроса для span'а: операция и первая таблица (`SELECT users`)"""
+    match = _STATEMENT.match(statement)
+    if not match:
+        return statement.split(None, 1)[0].upper() if statement.strip() else "SQL"
+    operation = match.group(1).split()[0].upper()
+    return f"{operation} {match.group(2)}" if match.group(2) else operation
+
+
+def instrument_engine(engine):
+    """Span'ы SQLAlchemy: db.session - соединение взято из пула и не возвращено,
+    db.query - выполнение запроса (дочерние для db.session)"""
+    from sqlalchemy import event
+
+    @event.listens_for(engine, "checkout")
+    def on_checkout(dbapi_connection, record, proxy):
+        record.info["trace_span"] = child_span(_current.get(), "db.session", "internal")
+
+    @event.listens_for(engine, "checkin")
+    def on_checkin(dbapi_connection, record):
+        session_span = record.info.pop("trace_span", None)
+        if session_span is not None:
+            session_span.finish()
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def on_before_execute(conn, cursor, statement, parameters, context, executemany):
+        parent = conn.info.get("trace_span") or _current.get()
+        if parent is not None:
+            conn.info["trace_query"] = child_span(
+                parent, f"db.query {statement_name(statement)}", "client", **{"db.statement": statement[:300]}
+            )
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def on_after_execute(conn, cursor, statement, parameters, context, executemany):
+        query_span = conn.info.pop("trace_query", None)
+        if query_span is not None:
+            query_span.finish()
+
+    @event.listens_for(engine, "handle_error")
+    def on_error(context):
+        if context.connection is not None:
+            query_span = context.connection.info.pop("trace_query", None)
+            if query_span is not None:
+                query_span.set("error", type(context.original_exception).__name__)
+                query_span.finish()
@@ -0,0 +1,210 @@
+"""Фикстуры состояния БД для тестов
+
+- db_session - тест работает с БД в транзакции, которая откатывается после
+  теста (commit внутри теста - SAVEPOINT); после теста в БД ничего не остается
+- --db-reset=template (или DB_RESET_MODE=template) - перед сессией БД
+  приложения возвращается к шаблону `<db>_template` (см. db_reset.py), а
+  прямые запросы тестов идут в собственную копию шаблона на воркер.
+  Данные, записанные через HTTP API приложения, откатить транзакцией нельзя -
+  для них и нужен сброс через шаблон
+- services_ready - тесты через HTTP ждут готовности mock-сервера и
+  приложения (wait_ready.py) один раз за сессию, а не циклами в тестах
+- --shard-index/--shard-count (или JOB_COMPLETION_INDEX/SHARD_COUNT в
+  Indexed Job) - запуск одного шарда; классы распределяются целиком по
+  длительностям прошлых запусков (sharding.py), потому что тесты класса
+  делят данные через фикстуры scope="class"
+- HTTP-вызовы тестов учитываются по фазам (http_budget.py): --http-report
+  пишет JSON-отчет, маркер http_budget задает бюджет числа вызовов и латентности
+- trace_context - трасса на тест: каждый HTTP-вызов теста уходит с заголовком
+  traceparent одного trace_id (W3C, shared/tracing.py), trace_id пишется в
+  свойства теста (JUnit); span'ы приложения и mock-сервера этого теста -
+  `scripts/trace_report.py analyze ... --trace-id <trace_id>`
+"""
+from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+import os
+import random
+import time
+
+import pytest
+import requests
+
+import db_reset
+import http_budget
+import sharding
+import wait_ready
+
+APP_URL = os.getenv("APP_URL", "http://app:8000")
+MOCK_URL = os.getenv("MOCK_URL", "http://mock-server:8001")
+SERVICES_TIMEOUT = float(os.getenv("SERVICES_TIMEOUT", "60"))
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--db-reset",
+        choices=["none", "template"],
+        default=os.getenv("DB_RESET_MODE", "none"),
+        help="Сброс БД перед тестами: none или template (клон шаблонной БД)",
+    )
+    group = parser.getgroup("sharding")
+    # В Indexed Job номер шарда - индекс pod'а
+    shard_index = os.getenv("SHARD_INDEX", os.getenv("JOB_COMPLETION_INDEX", "0"))
+    group.addoption("--shard-index", type=int, default=int(shard_index), help="Номер шарда (с нуля)")
+    group.addoption("--shard-count", type=int, default=int(os.getenv("SHARD_COUNT", "1")),
+                    help="Количество шардов")
+    group.addoption("--durations-file", default=sharding.DEFAULT_DURATIONS_FILE,
+                    help="JSON с длительностями тестов из прошлых запусков")
+    group.addoption("--record-durations", default=None,
+                    help="Записать длительности тестов этого запуска в JSON")
+    group.addoption("--record-timing", default=None,
+                    help="Записать время начала и конца запуска в JSON (wall time шардов)")
+    http_budget.add_options(parser)
+
+
+def pytest_configure(config):
+    http_budget.register(config)
+
+
+def pytest_collection_modifyitems(config, items):
+    """Оставить тесты своего шарда"""
+    shard_count = config.getoption("shard_count")
+    if shard_count <= 1:
+        return
+    durations = sharding.load_durations(config.getoption("durations_file"))
+    selected = set(sharding.select_shard(
+        [item.nodeid for item in items], durations,
+        config.getoption("shard_index"), shard_count, group=sharding.class_group,
+    ))
+    deselected = [item for item in items if item.nodeid not in selected]
+    items[:] = [item for item in items if item.nodeid in selected]
+    config.hook.pytest_deselected(items=deselected)
+
+
+_test_durations = {}
+_session_started_at = time.time()
+
+
+def pytest_sessionstart(session):
+    global _session_started_at
+    _session_started_at = time.time()
+
+
+def pytest_runtest_logreport(report):
+    """Суммарная длительность теста (setup + call + teardown)"""
+    _test_durations[report.nodeid] = _test_durations.get(report.nodeid, 0.0) + report.duration
+
+
+def pytest_sessionfinish(session, exitstatus):
+    """Длительности тестов и время запуска шарда для слияния отчетов"""
+    config = session.config
+    if config.getoption("record_durations"):
+        sharding.save_durations(config.getoption("record_durations"), _test_durations)
+    if config.getoption("record_timing"):
+        sharding.save_timing(config.getoption("record_timing"), config.getoption("shard_index"),
+                             _session_started_at, time.time(), int(exitstatus))
+
+
+def new_traceparent(trace_id: str) -> str:
+    """traceparent клиентского вызова: общий trace_id теста, свой span_id, sampled"""
+    return f"00-{trace_id}-{random.getrandbits(64):016x}-01"
+
+
+@pytest.fixture(autouse=True)
+def trace_context(request, monkeypatch):
+    """traceparent во всех запросах теста (requests.get/post и сессии); возвращает trace_id"""
+    trace_id = f"{random.getrandbits(128):032x}"
+    request.node.user_properties.append(("trace_id", trace_id))
+    send = requests.Session.send
+
+    def traced_send(session, prepared, **kwargs):
+        # Заголовок, заданный тестом явно, не перезаписывается
+        if "traceparent" not in prepared.headers:
+            prepared.headers["traceparent"] = new_traceparent(trace_id)
+        return send(session, prepared, **kwargs)
+
+    monkeypatch.setattr(requests.Session, "send", traced_send)
+    return trace_id
+
+
+@pytest.fixture(scope="session")
+def db_reset_mode(request):
+    return request.config.getoption("--db-reset")
+
+
+@pytest.fixture(scope="session", autouse=True)
+def reset_app_database(db_reset_mode, request):
+    """Режим template: БД приложения возвращается к шаблону перед тестами
+
+    Шарды работают одновременно, поэтому в шардированном запуске БД
+    сбрасывает запускающая сторона (run_shards.py) до старта шардов.
+    """
+    if db_reset_mode != "template" or os.getenv("PYTEST_XDIST_WORKER", "gw0") != "gw0":
+        return
+    if request.config.getoption("shard_count") > 1:
+        return
+    try:
+        elapsed = db_reset.reset_database()
+    except OperationalError as e:
+        pytest.exit(f"Database reset failed: {e}", returncode=3)
+    print(f"\nDatabase reset from template in {elapsed * 1000:.0f} ms")
+
+
+@pytest.fixture(scope="session")
+def services_ready():
+    """Готовность mock-сервера и приложения (приложение проверяется после mock)"""
+    results = wait_ready.wait_all([
+        wait_ready.Component("mock", wait_ready.http_check(f"{MOCK_URL}/health")),
+        wait_ready.Component("app", wait_ready.http_check(f"{APP_URL}/ready"), depends=["mock"]),
+    ], timeout=SERVICES_TIMEOUT)
+    not_ready = {name: result for name, result in results.items() if result["status"] != "ready"}
+    if not_ready:
+        pytest.exit(f"Services are not ready: {not_ready}", returncode=3)
+    return results
+
+
+@pytest.fixture(scope="session")
+def worker_database_url(db_reset_mode, request):
+    """URL БД для прямых запросов из тестов
+
+    В режиме template у каждого воркера своя копия шаблона, удаляемая
+    после сессии; в остальных режимах - БД приложения.
+    """
+    if db_reset_mode != "template":
+        yield db_reset.DATABASE_URL
+        return
+
+    worker = os.getenv("PYTEST_XDIST_WORKER", "main")
+    if request.config.getoption("shard_count") > 1:
+        worker = f"shard{request.config.getoption('shard_index')}_{worker}"
+    database = make_url(db_reset.DATABASE_URL).database
+    name = f"{database}_{worker}"
+    db_reset.clone_database(db_reset.template_name(database), name)
+    yield db_reset.database_url(name)
+    db_reset.drop_database(name)
+
+
+@pytest.fixture(scope="session")
+def db_engine(worker_database_url):
+    engine = create_engine(worker_database_url, pool_pre_ping=True)
+    try:
+        engine.connect().close()
+    except OperationalError as e:
+        pytest.skip(f"Database is not available: {e}")
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def db_session(db_engine):
+    """Сессия в транзакции, которая откатывается после теста"""
+    connection = db_engine.connect()
+    transaction = connection.begin()
+    session = Session(bind=connection, join_transaction_mode="create_savepoint")
+    try:
+        yield session
+    finally:
+        session.close()
+        transaction.rollback()
+        connection.close()
@@ -0,0 +1,256 @@
+"""Учет HTTP-вызовов тестов и бюджеты на их число и латентность
+
+Плагин pytest перехватывает requests.Session.send (в том числе requests.get
+и клиенты с подключаемым транспортом) и для каждой фазы теста (setup, call,
+teardown) записывает число вызовов, суммарное и максимальное время и
+разбивку по эндпоинтам (`GET host/posts/{id}`: числовые сегменты пути
+обобщаются). Редиректы внутри одного вызова считаются одним вызовом.
+
+Бюджет теста задается маркером и проверяется по фазе call:
+
+    @pytest.mark.http_budget(max_calls=3, max_seconds=2.0, max_call_seconds=1.0)
+    def test_overview(...): ...
+
+Превышение бюджета - падение теста (--http-budget=warn - только сводка,
+off - без проверки). --http-report пишет JSON-отчет по тестам, в конце
+прогона печатаются самые дорогие по HTTP тесты и рост числа вызовов
+относительно прошлого отчета (--http-baseline).
+
+Подключение из conftest.py:
+
+    def pytest_addoption(parser):
+        http_budget.add_options(parser)
+
+    def pytest_configure(config):
+        http_budget.register(config)
+
+Оригинал - 01-tests-in-container/src/http_budget.py. Образ тестов
+02-microservice-testing собирается из ./tests и не видит этот каталог,
+поэтому там лежит вендоренная копия: она не редактируется, а обновляется
+`python scripts/sync_vendored.py`; расхождение проверяет CI (--check).
+"""
+import json
+import os
+import re
+import threading
+import time
+from typing import Dict, List, Optional
+from urllib.parse import urlsplit
+
+import pytest
+import requests
+
+_NUMBER_SEGMENT = re.compile(r"/\d+(?=/|$)")
+
+
+def endpoint(method: str, url: str) -> str:
+    """Ключ эндпоинта без query и с обобщенными id: `GET example.com/posts/{id}`"""
+    parts = urlsplit(url)
+    return f"{method} {parts.netloc}{_NUMBER_SEGMENT.sub('/{id}', parts.path) or '/'}"
+
+
+class HttpRecorder:
+    """Запись вызовов requests.Session.send"""
+
+    def __init__(self):
+        self.calls: List[dict] = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._original = None
+
+    def install(self):
+        original = self._original = requests.Session.send
+        recorder = self
+
+        def send(session, request, **kwargs):
+            # Вложенный send (редиректы) - часть внешнего вызова
+            if getattr(recorder._local, "active", False):
+                return original(session, request, **kwargs)
+            recorder._local.active = True
+            started = time.perf_counter()
+            response, error = None, None
+            try:
+                response = original(session, request, **kwargs)
+                return response
+            except Exception as e:
+                error = type(e).__name__
+                raise
+            finally:
+                recorder._local.active = False
+                recorder.record({
+                    "endpoint": endpoint(request.method, request.url),
+                    "status": response.status_code if response is not None else None,
+                    "seconds": time.perf_counter() - started,
+                    "error": error,
+                })
+
+        requests.Session.send = send
+
+    def uninstall(self):
+        if self._original is not None:
+            requests.Session.send = self._original
+            self._original = None
+
+    def record(self, call: dict):
+        with self._lock:
+            self.calls.append(call)
+
+    def drain(self) -> List[dict]:
+        """Вызовы с прошлого drain()"""
+        with self._lock:
+            calls, self.calls = self.calls, []
+        return calls
+
+
+def summarize(calls: List[dict]) -> dict:
+    """Число вызовов, время, ошибки и разбивка по эндпоинтам"""
+    endpoints: Dict[str, dict] = {}
+    for call in calls:
+        stats = endpoints.setdefault(call["endpoint"], {"calls": 0, "seconds": 0.0})
+        stats["calls"] += 1
+        stats["seconds"] += call["seconds"]
+    return {
+        "calls": len(calls),
+        "seconds": round(sum(call["seconds"] for call in calls), 4),
+        "max_call_seconds": round(max((call["seconds"] for call in calls), default=0.0), 4),
+        "errors": sum(1 for call in calls if call["error"] or (call["status"] or 0) >= 500),
+        "endpoints": {
+            name: {"calls": stats["calls"], "seconds": round(stats["seconds"], 4)}
+            for name, stats in sorted(endpoints.items(), key=lambda item: -item[1]["seconds"])
+        },
+    }
+
+
+def check_budget(summary: dict, max_calls: Optional[int] = None, max_seconds: Optional[float] = None,
+                 max_call_seconds: Optional[float] = None) -> List[str]:
+    """Нарушения бюджета (пустой список, если бюджет соблюден)"""
+    violations = []
+    if max_calls is not None and summary["calls"] > max_calls:
+        violations.append(f"{summary['calls']} HTTP calls, budget {max_calls}")
+    if max_seconds is not None and summary["seconds"] > max_seconds:
+        violations.append(f"{summary['seconds']:.3f}s in HTTP calls, budget {max_seconds}s")
+    if max_call_seconds is not None and summary["max_call_seconds"] > max_call_seconds:
+        violations.append(f"slowest HTTP call {summary['max_call_seconds']:.3f}s, budget {max_call_seconds}s")
+    return violations
+
+
+def call_regressions(baseline: dict, current: dict) -> List[tuple]:
+    """Тесты, у которых фаза call делает больше вызовов, чем в прошлом отчете: (nodeid, было, стало)"""
+    regressions = []
+    for nodeid, test in current.get("tests", {}).items():
+        before = baseline.get("tests", {}).get(nodeid)
+        if before is not None and test["call"]["calls"] > before["call"]["calls"]:
+            regressions.append((nodeid, before["call"]["calls"], test["call"]["calls"]))
+    return regressions
+
+
+class HttpBudgetPlugin:
+    """Хуки pytest: запись вызовов по фазам, проверка бюджета, отчет"""
+
+    def __init__(self, config):
+        self.config = config
+        self.mode = config.getoption("http_budget")
+        self.recorder = HttpRecorder()
+        self.tests: Dict[str, dict] = {}
+
+    def pytest_sessionstart(self, session):
+        self.recorder.install()
+
+    def pytest_unconfigure(self, config):
+        self.recorder.uninstall()
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_makereport(self, item, call):
+        outcome = yield
+        report = outcome.get_result()
+        # Атрибуты отчета передаются из воркеров xdist в основной процесс
+        report.http_calls = summarize(self.recorder.drain())
+        marker = item.get_closest_marker("http_budget")
+        if call.when != "call" or marker is None or self.mode == "off":
+            return
+        violations = check_budget(report.http_calls, **marker.kwargs)
+        report.http_budget = {"limits": dict(marker.kwargs), "violations": violations}
+        if violations and report.passed and self.mode == "fail":
+            report.outcome = "failed"
+            report.longrepr = "HTTP budget exceeded:\n  " + "\n  ".join(violations)
+
+    def pytest_runtest_logreport(self, report):
+        calls = getattr(report, "http_calls", None)
+        if calls is None:
+            return
+        test = self.tests.setdefault(report.nodeid, {"outcome": "passed"})
+        if calls["calls"] or report.when == "call":
+            test[report.when] = calls
+        if getattr(report, "http_budget", None):
+            test["budget"] = report.http_budget
+        if report.failed or (report.when == "call" and report.skipped):
+            test["outcome"] = report.outcome
+
+    def report(self) -> dict:
+        empty = summarize([])
+        tests = {nodeid: {"call": empty, **test} for nodeid, test in sorted(self.tests.items())}
+        phases = [test[phase] for test in tests.values() for phase in ("setup", "call", "teardown") if phase in test]
+        return {
+            "totals": {
+                "tests": len(tests),
+                "calls": sum(phase["calls"] for phase in phases),
+                "seconds": round(sum(phase["seconds"] for phase in phases), 3),
+            },
+            "tests": tests,
+        }
+
+    def pytest_sessionfinish(self, session):
+        path = self.config.getoption("http_report")
+        if path and not hasattr(self.config, "workerinput"):
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(self.report(), f, indent=2)
+
+    def pytest_terminal_summary(self, terminalreporter):
+        top = self.config.getoption("http_top")
+        report = self.report()
+        if not top or not report["totals"]["calls"]:
+            return
+        writer = terminalreporter
+        writer.section("HTTP calls")
+        writer.line(f"{report['totals']['calls']} calls, {report['totals']['seconds']:.2f}s "
+                    f"in {report['totals']['tests']} tests")
+        tests = [(nodeid, test) for nodeid, test in report["tests"].items() if test["call"]["calls"]]
+        for nodeid, test in sorted(tests, key=lambda item: -item[1]["call"]["seconds"])[:top]:
+            call = test["call"]
+            writer.line(f"{call['seconds']:8.3f}s {call['calls']:5d} calls  max {call['max_call_seconds']:.3f}s  {nodeid}")
+
+        over_budget = [(nodeid, test["budget"]["violations"]) for nodeid, test in report["tests"].items()
+                       if test.get("budget", {}).get("violations")]
+        if over_budget and self.mode == "warn":
+            writer.line("Over HTTP budget:", yellow=True)
+            for nodeid, violations in over_budget:
+                writer.line(f"  {nodeid}: {'; '.join(violations)}", yellow=True)
+
+        baseline_path = self.config.getoption("http_baseline")
+        if baseline_path and os.path.exists(baseline_path):
+            with open(baseline_path, encoding="utf-8") as f:
+                regressions = call_regressions(json.load(f), report)
+            for nodeid, before, after in regressions:
+                writer.line(f"More HTTP calls than baseline: {nodeid} {before} -> {after}", yellow=True)
+
+
+def add_options(parser):
+    group = parser.getgroup("http budget")
+    group.addoption("--http-report", default=os.environ.get("HTTP_REPORT_FILE"),
+                    help="Записать HTTP-вызовы тестов в JSON")
+    group.addoption("--http-budget", choices=("fail", "warn", "off"), default=os.environ.get("HTTP_BUDGET", "fail"),
+                    help="Превышение маркера http_budget: падение теста, предупреждение или без проверки")
+    group.addoption("--http-baseline", default=None,
+                    help="Прошлый JSON-отчет: показать тесты с выросшим числом вызовов")
+    group.addoption("--http-top", type=int, default=10,
+                    help="Сколько самых дорогих по HTTP тестов показать в сводке (0 - без сводки)")
+
+
+def register(config):
+    config.addinivalue_line(
+        "markers",
+        "http_budget(max_calls=None, max_seconds=None, max_call_seconds=None): "
+        "бюджет HTTP-вызовов фазы call теста",
+    )
+    config.pluginmanager.register(HttpBudgetPlugin(config), "http_budget")
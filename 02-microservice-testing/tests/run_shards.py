@@ -0,0 +1,89 @@
+"""Локальный шардированный прогон: шарды - параллельные процессы pytest
+
+Повторяет k8s Indexed Job (03-qa-environment-k8s/k8s/05-tests.yaml) без
+кластера: каждый процесс получает свой индекс (как JOB_COMPLETION_INDEX),
+пишет JUnit, длительности и время запуска в reports/shards/, после чего
+отчеты сливаются так же, как это делает Job-коллектор.
+
+    python tests/run_shards.py --shards 3 -- -v
+    python tests/run_shards.py --shards 3 --db-reset=template
+
+--db-reset=template сбрасывает БД один раз до старта шардов (шарды работают
+одновременно и сами ее не сбрасывают) и передается шардам: прямые запросы
+тестов идут в копии шаблона на шард.
+"""
+import argparse
+import glob
+import os
+import subprocess
+import sys
+import time
+
+import db_reset
+import sharding
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def shard_command(index: int, count: int, reports: str, pytest_args, db_reset_mode: str = "none") -> list:
+    return [
+        sys.executable, "-m", "pytest", TESTS_DIR,
+        f"--shard-index={index}", f"--shard-count={count}", f"--db-reset={db_reset_mode}",
+        f"--junit-xml={reports}/shards/junit-{index}.xml",
+        f"--record-durations={reports}/shards/durations-{index}.json",
+        f"--record-timing={reports}/shards/timing-{index}.json",
+        *pytest_args,
+    ]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Параллельный запуск шардов тестов и слияние отчетов")
+    parser.add_argument("--shards", type=int, default=int(os.getenv("SHARD_COUNT", "2")))
+    parser.add_argument("--reports", default=os.getenv("REPORTS_DIR", "reports"))
+    parser.add_argument("--durations-file", default=sharding.DEFAULT_DURATIONS_FILE)
+    parser.add_argument("--db-reset", choices=["none", "template"], default=os.getenv("DB_RESET_MODE", "none"),
+                        help="Сброс БД перед шардами: none или template (как --db-reset pytest)")
+    parser.add_argument("pytest_args", nargs=argparse.REMAINDER, help="Аргументы pytest после --")
+    args = parser.parse_args()
+    pytest_args = args.pytest_args[1:] if args.pytest_args[:1] == ["--"] else args.pytest_args
+    if any(arg.startswith("--db-reset") for arg in pytest_args):
+        # Иначе шарды сбросили бы БД каждый сам, а до старта шардов сброса бы не было
+        parser.error("--db-reset is a run_shards.py option, pass it before --")
+
+    shards = os.path.join(args.reports, "shards")
+    os.makedirs(shards, exist_ok=True)
+    # Отчеты прошлого запуска (в том числе с другим числом шардов) не сливаются
+    for stale in glob.glob(os.path.join(shards, "*-*.*")):
+        os.remove(stale)
+
+    # Шарды стартуют одновременно, поэтому БД сбрасывается до их запуска
+    if args.db_reset == "template":
+        print(f"Database reset from template in {db_reset.reset_database() * 1000:.0f} ms")
+
+    env = {**os.environ, "TEST_DURATIONS_FILE": args.durations_file}
+    started = time.monotonic()
+    processes = []
+    for index in range(args.shards):
+        log = open(os.path.join(args.reports, "shards", f"output-{index}.log"), "w", encoding="utf-8")
+        command = shard_command(index, args.shards, args.reports, pytest_args, args.db_reset)
+        processes.append((index, subprocess.Popen(command, env=env, stdout=log, stderr=subprocess.STDOUT), log))
+
+    for index, process, log in processes:
+        process.wait()
+        log.close()
+        print(f"shard {index}: exit {process.returncode} ({args.reports}/shards/output-{index}.log)")
+    print(f"All shards finished in {time.monotonic() - started:.2f}s")
+
+    return sharding.main([
+        "merge",
+        "--junit", f"{shards}/junit-*.xml",
+        "--durations", f"{shards}/durations-*.json",
+        "--timings", f"{shards}/timing-*.json",
+        "--durations-file", args.durations_file,
+        "--output", os.path.join(args.reports, "junit.xml"),
+        "--summary", os.path.join(args.reports, "shards-summary.json"),
+    ])
+
+
+if __name__ == "__main__":
+    sys.exit(main())
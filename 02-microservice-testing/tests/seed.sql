@@ -0,0 +1,23 @@
+-- Данные шаблонной БД тестов (db_reset.py create-template) - те же, что
+-- scripts/load_test_data.sh загружает через API. Выполняется после миграций.
+
+INSERT INTO users (id, name, email, created_at) VALUES
+    (1, 'Alice Johnson', 'alice@example.com', '2024-01-01 00:00:00'),
+    (2, 'Bob Smith', 'bob@example.com', '2024-01-01 00:00:00'),
+    (3, 'Carol Davis', 'carol@example.com', '2024-01-01 00:00:00'),
+    (4, 'David Wilson', 'david@example.com', '2024-01-01 00:00:00'),
+    (5, 'Eva Brown', 'eva@example.com', '2024-01-01 00:00:00');
+
+INSERT INTO orders (id, user_id, total, status, created_at) VALUES
+    (1, 1, 999.99, 'created', '2024-01-01 00:00:00'),
+    (2, 1, 59.98, 'created', '2024-01-01 00:00:00'),
+    (3, 2, 79.99, 'created', '2024-01-01 00:00:00'),
+    (4, 3, 299.99, 'created', '2024-01-01 00:00:00');
+
+-- Сводка ведется вместе с заказами (миграция 3), для сидов - одним запросом
+INSERT INTO user_order_summary (user_id, order_count, total_amount, last_order_at)
+SELECT user_id, COUNT(*), SUM(total), MAX(created_at) FROM orders GROUP BY user_id;
+
+-- Новые записи тестов получают id после сидов
+SELECT setval(pg_get_serial_sequence('users', 'id'), (SELECT MAX(id) FROM users));
+SELECT setval(pg_get_serial_sequence('orders', 'id'), (SELECT MAX(id) FROM orders));
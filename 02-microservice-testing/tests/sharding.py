@@ -0,0 +1,248 @@
+"""Шардирование тестов по времени выполнения и слияние отчетов шардов
+
+Длительности тестов из прошлых запусков хранятся в JSON ({nodeid: seconds}).
+Тесты распределяются по шардам жадным алгоритмом LPT (longest processing
+time first): самый долгий тест отдается наименее загруженному шарду.
+Тесты, связанные общими данными класса, можно распределять группой
+(group=class_group): класс целиком попадает в один шард.
+Модуль использует только стандартную библиотеку, чтобы merge можно было
+запускать на CI-раннере без установки зависимостей:
+
+    python src/sharding.py merge --junit reports/shards/junit-*.xml \\
+        --durations reports/shards/durations-*.json --output reports/junit.xml
+
+Оригинал - 01-tests-in-container/src/sharding.py. Образ тестов
+02-microservice-testing собирается из ./tests и не видит этот каталог,
+поэтому там лежит вендоренная копия: она не редактируется, а обновляется
+`python scripts/sync_vendored.py`; расхождение проверяет CI (--check).
+"""
+import argparse
+import glob
+import heapq
+import json
+import os
+import sys
+import xml.etree.ElementTree as ET
+from typing import Callable, Dict, Iterable, List, Optional
+
+DEFAULT_DURATIONS_FILE = os.environ.get("TEST_DURATIONS_FILE", ".test_durations.json")
+# Оценка для тестов без истории, если история пустая
+FALLBACK_DURATION = 1.0
+
+
+def load_durations(path: str) -> Dict[str, float]:
+    """Загрузить длительности тестов (пустой словарь, если файла нет)"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return {k: float(v) for k, v in json.load(f).items()}
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def save_durations(path: str, durations: Dict[str, float]):
+    """Сохранить длительности тестов"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({k: round(v, 4) for k, v in sorted(durations.items())}, f, indent=2)
+
+
+def estimate(test_ids: Iterable[str], durations: Dict[str, float]) -> Dict[str, float]:
+    """Оценка длительности каждого теста; неизвестные получают среднее"""
+    known = [durations[t] for t in test_ids if t in durations]
+    default = sum(known) / len(known) if known else FALLBACK_DURATION
+    return {t: durations.get(t, default) for t in test_ids}
+
+
+def class_group(test_id: str) -> str:
+    """Группа теста - его класс (`file.py::Class`); тест-функция - сама себе группа"""
+    return "::".join(test_id.split("::")[:2])
+
+
+def lpt_schedule(test_ids: Iterable[str], durations: Dict[str, float],
+                 shard_count: int, group: Optional[Callable[[str], str]] = None) -> List[List[str]]:
+    """Распределить тесты по шардам (LPT), результат детерминирован
+
+    group - ключ группы теста: группы распределяются целиком, вес группы -
+    сумма оценок ее тестов.
+    """
+    if shard_count < 1:
+        raise ValueError("shard_count must be >= 1")
+
+    test_ids = list(test_ids)
+    weights = estimate(test_ids, durations)
+    units: Dict[str, List[str]] = {}
+    for test_id in test_ids:
+        units.setdefault(group(test_id) if group else test_id, []).append(test_id)
+    unit_weights = {key: sum(weights[t] for t in tests) for key, tests in units.items()}
+    # При равной длительности порядок задает ключ, чтобы все шарды
+    # независимо получили одинаковое разбиение
+    ordered = sorted(units, key=lambda key: (-unit_weights[key], key))
+
+    shards: List[List[str]] = [[] for _ in range(shard_count)]
+    heap = [(0.0, index) for index in range(shard_count)]
+    for key in ordered:
+        load, index = heapq.heappop(heap)
+        shards[index].extend(units[key])
+        heapq.heappush(heap, (load + unit_weights[key], index))
+    return shards
+
+
+def select_shard(test_ids: Iterable[str], durations: Dict[str, float],
+                 shard_index: int, shard_count: int,
+                 group: Optional[Callable[[str], str]] = None) -> List[str]:
+    """Тесты, попавшие в шард shard_index"""
+    if not 0 <= shard_index < shard_count:
+        raise ValueError(f"shard_index must be in [0, {shard_count})")
+    return lpt_schedule(test_ids, durations, shard_count, group)[shard_index]
+
+
+def merge_durations(store_path: str, shard_files: Iterable[str]) -> Dict[str, float]:
+    """Обновить хранилище длительностей результатами шардов"""
+    durations = load_durations(store_path)
+    for path in shard_files:
+        durations.update(load_durations(path))
+    save_durations(store_path, durations)
+    return durations
+
+
+def save_timing(path: str, shard_index: int, started_at: float, finished_at: float, exit_status: int):
+    """Сохранить время начала и конца шарда (unix time) для подсчета wall time"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'shard': shard_index, 'started_at': started_at, 'finished_at': finished_at,
+                   'exit_status': exit_status}, f, indent=2)
+
+
+def merge_timings(paths: Iterable[str]) -> Dict:
+    """Wall time запуска: от старта первого шарда до завершения последнего"""
+    timings = []
+    for path in sorted(paths):
+        with open(path, 'r', encoding='utf-8') as f:
+            timings.append(json.load(f))
+    if not timings:
+        return {}
+    started_at = min(t['started_at'] for t in timings)
+    finished_at = max(t['finished_at'] for t in timings)
+    return {
+        'started_at': started_at,
+        'finished_at': finished_at,
+        'run_wall_time': round(finished_at - started_at, 3),
+        # Разброс старта шардов: ожидание планировщика, скачивание образа
+        'start_skew': round(max(t['started_at'] for t in timings) - started_at, 3),
+        'exit_statuses': {str(t['shard']): t['exit_status'] for t in timings},
+    }
+
+
+def _suites(root: ET.Element) -> List[ET.Element]:
+    return [root] if root.tag == 'testsuite' else list(root.iter('testsuite'))
+
+
+def merge_junit(paths: Iterable[str], output: Optional[str] = None) -> Dict:
+    """Слить JUnit XML отчеты шардов в один и вернуть сводку"""
+    merged = ET.Element('testsuite', name='pytest')
+    totals = {'tests': 0, 'failures': 0, 'errors': 0, 'skipped': 0}
+    shard_times = []
+
+    for path in sorted(paths):
+        shard_time = 0.0
+        for suite in _suites(ET.parse(path).getroot()):
+            for key in totals:
+                totals[key] += int(suite.get(key, 0))
+            shard_time += float(suite.get('time', 0))
+            for case in suite.iter('testcase'):
+                merged.append(case)
+        shard_times.append(round(shard_time, 3))
+
+    total_time = round(sum(shard_times), 3)
+    wall_time = max(shard_times, default=0.0)
+    for key, value in totals.items():
+        merged.set(key, str(value))
+    merged.set('time', str(total_time))
+
+    if output:
+        directory = os.path.dirname(output)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        root = ET.Element('testsuites')
+        root.append(merged)
+        ET.ElementTree(root).write(output, encoding='utf-8', xml_declaration=True)
+
+    return {
+        **totals,
+        'shards': len(shard_times),
+        'shard_times': shard_times,
+        'total_time': total_time,
+        'wall_time': wall_time,
+        # 1.0 - идеальная балансировка
+        'balance': round(total_time / (wall_time * len(shard_times)), 3) if wall_time else 1.0,
+    }
+
+
+def _expand(patterns: List[str]) -> List[str]:
+    paths = []
+    for pattern in patterns:
+        paths.extend(glob.glob(pattern) or ([pattern] if os.path.exists(pattern) else []))
+    return sorted(set(paths))
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Шардирование тестов и слияние отчетов")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    plan = subparsers.add_parser('plan', help="Показать распределение тестов (nodeid из stdin)")
+    plan.add_argument('--shard-count', type=int, required=True)
+    plan.add_argument('--durations-file', default=DEFAULT_DURATIONS_FILE)
+    plan.add_argument('--group', choices=['test', 'class'], default='test',
+                      help="Единица распределения: тест или класс целиком")
+
+    merge = subparsers.add_parser('merge', help="Слить JUnit отчеты и длительности шардов")
+    merge.add_argument('--junit', nargs='+', required=True)
+    merge.add_argument('--output', required=True)
+    merge.add_argument('--durations', nargs='*', default=[])
+    merge.add_argument('--durations-file', default=DEFAULT_DURATIONS_FILE)
+    merge.add_argument('--timings', nargs='*', default=[], help="Время начала и конца шардов (save_timing)")
+    merge.add_argument('--summary', default=None, help="Куда записать сводку в JSON")
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'plan':
+        test_ids = [line.strip() for line in sys.stdin if '::' in line]
+        durations = load_durations(args.durations_file)
+        weights = estimate(test_ids, durations)
+        group = class_group if args.group == 'class' else None
+        for index, shard in enumerate(lpt_schedule(test_ids, durations, args.shard_count, group)):
+            print(f"shard {index}: {len(shard)} tests, ~{sum(weights[t] for t in shard):.2f}s")
+        return 0
+
+    junit_files = _expand(args.junit)
+    if not junit_files:
+        print("No JUnit reports found", file=sys.stderr)
+        return 1
+
+    summary = merge_junit(junit_files, args.output)
+    summary.update(merge_timings(_expand(args.timings)))
+    duration_files = _expand(args.durations)
+    if duration_files:
+        merge_durations(args.durations_file, duration_files)
+
+    if args.summary:
+        with open(args.summary, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, indent=2)
+
+    print(f"Merged {summary['shards']} shards: {summary['tests']} tests, "
+          f"{summary['failures']} failures, {summary['errors']} errors, "
+          f"{summary['skipped']} skipped")
+    print(f"Total test time: {summary['total_time']}s, wall time: {summary['wall_time']}s, "
+          f"balance: {summary['balance']}")
+    if 'run_wall_time' in summary:
+        print(f"Run wall time (first shard start to last shard end): {summary['run_wall_time']}s, "
+              f"start skew: {summary['start_skew']}s")
+    return 1 if summary['failures'] or summary['errors'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,48 @@
+"""Тесты состояния БД (прямые запросы, транзакция откатывается после теста)"""
+
+import os
+
+import requests
+from sqlalchemy import text
+
+APP_URL = os.getenv("APP_URL", "http://app:8000")
+
+
+def count_users(connection, email: str) -> int:
+    return connection.execute(
+        text("SELECT COUNT(*) FROM users WHERE email = :email"), {"email": email}
+    ).scalar()
+
+
+def test_db_session_changes_are_rolled_back(db_session, db_engine):
+    """Изменения в db_session не видны снаружи, даже после commit в тесте"""
+    email = "rollback@example.com"
+    db_session.execute(
+        text("INSERT INTO users (name, email) VALUES (:name, :email)"),
+        {"name": "Rollback User", "email": email},
+    )
+    db_session.commit()
+
+    assert count_users(db_session, email) == 1
+    with db_engine.connect() as other:
+        assert count_users(other, email) == 0
+
+
+def test_schema_is_migrated(db_session):
+    """Применены все миграции 1..LATEST_VERSION (версию сообщает /ready приложения) без пропусков"""
+    latest = requests.get(f"{APP_URL}/ready", timeout=10).json()["schema_version"]
+    versions = db_session.execute(text("SELECT version FROM schema_migrations ORDER BY version")).scalars().all()
+    assert versions == list(range(1, latest + 1))
+
+
+def test_order_summary_matches_orders(db_session):
+    """Сводка заказов совпадает с агрегатами таблицы orders"""
+    mismatches = db_session.execute(text(
+        """SELECT COUNT(*) FROM (
+            SELECT user_id, COUNT(*) AS order_count, SUM(total) AS total_amount FROM orders GROUP BY user_id
+        ) o
+        FULL OUTER JOIN user_order_summary s ON s.user_id = o.user_id
+        WHERE COALESCE(o.order_count, 0) <> COALESCE(s.order_count, 0)
+            OR ABS(COALESCE(o.total_amount, 0) - COALESCE(s.total_amount, 0)) > 1e-6"""
+    )).scalar()
+    assert mismatches == 0
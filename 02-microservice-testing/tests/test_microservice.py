@@ -1,8 +1,12 @@
 import pytest
 import requests
 import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict
 
+# Все тесты модуля ходят в сервисы по HTTP: ждем их готовности (conftest.py)
+pytestmark = pytest.mark.usefixtures("services_ready")
+
 
 class TestMicroserviceAPI:
     """Тесты основного функционала микросервиса"""
@@ -24,6 +28,7 @@ class TestMicroserviceAPI:
         
         return response.json()
     
+    @pytest.mark.http_budget(max_calls=1, max_call_seconds=1.0)
     def test_health_check(self, app_url):
         """Тест health check эндпоинта"""
         response = requests.get(f"{app_url}/health")
@@ -34,17 +39,7 @@ class TestMicroserviceAPI:
         assert data["service"] == "qa-demo-microservice"
     
     def test_readiness_check(self, app_url):
-        """Тест readiness check эндпоинта"""
-        # Ждем, пока сервис будет готов
-        for _ in range(30):  # 30 секунд максимум
-            try:
-                response = requests.get(f"{app_url}/ready")
-                if response.status_code == 200:
-                    break
-            except requests.RequestException:
-                pass
-            time.sleep(1)
-        
+        """Тест readiness check эндпоинта (готовность дожидается фикстура services_ready)"""
         response = requests.get(f"{app_url}/ready")
         assert response.status_code == 200
         
@@ -113,6 +108,7 @@ class TestOrdersIntegration:
         assert response.status_code == 200
         assert response.json()["status"] == "healthy"
     
+    @pytest.mark.http_budget(max_calls=2, max_call_seconds=2.0)
     def test_create_order_integration(self, app_url, mock_url):
         """Интеграционный тест создания заказа"""
         # Сначала создаем пользователя
@@ -134,6 +130,213 @@ class TestOrdersIntegration:
         assert order["user_id"] == user["id"]
         assert order["total"] == 10.99
         assert order["status"] == "created"
+        # sync - запись в БД до ответа, async (write-behind) - в очереди
+        assert order["local_order_status"] in ("saved", "queued")
+
+
+class TestUserOverview:
+    """Сводка по пользователю с параллельными запросами к внешнему сервису"""
+    
+    @pytest.fixture(scope="class")
+    def app_url(self):
+        return "http://app:8000"
+    
+    @pytest.mark.http_budget(max_calls=2, max_seconds=6.0)
+    def test_user_overview(self, app_url):
+        """Сводка содержит пользователя, профиль и заказы с платежами"""
+        user = requests.post(
+            f"{app_url}/users", json={"name": "Overview User", "email": "overview@example.com"}
+        ).json()
+        
+        response = requests.get(f"{app_url}/users/{user['id']}/overview")
+        
+        assert response.status_code == 200
+        data = response.json()
+        assert data["user"] == user
+        assert "profile" in data
+        assert data["partial"] is False
+        assert data["errors"] == {}
+        for order in data["orders"]:
+            assert order["user_id"] == user["id"]
+            assert "payment" in order
+    
+    def test_user_overview_not_found(self, app_url):
+        """Сводка для несуществующего пользователя"""
+        response = requests.get(f"{app_url}/users/999999/overview")
+        assert response.status_code == 404
+
+
+class TestOrdersBatching:
+    """Объединение одновременных запросов заказов в batch к mock-серверу"""
+    
+    @pytest.fixture(scope="class")
+    def app_url(self):
+        return "http://app:8000"
+    
+    @pytest.fixture(scope="class")
+    def mock_url(self):
+        return "http://mock-server:8001"
+    
+    def test_mock_batch_orders(self, mock_url):
+        """Batch-эндпоинт mock-сервера возвращает заказы по каждому пользователю"""
+        response = requests.get(f"{mock_url}/orders", params={"user_ids": "1,2,424242"})
+        
+        assert response.status_code == 200
+        orders_by_user = response.json()["orders_by_user"]
+        assert set(orders_by_user) == {"1", "2", "424242"}
+        assert all(order["user_id"] == 1 for order in orders_by_user["1"])
+        assert orders_by_user["424242"] == []
+    
+    def test_concurrent_orders_requests_are_batched(self, app_url, mock_url):
+        """Одновременные запросы дают меньше запросов к внешнему сервису"""
+        user = requests.post(
+            f"{app_url}/users", json={"name": "Batch User", "email": "batch@example.com"}
+        ).json()
+        
+        # Счетчик mock-сервера по user_id только что созданного пользователя:
+        # запросы других тестов и параллельных шардов в него не попадают
+        lookups_url = f"{mock_url}/orders/{user['id']}/lookups"
+        lookups_before = requests.get(lookups_url).json()["requests"]
+        with ThreadPoolExecutor(max_workers=20) as executor:
+            responses = list(executor.map(
+                lambda _: requests.get(f"{app_url}/users/{user['id']}/orders"), range(40)
+            ))
+        lookups_after = requests.get(lookups_url).json()["requests"]
+        
+        assert all(response.status_code == 200 for response in responses)
+        assert all(response.json() == {"orders": []} for response in responses)
+        assert lookups_after - lookups_before < len(responses)
+
+
+class TestOrdersSummary:
+    """Сводка заказов по пользователю, обновляемая вместе с заказами"""
+    
+    @pytest.fixture(scope="class")
+    def app_url(self):
+        return "http://app:8000"
+    
+    def test_summary_updated_with_orders(self, app_url):
+        """Каждый созданный заказ учитывается в сводке"""
+        user = requests.post(
+            f"{app_url}/users", json={"name": "Summary User", "email": "summary@example.com"}
+        ).json()
+        
+        empty = requests.get(f"{app_url}/users/{user['id']}/orders/summary").json()
+        assert empty["order_count"] == 0
+        assert empty["last_order_at"] is None
+        
+        for total in (10.5, 4.25):
+            response = requests.post(f"{app_url}/orders", json={
+                "user_id": user["id"], "items": [{"product": "Item", "quantity": 1}], "total": total
+            })
+            assert response.status_code == 201
+        
+        summary = requests.get(f"{app_url}/users/{user['id']}/orders/summary").json()
+        assert summary["order_count"] == 2
+        assert summary["total_amount"] == pytest.approx(14.75)
+        assert summary["last_order_at"] is not None
+        
+        bulk = requests.get(f"{app_url}/orders/summary", params={"user_ids": f"{user['id']},999999"})
+        assert bulk.status_code == 200
+        assert bulk.json()["summaries"] == [summary, {
+            "user_id": 999999, "order_count": 0, "total_amount": 0.0, "last_order_at": None
+        }]
+    
+    def test_summary_user_not_found(self, app_url):
+        """Сводка для несуществующего пользователя"""
+        response = requests.get(f"{app_url}/users/999999/orders/summary")
+        assert response.status_code == 404
+    
+    def test_bulk_summary_invalid_ids(self, app_url):
+        """Некорректный список пользователей"""
+        response = requests.get(f"{app_url}/orders/summary", params={"user_ids": "1,abc"})
+        assert response.status_code == 400
+
+
+class TestIdempotency:
+    """Повторы POST /orders с заголовком Idempotency-Key"""
+    
+    @pytest.fixture(scope="class")
+    def app_url(self):
+        return "http://app:8000"
+    
+    @pytest.fixture(scope="class")
+    def order_data(self, app_url):
+        user = requests.post(
+            f"{app_url}/users", json={"name": "Idempotent User", "email": "idempotent@example.com"}
+        ).json()
+        return {"user_id": user["id"], "items": [{"product": "Item", "quantity": 1}], "total": 5.0}
+    
+    def test_retry_returns_stored_response(self, app_url, order_data):
+        """Повтор с тем же ключом не создает второй заказ"""
+        headers = {"Idempotency-Key": f"retry-{time.time()}"}
+        
+        first = requests.post(f"{app_url}/orders", json=order_data, headers=headers)
+        retry = requests.post(f"{app_url}/orders", json=order_data, headers=headers)
+        
+        assert first.status_code == retry.status_code == 201
+        assert retry.json() == first.json()
+        assert retry.headers.get("Idempotent-Replayed") == "true"
+    
+    def test_concurrent_requests_are_coalesced(self, app_url, order_data):
+        """Одновременные запросы с одним ключом создают один заказ
+
+        В docker-compose приложение - один процесс uvicorn с IDEMPOTENCY_STORE=database:
+        запросы объединяются внутри процесса, ответ сохраняется в idempotency_keys.
+        Ожидание чужого резерва между воркерами проверяет unit_tests/test_idempotency.py;
+        с IDEMPOTENCY_STORE=memory несколько воркеров выполнили бы запрос каждый.
+        """
+        headers = {"Idempotency-Key": f"concurrent-{time.time()}"}
+        
+        with ThreadPoolExecutor(max_workers=10) as executor:
+            responses = list(executor.map(
+                lambda _: requests.post(f"{app_url}/orders", json=order_data, headers=headers), range(10)
+            ))
+        
+        assert all(response.status_code == 201 for response in responses)
+        assert len({response.json()["id"] for response in responses}) == 1
+        # Заказ создан одним запросом, остальные получили сохраненный ответ
+        assert sum(response.headers.get("Idempotent-Replayed") != "true" for response in responses) == 1
+    
+    def test_key_reused_with_different_body(self, app_url, order_data):
+        """Тот же ключ с другим телом запроса"""
+        headers = {"Idempotency-Key": f"mismatch-{time.time()}"}
+        
+        requests.post(f"{app_url}/orders", json=order_data, headers=headers)
+        response = requests.post(f"{app_url}/orders", json={**order_data, "total": 6.0}, headers=headers)
+        
+        assert response.status_code == 422
+
+
+class TestAdmissionControl:
+    """Адаптивные лимиты одновременных запросов по маршрутам"""
+    
+    @pytest.fixture(scope="class")
+    def app_url(self):
+        return "http://app:8000"
+    
+    def test_admission_status(self, app_url):
+        """Лимиты ведутся по шаблону маршрута, /health не ограничивается
+
+        Лимитеры свои у каждого воркера, а /admission отвечает воркер,
+        до которого дошел запрос: проверяется только форма ответа, а не
+        наличие конкретного маршрута.
+        """
+        requests.get(f"{app_url}/users")
+        requests.get(f"{app_url}/health")
+        
+        response = requests.get(f"{app_url}/admission")
+        
+        assert response.status_code == 200
+        data = response.json()
+        if not data["enabled"]:
+            pytest.skip("Admission control disabled")
+        for route, stats in data["routes"].items():
+            method, _, path = route.partition(" ")
+            assert method.isupper() and path.startswith("/")
+            assert stats["limit"] > 0
+            assert stats["inflight"] >= 0
+        assert not any(route.endswith(" /health") for route in data["routes"])
 
 
 class TestErrorHandling:
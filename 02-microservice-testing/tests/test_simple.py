@@ -2,7 +2,9 @@
 
 import pytest
 import requests
-import time
+
+# Тесты ходят в сервисы по HTTP: ждем их готовности (conftest.py)
+pytestmark = pytest.mark.usefixtures("services_ready")
 
 
 def test_mock_server_health():
@@ -13,6 +15,7 @@ def test_mock_server_health():
     assert data["status"] == "healthy"
 
 
+@pytest.mark.http_budget(max_calls=1, max_call_seconds=1.0)
 def test_app_health():
     """Проверка health check основного приложения"""
     response = requests.get("http://app:8000/health")
@@ -22,19 +25,9 @@ def test_app_health():
 
 
 def test_app_ready():
-    """Проверка готовности приложения"""
-    # Ждем, пока приложение будет готово
-    max_attempts = 30
-    for attempt in range(max_attempts):
-        try:
-            response = requests.get("http://app:8000/ready")
-            if response.status_code == 200:
-                break
-        except requests.RequestException:
-            pass
-        time.sleep(1)
-    else:
-        pytest.fail("App не готов после 30 секунд ожидания")
+    """Проверка готовности приложения (ожидание - в фикстуре services_ready)"""
+    response = requests.get("http://app:8000/ready")
+    assert response.status_code == 200
     
     data = response.json()
     assert data["status"] == "ready"
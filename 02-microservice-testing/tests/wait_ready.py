@@ -0,0 +1,237 @@
+"""Ожидание готовности компонентов окружения
+
+Независимые компоненты проверяются параллельно (поток на компонент),
+зависимый компонент начинает проверки сразу, как только готовы все его
+зависимости (db -> app, mock -> app). Между попытками - экспоненциальная
+задержка, поэтому время подъема окружения определяется самой медленной
+цепочкой зависимостей, а не суммой ожиданий. Для каждого компонента
+печатается время до готовности и число попыток.
+
+Проверки: `http(s)://...` - ответ 2xx, `tcp://host:port` - порт принимает
+соединения, `cmd:<команда>` - команда завершилась с кодом 0.
+
+    python tests/wait_ready.py --timeout 120 \\
+        db='cmd:docker-compose exec -T db pg_isready -U user -d testdb' \\
+        mock=http://localhost:8001/health \\
+        app=http://localhost:8000/ready --after app=db,mock
+
+Только стандартная библиотека: скрипт запускается и на хосте, и в образе тестов.
+"""
+from typing import Callable, Dict, Iterable, List, Optional
+from urllib.error import URLError
+from urllib.parse import urlsplit
+from urllib.request import urlopen
+import argparse
+import json
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+Check = Callable[[float], bool]
+
+
+def http_check(url: str) -> Check:
+    def check(timeout: float) -> bool:
+        try:
+            with urlopen(url, timeout=timeout) as response:
+                return 200 <= response.status < 300
+        except (URLError, OSError, ValueError):
+            return False
+    check.description = url
+    return check
+
+
+def tcp_check(host: str, port: int) -> Check:
+    def check(timeout: float) -> bool:
+        try:
+            socket.create_connection((host, port), timeout=timeout).close()
+            return True
+        except OSError:
+            return False
+    check.description = f"tcp://{host}:{port}"
+    return check
+
+
+def command_check(command: str) -> Check:
+    """Проверка командой; команда может сама ждать (kubectl wait), ей отдается остаток времени"""
+    def check(timeout: float) -> bool:
+        try:
+            return subprocess.run(command, shell=True, stdout=subprocess.DEVNULL,
+                                  stderr=subprocess.DEVNULL, timeout=timeout).returncode == 0
+        except subprocess.TimeoutExpired:
+            return False
+    check.description = f"cmd:{command}"
+    return check
+
+
+def parse_check(spec: str) -> Check:
+    if spec.startswith(("http://", "https://")):
+        return http_check(spec)
+    if spec.startswith("tcp://"):
+        address = urlsplit(spec)
+        return tcp_check(address.hostname, address.port)
+    if spec.startswith("cmd:"):
+        return command_check(spec[len("cmd:"):])
+    raise ValueError(f"Unknown check '{spec}': expected http(s)://, tcp:// or cmd:")
+
+
+class Component:
+    """Компонент окружения: проверка готовности и имена зависимостей"""
+
+    def __init__(self, name: str, check: Check, depends: Iterable[str] = ()):
+        self.name = name
+        self.check = check
+        self.depends = list(depends)
+        self.ready = threading.Event()
+        self.done = threading.Event()
+        self.status = "pending"
+        self.seconds = 0.0
+        self.attempts = 0
+
+    def result(self) -> dict:
+        return {"status": self.status, "seconds": round(self.seconds, 3), "attempts": self.attempts,
+                "depends": self.depends}
+
+
+def _validate(components: Dict[str, Component]):
+    for component in components.values():
+        for dependency in component.depends:
+            if dependency not in components:
+                raise ValueError(f"{component.name} depends on unknown component {dependency}")
+
+    # Поиск цикла обходом в глубину
+    state = {}
+
+    def visit(name: str, path: List[str]):
+        if state.get(name) == "done":
+            return
+        if state.get(name) == "visiting":
+            raise ValueError(f"Dependency cycle: {' -> '.join(path + [name])}")
+        state[name] = "visiting"
+        for dependency in components[name].depends:
+            visit(dependency, path + [name])
+        state[name] = "done"
+
+    for name in components:
+        visit(name, [])
+
+
+def _wait_component(component: Component, components: Dict[str, Component], started: float,
+                    deadline: float, initial_delay: float, max_delay: float,
+                    attempt_timeout: float, report: Callable[[Component], None]):
+    try:
+        for dependency in component.depends:
+            components[dependency].done.wait(max(0.0, deadline - time.monotonic()))
+            if not components[dependency].ready.is_set():
+                component.status = "blocked"
+                return
+
+        delay = initial_delay
+        while True:
+            component.attempts += 1
+            remaining = deadline - time.monotonic()
+            budget = remaining if attempt_timeout is None else min(attempt_timeout, remaining)
+            if component.check(max(0.1, budget)):
+                component.status = "ready"
+                component.ready.set()
+                return
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                component.status = "timeout"
+                return
+            time.sleep(min(delay, remaining))
+            delay = min(delay * 2, max_delay)
+    finally:
+        component.seconds = time.monotonic() - started
+        component.done.set()
+        report(component)
+
+
+def wait_all(components: Iterable[Component], timeout: float = 120.0, initial_delay: float = 0.1,
+             max_delay: float = 2.0, attempt_timeout: Optional[float] = 5.0,
+             report: Callable[[Component], None] = lambda component: None) -> Dict[str, dict]:
+    """Дождаться готовности компонентов с учетом зависимостей
+
+    Возвращает {имя: {"status", "seconds", "attempts", "depends"}}; статус -
+    ready, timeout или blocked (не готова зависимость). seconds - время от
+    начала ожидания. attempt_timeout=None - попытка может занять все
+    оставшееся время (для проверок-команд, которые ждут сами).
+    """
+    components = {component.name: component for component in components}
+    _validate(components)
+    started = time.monotonic()
+    deadline = started + timeout
+    threads = [
+        threading.Thread(
+            target=_wait_component,
+            args=(component, components, started, deadline, initial_delay, max_delay, attempt_timeout, report),
+            name=f"wait-{component.name}",
+            daemon=True,
+        )
+        for component in components.values()
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return {name: component.result() for name, component in components.items()}
+
+
+def print_result(component: Component):
+    if component.status == "ready":
+        print(f"✅ {component.name} ready in {component.seconds:.2f}s ({component.attempts} attempts)", flush=True)
+    elif component.status == "blocked":
+        print(f"⏭️  {component.name} skipped: dependency not ready", flush=True)
+    else:
+        print(f"❌ {component.name} not ready after {component.seconds:.2f}s "
+              f"({component.attempts} attempts, {component.check.description})", flush=True)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Параллельное ожидание готовности компонентов окружения")
+    parser.add_argument("components", nargs="+", metavar="NAME=CHECK",
+                        help="http(s)://..., tcp://host:port или cmd:<команда>")
+    parser.add_argument("--after", action="append", default=[], metavar="NAME=DEP[,DEP]",
+                        help="Зависимости компонента: проверки начинаются после их готовности")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Общий таймаут, секунды")
+    parser.add_argument("--max-delay", type=float, default=2.0, help="Максимальная пауза между попытками")
+    parser.add_argument("--attempt-timeout", type=float, default=5.0,
+                        help="Таймаут одной попытки; 0 - без ограничения (cmd: с собственным ожиданием)")
+    parser.add_argument("--report", help="Записать результат в JSON-файл")
+    args = parser.parse_args()
+
+    depends = {}
+    for spec in args.after:
+        name, _, dependencies = spec.partition("=")
+        depends.setdefault(name, []).extend(dep for dep in dependencies.split(",") if dep)
+
+    components = []
+    try:
+        for spec in args.components:
+            name, sep, check = spec.partition("=")
+            if not sep:
+                raise ValueError(f"Expected NAME=CHECK, got '{spec}'")
+            components.append(Component(name, parse_check(check), depends.pop(name, [])))
+        if depends:
+            raise ValueError(f"--after for unknown components: {', '.join(depends)}")
+        _validate({component.name: component for component in components})
+    except ValueError as e:
+        parser.error(str(e))
+
+    started = time.monotonic()
+    results = wait_all(components, args.timeout, max_delay=args.max_delay,
+                       attempt_timeout=args.attempt_timeout or None, report=print_result)
+    elapsed = time.monotonic() - started
+    total = sum(result["seconds"] for result in results.values())
+    print(f"Environment ready check finished in {elapsed:.2f}s (sum of component waits {total:.2f}s)")
+
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump({"elapsed_seconds": round(elapsed, 3), "components": results}, f, indent=2)
+    return 0 if all(result["status"] == "ready" for result in results.values()) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,21 @@
+"""Модульные тесты кода приложения, mock-сервера и утилит тестов
+
+Работают без запущенных сервисов (БД - SQLite во временном каталоге):
+
+    cd 02-microservice-testing
+    python -m pytest unit_tests
+
+Модули лежат плоско в app/, mocks/, shared/, scripts/ и tests/ - так же,
+как в образах, где каталог сервиса является рабочим, - поэтому каталоги
+добавляются в sys.path.
+"""
+import os
+import sys
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# models создает engine при импорте: без Postgres и без подключения
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+for directory in ("tests", "scripts", "shared", "mocks", "app"):
+    sys.path.insert(0, os.path.join(PROJECT_DIR, directory))
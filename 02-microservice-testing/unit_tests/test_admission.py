@@ -0,0 +1,159 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import admission
+from admission import AdaptiveLimiter, AdmissionControl, AdmissionMiddleware
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Управляемое время admission: уменьшение лимита зависит от паузы с прошлого уменьшения"""
+    now = [1000.0]
+    monkeypatch.setattr(admission.time, "monotonic", lambda: now[0])
+    return now
+
+
+def fill(limiter: AdaptiveLimiter, count: int):
+    for _ in range(count):
+        assert limiter.try_acquire()
+
+
+class TestAdaptiveLimiter:
+    """AIMD: аддитивный рост, мультипликативное снижение"""
+
+    def test_rejects_at_limit(self):
+        limiter = AdaptiveLimiter(initial_limit=2, min_limit=1)
+        fill(limiter, 2)
+
+        assert not limiter.try_acquire()
+        assert limiter.snapshot() == {"limit": 2, "inflight": 2, "baseline_ms": None, "accepted": 2, "rejected": 1}
+
+        limiter.release(0.01)
+        assert limiter.try_acquire()
+
+    def test_additive_increase(self, clock):
+        limiter = AdaptiveLimiter(initial_limit=4, max_limit=5)
+        fill(limiter, 4)
+
+        limiter.release(0.01)
+        assert limiter.limit == pytest.approx(4.25)  # +1/limit за запрос: +1 за окно из limit запросов
+
+        for _ in range(100):
+            limiter.try_acquire()
+            limiter.release(0.01)
+        assert limiter.limit == 5  # не выше max_limit
+
+    def test_no_increase_when_limit_unused(self, clock):
+        limiter = AdaptiveLimiter(initial_limit=32)
+        fill(limiter, 1)
+
+        limiter.release(0.01)
+
+        assert limiter.limit == 32
+
+    def test_multiplicative_decrease_on_high_latency(self, clock):
+        limiter = AdaptiveLimiter(initial_limit=10, backoff=0.5, tolerance=2.0, latency_floor=0.05)
+        fill(limiter, 3)
+        limiter.release(0.1)  # базовая латентность
+
+        limiter.release(0.5)
+        assert limiter.limit == 5
+
+        # Тот же всплеск (меньше его длительности с прошлого снижения) - без повторного снижения
+        clock[0] += 0.1
+        limiter.release(0.5)
+        assert limiter.limit == 5
+
+    def test_multiplicative_decrease_on_server_error(self, clock):
+        limiter = AdaptiveLimiter(initial_limit=10, min_limit=8, backoff=0.5)
+        fill(limiter, 1)
+
+        limiter.release(0.01, failed=True)
+
+        assert limiter.limit == 8  # не ниже min_limit
+
+    def test_slow_but_below_floor_is_not_overload(self, clock):
+        limiter = AdaptiveLimiter(initial_limit=2, latency_floor=0.05)
+        fill(limiter, 2)
+        limiter.release(0.001)
+
+        limiter.release(0.04)  # в 40 раз медленнее базовой, но ниже latency_floor
+
+        assert limiter.limit > 2
+
+
+@pytest.fixture
+def control():
+    return AdmissionControl(default_settings={"initial_limit": 1, "min_limit": 1}, retry_after=3)
+
+
+@pytest.fixture
+def client(control):
+    app = FastAPI()
+
+    @app.get("/health")
+    def health():
+        return {"status": "healthy"}
+
+    @app.get("/ready")
+    def ready():
+        return {"status": "ready"}
+
+    @app.get("/users/{user_id}")
+    def get_user(user_id: int):
+        return {"id": user_id}
+
+    @app.get("/fail")
+    def fail():
+        raise RuntimeError("boom")
+
+    app.add_middleware(AdmissionMiddleware, control=control)
+    return TestClient(app, raise_server_exceptions=False)
+
+
+def saturate(client, control, path: str) -> AdaptiveLimiter:
+    """Занять весь лимит маршрута, как будто запросы еще выполняются"""
+    client.get(path)
+    (limiter,) = control.limiters.values()
+    fill(limiter, int(limiter.limit))
+    return limiter
+
+
+class TestAdmissionMiddleware:
+    """Отказ сверх лимита и исключенные маршруты"""
+
+    def test_request_over_limit_gets_503_with_retry_after(self, client, control):
+        saturate(client, control, "/users/1")
+
+        response = client.get("/users/2")
+
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == "3"
+        assert response.json() == {"detail": "Service overloaded, retry later"}
+
+    def test_limits_are_per_route_template(self, client, control):
+        client.get("/users/1")
+        client.get("/users/2")
+
+        assert list(control.snapshot()) == ["GET /users/{user_id}"]
+        assert control.snapshot()["GET /users/{user_id}"]["accepted"] == 2
+
+    @pytest.mark.parametrize("path", ["/health", "/ready"])
+    def test_exempt_routes_not_limited(self, client, control, path):
+        saturate(client, control, "/users/1")
+
+        assert client.get(path).status_code == 200
+        assert list(control.snapshot()) == ["GET /users/{user_id}"]
+
+    def test_server_error_releases_and_decreases(self, control, client):
+        control.default_settings = {"initial_limit": 4, "min_limit": 1, "backoff": 0.5}
+
+        assert client.get("/fail").status_code == 500
+
+        assert control.snapshot()["GET /fail"]["limit"] == 2
+        assert control.snapshot()["GET /fail"]["inflight"] == 0
+
+    def test_unknown_route_not_limited(self, client, control):
+        assert client.get("/missing").status_code == 404
+        assert control.snapshot() == {}
@@ -0,0 +1,146 @@
+import json
+import os
+
+import pytest
+
+import generate_fixtures
+from fixtures import HEADER, MAGIC, SECTION, MmapFixtureStore, NdjsonFixtureStore, build_pack, open_store
+
+FILES = ("users.ndjson", "orders.ndjson", "payments.ndjson")
+
+
+def read_bytes(directory, name):
+    with open(os.path.join(directory, name), "rb") as f:
+        return f.read()
+
+
+def write_ndjson(directory, name, records):
+    with open(os.path.join(directory, name), "w") as f:
+        f.writelines(json.dumps(record) + "\n" for record in records)
+
+
+@pytest.fixture(scope="module")
+def dataset(tmp_path_factory):
+    """Сгенерированный каталог NDJSON и pack-файл из него"""
+    directory = str(tmp_path_factory.mktemp("fixtures"))
+    counts = generate_fixtures.generate(directory, users=300, seed=7)
+    pack = os.path.join(directory, "fixtures.pack")
+    return directory, pack, counts, build_pack(directory, pack)
+
+
+class TestGenerate:
+    """Воспроизводимость и порядок записей генератора"""
+
+    def test_same_seed_same_bytes(self, tmp_path):
+        generate_fixtures.generate(str(tmp_path / "a"), users=50, seed=42)
+        generate_fixtures.generate(str(tmp_path / "b"), users=50, seed=42)
+        generate_fixtures.generate(str(tmp_path / "c"), users=50, seed=43)
+
+        for name in FILES + ("manifest.json",):
+            assert read_bytes(tmp_path / "a", name) == read_bytes(tmp_path / "b", name)
+        assert read_bytes(tmp_path / "a", "orders.ndjson") != read_bytes(tmp_path / "c", "orders.ndjson")
+
+    def test_records_sorted_and_counted(self, dataset):
+        directory, _, counts, _ = dataset
+        records = {name: [json.loads(line) for line in read_bytes(directory, name).splitlines()] for name in FILES}
+
+        assert [user["id"] for user in records["users.ndjson"]] == list(range(1, 301))
+        user_ids = [order["user_id"] for order in records["orders.ndjson"]]
+        assert user_ids == sorted(user_ids)
+        order_ids = [payment["order_id"] for payment in records["payments.ndjson"]]
+        assert order_ids == sorted(order_ids) and len(set(order_ids)) == len(order_ids)
+        assert counts == {name.split(".")[0]: len(lines) for name, lines in records.items()}
+        with open(os.path.join(directory, "manifest.json")) as f:
+            assert json.load(f) == {"seed": 7, "skew": 1.3, "max_orders": 1000, "counts": counts}
+
+    def test_order_count_capped(self):
+        rng = generate_fixtures.random.Random(1)
+        assert max(generate_fixtures.order_count(rng, 0.5, 10) for _ in range(1000)) == 10
+
+
+class TestPack:
+    """Формат pack-файла и бинарный поиск по ключам"""
+
+    def test_layout(self, dataset):
+        directory, _, counts, _ = dataset
+        data = read_bytes(directory, "fixtures.pack")
+        magic, section_count, _, data_start = HEADER.unpack_from(data, 0)
+        assert (magic, section_count) == (MAGIC, 3)
+
+        position = HEADER.size + SECTION.size * section_count
+        for i, name in enumerate(("users", "orders", "payments")):
+            raw_name, keys_count, records, keys_offset, offsets_offset = SECTION.unpack_from(
+                data, HEADER.size + i * SECTION.size
+            )
+            assert raw_name.rstrip(b"\0").decode() == name
+            assert records == counts[name]
+            assert (keys_offset, offsets_offset) == (position, position + 8 * keys_count)
+            position = offsets_offset + 8 * (keys_count + 1)
+
+            keys = memoryview(data)[keys_offset:offsets_offset].cast("q").tolist()
+            offsets = memoryview(data)[offsets_offset:position].cast("Q").tolist()
+            assert keys == sorted(set(keys))
+            assert offsets == sorted(offsets)
+            first = data[data_start + offsets[0]:data_start + offsets[1]]
+            assert json.loads(first)  # запись - целый JSON
+        assert data_start == position
+
+    def test_lookup_hits_and_misses(self, tmp_path):
+        write_ndjson(tmp_path, "users.ndjson", [{"id": 3}, {"id": 5}, {"id": 9}])
+        write_ndjson(tmp_path, "orders.ndjson", [{"id": 1, "user_id": 5}, {"id": 2, "user_id": 5}])
+        write_ndjson(tmp_path, "payments.ndjson", [])
+        build_pack(str(tmp_path), str(tmp_path / "p.pack"))
+        store = MmapFixtureStore.load(str(tmp_path / "p.pack"))
+
+        for user_id in (3, 5, 9):
+            assert json.loads(store.get_user(user_id)) == {"id": user_id}
+        for missing in (-1, 0, 4, 6, 10):
+            assert store.get_user(missing) is None
+        assert json.loads(store.get_orders(5)) == [{"id": 1, "user_id": 5}, {"id": 2, "user_id": 5}]
+        assert store.get_orders(3) == b"[]"
+        assert store.get_payment(1) is None
+        assert store.stats()["counts"] == {"users": 3, "orders": 2, "payments": 0}
+
+    @pytest.mark.parametrize("users,error", [
+        ([{"id": 2}, {"id": 1}], "must be sorted"),
+        ([{"id": 1}, {"id": 1}], "duplicate id"),
+        ([{"name": "no id"}], "invalid record"),
+    ])
+    def test_invalid_source_rejected(self, tmp_path, users, error):
+        write_ndjson(tmp_path, "users.ndjson", users)
+        write_ndjson(tmp_path, "orders.ndjson", [])
+        write_ndjson(tmp_path, "payments.ndjson", [])
+
+        with pytest.raises(ValueError, match=error):
+            build_pack(str(tmp_path), str(tmp_path / "p.pack"))
+        assert os.listdir(tmp_path) == [name for name in os.listdir(tmp_path) if name.endswith(".ndjson")]
+
+    def test_not_a_pack(self, tmp_path):
+        path = tmp_path / "other.pack"
+        path.write_bytes(HEADER.pack(b"FXPACK01", 0, 0, HEADER.size))
+
+        with pytest.raises(ValueError, match="rebuild"):
+            MmapFixtureStore(str(path))
+
+
+class TestStoresAgree:
+    """NDJSON и pack-файл из одних данных отдают одно и то же"""
+
+    def test_same_records(self, dataset):
+        directory, pack, counts, _ = dataset
+        ndjson, mapped = open_store(directory), open_store(pack)
+        assert isinstance(ndjson, NdjsonFixtureStore) and isinstance(mapped, MmapFixtureStore)
+
+        for user_id in range(0, 302):
+            assert ndjson.get_user(user_id) == mapped.get_user(user_id)
+            assert ndjson.get_orders(user_id) == mapped.get_orders(user_id)
+        first_order = generate_fixtures.FIRST_ORDER_ID
+        for order_id in range(first_order - 1, first_order + counts["orders"] + 1):
+            assert ndjson.get_payment(order_id) == mapped.get_payment(order_id)
+
+    def test_same_counts(self, dataset):
+        directory, pack, counts, pack_counts = dataset
+
+        assert NdjsonFixtureStore.load(directory).stats()["counts"] == counts
+        assert MmapFixtureStore.load(pack).stats()["counts"] == counts
+        assert pack_counts == counts
@@ -0,0 +1,108 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from sqlalchemy import create_engine
+
+import idempotency
+from idempotency import DatabaseIdempotencyStore, IdempotencyError, IdempotencyGuard, MemoryIdempotencyStore
+from models import Base
+
+
+@pytest.fixture
+def database_store(tmp_path, monkeypatch):
+    """Хранилище в файле SQLite: одна таблица idempotency_keys на все "воркеры" теста"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'idempotency.db'}", connect_args={"timeout": 30})
+    Base.metadata.create_all(bind=engine)
+    monkeypatch.setattr(idempotency, "engine", engine)
+    yield DatabaseIdempotencyStore(purge_probability=0)
+    engine.dispose()
+
+
+class CountingHandler:
+    """Медленный обработчик: остальные запросы приходят, пока ключ занят"""
+
+    def __init__(self):
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def __call__(self):
+        with self._lock:
+            self.calls += 1
+        time.sleep(0.1)
+        return 201, {"id": self.calls}
+
+
+class TestIdempotencyGuard:
+    """Объединение одновременных запросов с одним ключом"""
+
+    def test_concurrent_requests_in_one_process(self):
+        guard = IdempotencyGuard(MemoryIdempotencyStore())
+        handler = CountingHandler()
+
+        with ThreadPoolExecutor(max_workers=10) as executor:
+            results = list(executor.map(lambda _: guard.execute("key", "fp", handler), range(10)))
+
+        assert handler.calls == 1
+        assert {(status, body["id"]) for status, body, _ in results} == {(201, 1)}
+
+    def test_concurrent_requests_across_workers(self, database_store):
+        """Guard на воркер, общее хранилище в БД: обработчик выполняется один раз на все воркеры"""
+        workers = [IdempotencyGuard(database_store, poll_interval=0.01) for _ in range(2)]
+        handler = CountingHandler()
+        start = threading.Barrier(10, timeout=5)
+
+        def request(i):
+            start.wait()
+            return workers[i % 2].execute("key", "fp", handler)
+
+        with ThreadPoolExecutor(max_workers=10) as executor:
+            results = list(executor.map(request, range(10)))
+
+        assert handler.calls == 1
+        assert {(status, body["id"]) for status, body, _ in results} == {(201, 1)}
+        assert sum(not replayed for _, _, replayed in results) == 1
+
+    def test_worker_waits_for_reserved_key(self, database_store):
+        """Ключ занят другим воркером: ответ берется из БД, а не выполняется повторно"""
+        other_worker = IdempotencyGuard(database_store)
+        assert database_store.reserve("key", "fp")
+        threading.Timer(0.1, database_store.save, args=("key", {"status_code": 201, "body": {"id": 7}})).start()
+
+        status, body, replayed = other_worker.execute("key", "fp", lambda: pytest.fail("handler called twice"))
+
+        assert (status, body, replayed) == (201, {"id": 7}, True)
+
+    def test_released_reservation_is_taken_over(self, database_store):
+        """Первый запрос упал и снял резерв - ожидающий выполняет запрос сам"""
+        guard = IdempotencyGuard(database_store)
+        assert database_store.reserve("key", "fp")
+        threading.Timer(0.1, database_store.release, args=("key",)).start()
+
+        assert guard.execute("key", "fp", lambda: (201, {"id": 1})) == (201, {"id": 1}, False)
+
+    def test_reserved_key_times_out_with_409(self, database_store):
+        guard = IdempotencyGuard(database_store, wait_timeout=0.1, poll_interval=0.01)
+        assert database_store.reserve("key", "fp")
+
+        with pytest.raises(IdempotencyError) as error:
+            guard.execute("key", "fp", lambda: (201, {}))
+
+        assert error.value.status_code == 409
+
+    def test_key_reused_with_different_body(self, database_store):
+        guard = IdempotencyGuard(database_store)
+        guard.execute("key", "fp", lambda: (201, {"id": 1}))
+
+        with pytest.raises(IdempotencyError) as error:
+            guard.execute("key", "other", lambda: (201, {"id": 2}))
+
+        assert error.value.status_code == 422
+
+    def test_server_error_not_stored(self, database_store):
+        guard = IdempotencyGuard(database_store)
+
+        assert guard.execute("key", "fp", lambda: (503, {"detail": "down"})) == (503, {"detail": "down"}, False)
+        assert database_store.get("key") is None
+        assert guard.execute("key", "fp", lambda: (201, {"id": 1})) == (201, {"id": 1}, False)
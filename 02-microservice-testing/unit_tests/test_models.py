@@ -0,0 +1,44 @@
+import pytest
+
+import models
+
+
+@pytest.fixture(autouse=True)
+def pool_env(monkeypatch):
+    for name in ("DB_POOL_PER_WORKER", "DB_POOL_SIZE", "DB_MAX_OVERFLOW"):
+        monkeypatch.delenv(name, raising=False)
+    monkeypatch.setattr(models, "DB_MAX_CONNECTIONS", 100)
+    monkeypatch.setattr(models, "DB_RESERVED_CONNECTIONS", 10)
+    monkeypatch.setattr(models, "APP_REPLICAS", 2)
+    monkeypatch.setattr(models, "WEB_CONCURRENCY", 4)
+    return monkeypatch
+
+
+class TestPoolSettings:
+    """Пул на воркер только в многопроцессном режиме"""
+
+    def test_single_process_keeps_sqlalchemy_defaults(self):
+        assert models.pool_settings() == {"pool_size": 5, "max_overflow": 10, "pool_pre_ping": True}
+
+    def test_per_worker_share_of_connection_budget(self, pool_env):
+        pool_env.setenv("DB_POOL_PER_WORKER", "1")
+
+        settings = models.pool_settings()
+
+        assert (settings["pool_size"], settings["max_overflow"]) == (11, 0)  # 90 // (2 * 4)
+        assert settings["pool_size"] * 2 * 4 <= 100 - 10
+
+    def test_per_worker_at_least_one_connection(self, pool_env):
+        pool_env.setenv("DB_POOL_PER_WORKER", "1")
+        pool_env.setattr(models, "WEB_CONCURRENCY", 1000)
+
+        assert models.pool_settings()["pool_size"] == 1
+
+    @pytest.mark.parametrize("per_worker", ["0", "1"])
+    def test_explicit_sizes_win(self, pool_env, per_worker):
+        pool_env.setenv("DB_POOL_PER_WORKER", per_worker)
+        pool_env.setenv("DB_POOL_SIZE", "7")
+        pool_env.setenv("DB_MAX_OVERFLOW", "3")
+
+        assert models.pool_settings()["pool_size"] == 7
+        assert models.pool_settings()["max_overflow"] == 3
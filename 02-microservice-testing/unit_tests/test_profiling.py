@@ -0,0 +1,112 @@
+import re
+import threading
+
+import pytest
+
+import profiling
+from profiling import MemoryTracker, ProfilingError
+
+COLLAPSED_LINE = re.compile(r"^(\S+) (\d+)$")
+
+
+@pytest.fixture
+def token(monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILING_TOKEN", "s3cret")
+    return "s3cret"
+
+
+def status_of(call) -> int:
+    with pytest.raises(ProfilingError) as error:
+        call()
+    return error.value.status_code
+
+
+def spin_for_profile(stop: threading.Event):
+    """Нагрузка, которая должна попасть в профиль"""
+    while not stop.is_set():
+        sum(range(1000))
+
+
+class TestToken:
+    """Доступ к профилированию только по токену"""
+
+    @pytest.mark.parametrize("value", [None, "", "wrong", "s3cret "])
+    def test_rejected(self, token, value):
+        assert status_of(lambda: profiling.check_token(value)) == 403
+
+    def test_accepted(self, token):
+        profiling.check_token(token)
+
+    def test_empty_configured_token_rejects_everything(self, monkeypatch):
+        monkeypatch.setattr(profiling, "PROFILING_TOKEN", "")
+        assert status_of(lambda: profiling.check_token("")) == 403
+
+    @pytest.mark.parametrize("enabled,token_value,expected", [
+        (True, "s3cret", True), (True, "", False), (False, "s3cret", False),
+    ])
+    def test_enabled_only_with_token(self, monkeypatch, enabled, token_value, expected):
+        monkeypatch.setattr(profiling, "PROFILING_ENABLED", enabled)
+        monkeypatch.setattr(profiling, "PROFILING_TOKEN", token_value)
+        assert profiling.is_enabled() is expected
+
+
+class TestSampleCpu:
+    """Ограничения и collapsed-формат CPU-профиля"""
+
+    @pytest.mark.parametrize("seconds", [0, -1, profiling.MAX_PROFILE_SECONDS + 1])
+    def test_seconds_out_of_bounds(self, seconds):
+        assert status_of(lambda: profiling.sample_cpu(seconds)) == 400
+
+    @pytest.mark.parametrize("interval", [0, -0.005, 0.0001, 2])
+    def test_interval_out_of_bounds(self, interval):
+        assert status_of(lambda: profiling.sample_cpu(1, interval)) == 400
+
+    def test_one_profile_at_a_time(self):
+        with profiling._cpu_lock:
+            assert status_of(lambda: profiling.sample_cpu(0.01)) == 409
+
+    def test_collapsed_stacks(self):
+        stop = threading.Event()
+        worker = threading.Thread(target=spin_for_profile, args=(stop,), name="busy worker")
+        worker.start()
+        try:
+            output = profiling.sample_cpu(0.2, 0.002)
+        finally:
+            stop.set()
+            worker.join()
+
+        lines = output.splitlines()
+        assert lines and all(COLLAPSED_LINE.match(line) for line in lines)
+        counts = [int(COLLAPSED_LINE.match(line).group(2)) for line in lines]
+        assert counts == sorted(counts, reverse=True)
+        busy = [line for line in lines if line.startswith("busy_worker;")]
+        assert busy and all("spin_for_profile@test_profiling.py:" in line for line in busy)
+        # Поток профайлера свои стеки не снимает
+        assert "sample_cpu@profiling.py" not in output
+
+
+class TestMemoryTracker:
+    """tracemalloc: снимки и разница"""
+
+    @pytest.fixture
+    def tracker(self):
+        tracker = MemoryTracker()
+        yield tracker
+        tracker.stop()
+
+    def test_requires_start_and_snapshot(self, tracker):
+        assert status_of(tracker.snapshot) == 409
+        tracker.start()
+        assert status_of(tracker.diff) == 409
+
+    def test_diff_shows_growth(self, tracker):
+        tracker.start()
+        assert tracker.snapshot()["tracing"] is True
+
+        leak = [bytearray(1024) for _ in range(200)]
+        diff = tracker.diff(limit=5)
+
+        assert leak
+        top = diff["top"][0]
+        assert "test_profiling.py" in top["location"] and top["size_diff_bytes"] >= 200 * 1024
+        assert tracker.stop() == {"tracing": False, "current_bytes": 0, "peak_bytes": 0}
@@ -0,0 +1,86 @@
+import pytest
+
+import trace_report
+
+
+def span(span_id, parent_id, name, service, kind, start_ms, end_ms, trace_id="t1", **attributes):
+    return {
+        "trace_id": trace_id, "span_id": span_id, "parent_id": parent_id, "name": name, "service": service,
+        "kind": kind, "start": start_ms / 1000, "duration": (end_ms - start_ms) / 1000, "attributes": attributes,
+    }
+
+
+def overview_trace(trace_id="t1", offset=0):
+    """Клиент -> приложение (запрос в БД, затем вызов mock-сервера)
+
+    client   0 ................................ 100
+    app        5 ............................ 95
+    db.query     10 ..... 30
+    upstream                   40 ......... 90
+    mock                         45 ..... 85
+    """
+    def at(start, end):
+        return start + offset, end + offset
+    return [
+        span("c", None, "GET /users/1/overview", "client", "client", *at(0, 100), trace_id=trace_id),
+        span("a", "c", "GET /users/{user_id}/overview", "app", "server", *at(5, 95), trace_id=trace_id),
+        span("d", "a", "db.query SELECT users", "app", "client", *at(10, 30), trace_id=trace_id),
+        span("u", "a", "upstream GET /orders/{user_id}", "app", "client", *at(40, 90), trace_id=trace_id),
+        span("m", "u", "GET /orders/<int:user_id>", "mock-server", "server", *at(45, 85), trace_id=trace_id),
+    ]
+
+
+class TestCriticalPath:
+    """Критический путь и доли категорий"""
+
+    def test_breakdown_by_category(self):
+        report = trace_report.analyze(overview_trace())
+
+        stats = report["GET /users/{user_id}/overview"]
+        assert stats["traces"] == 1
+        assert stats["p50_ms"] == pytest.approx(100)
+        path = {name: part["avg_ms"] for name, part in stats["critical_path"].items()}
+        assert path == pytest.approx({"mock-server": 40, "app": 20, "db": 20, "network": 20})
+        assert list(stats["critical_path"])[0] == "mock-server"
+        assert stats["top_spans"][0] == {"span": "mock-server: GET /orders/<int:user_id>", "avg_ms": 40.0,
+                                         "share": 0.4}
+
+    def test_parallel_children_not_counted_twice(self):
+        """Из двух параллельных вызовов на пути только тот, что закончился последним"""
+        spans = [
+            span("a", None, "GET /users/{user_id}/overview", "app", "server", 0, 100),
+            span("p", "a", "upstream GET /payments/1", "app", "client", 10, 90),
+            span("q", "a", "upstream GET /payments/2", "app", "client", 20, 60),
+        ]
+        path = trace_report.analyze(spans)["GET /users/{user_id}/overview"]["critical_path"]
+
+        assert {name: part["avg_ms"] for name, part in path.items()} == pytest.approx({"network": 80, "app": 20})
+
+    def test_explicit_category_attribute(self):
+        spans = [
+            span("a", None, "GET /users/{user_id}/orders", "app", "server", 0, 50),
+            span("w", "a", "orders.batch_wait", "app", "internal", 0, 40, category="upstream batch"),
+        ]
+        path = trace_report.analyze(spans)["GET /users/{user_id}/orders"]["critical_path"]
+
+        assert path["upstream batch"]["avg_ms"] == pytest.approx(40)
+
+    def test_filter_by_trace_id(self):
+        spans = overview_trace("t1") + overview_trace("t2", offset=1000)
+
+        assert trace_report.analyze(spans)["GET /users/{user_id}/overview"]["traces"] == 2
+        assert trace_report.analyze(spans, trace_ids={"t2"})["GET /users/{user_id}/overview"]["traces"] == 1
+
+    def test_print_report(self, capsys):
+        trace_report.print_report(trace_report.analyze(overview_trace()))
+
+        output = capsys.readouterr().out
+        assert "GET /users/{user_id}/overview: 1 traces, p50 100.0 ms" in output
+        assert "critical path:  mock-server 40.0 ms (40%)" in output
+        assert "mock-server: GET /orders/<int:user_id>" in output
+
+    def test_parse_request(self):
+        assert trace_report.parse_request('POST /orders {"total": 1}') == ("POST", "/orders", {"total": 1})
+        assert trace_report.parse_request("get /users") == ("GET", "/users", None)
+        with pytest.raises(ValueError):
+            trace_report.parse_request("/users")
@@ -0,0 +1,90 @@
+import pytest
+
+import tracing
+
+TRACE_ID = "4bf92f3577b34da6a3ce929d0e0e4736"
+PARENT_ID = "00f067aa0ba902b7"
+
+
+@pytest.fixture
+def exporter(monkeypatch):
+    """Трассировка включена, span'ы пишутся в отдельный буфер теста"""
+    monkeypatch.setattr(tracing, "TRACING_ENABLED", True)
+    exporter = tracing.SpanExporter()
+    monkeypatch.setattr(tracing, "exporter", exporter)
+    return exporter
+
+
+class TestParseTraceparent:
+    """Разбор заголовка W3C traceparent"""
+
+    @pytest.mark.parametrize("header,expected", [
+        (f"00-{TRACE_ID}-{PARENT_ID}-01", (TRACE_ID, PARENT_ID, True)),
+        (f"00-{TRACE_ID}-{PARENT_ID}-00", (TRACE_ID, PARENT_ID, False)),
+        (f" 00-{TRACE_ID.upper()}-{PARENT_ID}-03 ", (TRACE_ID, PARENT_ID, True)),
+    ])
+    def test_valid(self, header, expected):
+        assert tracing.parse_traceparent(header) == expected
+
+    @pytest.mark.parametrize("header", [
+        None,
+        "",
+        "garbage",
+        f"01-{TRACE_ID}-{PARENT_ID}-01",          # неизвестная версия
+        f"00-{TRACE_ID[:-1]}-{PARENT_ID}-01",     # короткий trace_id
+        f"00-{TRACE_ID}-{PARENT_ID}z-01",
+        f"00-{'0' * 32}-{PARENT_ID}-01",          # нулевой trace_id
+        f"00-{TRACE_ID}-{'0' * 16}-01",           # нулевой span_id
+    ])
+    def test_invalid(self, header):
+        assert tracing.parse_traceparent(header) is None
+
+
+class TestSpans:
+    """Вложенность span'ов и передача контекста"""
+
+    def test_server_span_continues_incoming_trace(self, exporter):
+        server = tracing.start_server_span(f"00-{TRACE_ID}-{PARENT_ID}-01", "GET /users", "app")
+        with tracing.span("load users") as child:
+            with tracing.span("db.query SELECT users", kind="client") as query:
+                headers = tracing.inject({"Accept": "application/json"})
+        tracing.end_server_span(server, 200)
+
+        assert (server.trace_id, server.parent_id) == (TRACE_ID, PARENT_ID)
+        assert (child.trace_id, child.parent_id) == (TRACE_ID, server.span_id)
+        assert (query.trace_id, query.parent_id, query.kind) == (TRACE_ID, child.span_id, "client")
+        assert headers == {"Accept": "application/json", "traceparent": f"00-{TRACE_ID}-{query.span_id}-01"}
+        # Дочерние span'ы завершаются раньше родителя
+        assert [span["name"] for span in exporter.spans(TRACE_ID)] == [
+            "db.query SELECT users", "load users", "GET /users"
+        ]
+        assert exporter.spans(TRACE_ID)[-1]["attributes"] == {"http.status_code": 200}
+        assert tracing.current_span() is None
+
+    def test_unsampled_incoming_trace_not_recorded(self, exporter):
+        assert tracing.start_server_span(f"00-{TRACE_ID}-{PARENT_ID}-00", "GET /users", "app") is None
+        with tracing.span("nothing") as child:
+            assert child is None
+        assert tracing.inject(None) is None
+        assert exporter.spans() == []
+
+    def test_disabled_tracing_starts_nothing(self, monkeypatch):
+        monkeypatch.setattr(tracing, "TRACING_ENABLED", False)
+        assert tracing.start_server_span(f"00-{TRACE_ID}-{PARENT_ID}-01", "GET /users", "app") is None
+
+    def test_new_trace_without_header(self, exporter, monkeypatch):
+        monkeypatch.setattr(tracing, "TRACING_SAMPLE_RATE", 1.0)
+        server = tracing.start_server_span(None, "GET /users", "app")
+        tracing.end_server_span(server, 200)
+
+        assert len(server.trace_id) == 32 and server.parent_id is None
+        assert tracing.parse_traceparent(server.traceparent) == (server.trace_id, server.span_id, True)
+
+    @pytest.mark.parametrize("statement,name", [
+        ("SELECT id, name FROM users WHERE id = 1", "SELECT users"),
+        ("insert into orders (user_id) values (1)", "INSERT orders"),
+        ('DELETE FROM "idempotency_keys"', "DELETE idempotency_keys"),
+        ("BEGIN", "BEGIN"),
+    ])
+    def test_statement_name(self, statement, name):
+        assert tracing.statement_name(statement) == name
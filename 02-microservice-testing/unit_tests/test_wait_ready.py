@@ -0,0 +1,112 @@
+import json
+import socket
+import threading
+import time
+
+import pytest
+
+import wait_ready
+from wait_ready import Component, wait_all
+
+
+class ScriptedCheck:
+    """Проверка, которая становится успешной с попытки ready_after (None - никогда)"""
+
+    def __init__(self, ready_after=1):
+        self.ready_after = ready_after
+        self.calls = []
+        self.description = "scripted"
+
+    def __call__(self, timeout: float) -> bool:
+        self.calls.append(time.monotonic())
+        return self.ready_after is not None and len(self.calls) >= self.ready_after
+
+
+def closed_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def run_main(monkeypatch, *argv) -> int:
+    monkeypatch.setattr("sys.argv", ["wait_ready.py", *argv])
+    return wait_ready.main()
+
+
+class TestWaitAll:
+    """Зависимости, параллельные проверки и таймаут"""
+
+    def test_dependent_starts_after_dependency_ready(self):
+        db, app = ScriptedCheck(ready_after=3), ScriptedCheck()
+
+        results = wait_all([Component("app", app, depends=["db"]), Component("db", db)],
+                           timeout=5, initial_delay=0.01)
+
+        assert results["db"]["status"] == results["app"]["status"] == "ready"
+        assert (results["db"]["attempts"], results["app"]["attempts"]) == (3, 1)
+        assert app.calls[0] >= db.calls[-1]
+
+    def test_dependent_blocked_when_dependency_times_out(self):
+        app = ScriptedCheck()
+
+        results = wait_all([Component("db", ScriptedCheck(ready_after=None)), Component("app", app, ["db"])],
+                           timeout=0.2, initial_delay=0.01)
+
+        assert results["db"]["status"] == "timeout"
+        assert results["app"]["status"] == "blocked"
+        assert app.calls == []
+
+    def test_independent_components_checked_in_parallel(self):
+        started = threading.Barrier(2, timeout=2)
+
+        def check(timeout):
+            started.wait()  # обе проверки идут одновременно, иначе барьер не пройти
+            return True
+
+        results = wait_all([Component("db", check), Component("mock", check)], timeout=5)
+
+        assert {result["status"] for result in results.values()} == {"ready"}
+
+    @pytest.mark.parametrize("components,error", [
+        ([Component("a", bool, ["b"]), Component("b", bool, ["a"])], "Dependency cycle: a -> b -> a"),
+        ([Component("a", bool, ["a"])], "Dependency cycle: a -> a"),
+        ([Component("a", bool, ["missing"])], "depends on unknown component missing"),
+    ])
+    def test_invalid_dependencies(self, components, error):
+        with pytest.raises(ValueError, match=error):
+            wait_all(components, timeout=1)
+
+
+class TestMain:
+    """Коды выхода и отчет командной строки"""
+
+    def test_ready_exit_code_and_report(self, monkeypatch, tmp_path, capsys):
+        report = tmp_path / "ready.json"
+
+        assert run_main(monkeypatch, "first=cmd:true", "second=cmd:true", "--after", "second=first",
+                        "--report", str(report)) == 0
+
+        data = json.loads(report.read_text())
+        assert data["components"]["second"]["depends"] == ["first"]
+        assert "✅ first ready" in capsys.readouterr().out
+
+    def test_timeout_exit_code(self, monkeypatch, capsys):
+        port = closed_port()
+
+        assert run_main(monkeypatch, f"db=tcp://127.0.0.1:{port}", "app=cmd:true", "--after", "app=db",
+                        "--timeout", "0.3", "--max-delay", "0.05") == 1
+
+        output = capsys.readouterr().out
+        assert "❌ db not ready" in output and f"tcp://127.0.0.1:{port}" in output
+        assert "⏭️  app skipped" in output
+
+    @pytest.mark.parametrize("argv", [
+        ["a=cmd:true", "b=cmd:true", "--after", "a=b", "--after", "b=a"],
+        ["a=cmd:true", "--after", "b=a"],
+        ["a=ftp://host"],
+        ["just-a-name"],
+    ])
+    def test_invalid_arguments(self, monkeypatch, argv):
+        with pytest.raises(SystemExit) as exit_info:
+            run_main(monkeypatch, *argv)
+        assert exit_info.value.code == 2
@@ -0,0 +1,129 @@
+import json
+import os
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import sessionmaker
+
+from models import Base, Order, UserOrderSummary
+from writebehind import OrderWriter
+
+
+def order(user_id=1, total=10.0):
+    return {"user_id": user_id, "total": total, "status": "pending", "created_at": datetime(2026, 1, 1, 12, 0)}
+
+
+@pytest.fixture
+def session_factory(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'orders.db'}")
+    Base.metadata.create_all(bind=engine)
+    yield sessionmaker(bind=engine)
+    engine.dispose()
+
+
+@pytest.fixture
+def outbox(tmp_path):
+    return str(tmp_path / "outbox.ndjson")
+
+
+def broken_database():
+    raise ConnectionError("database is down")
+
+
+def count_orders(session_factory) -> int:
+    with session_factory() as db:
+        return db.execute(select(func.count()).select_from(Order)).scalar()
+
+
+def summary(session_factory, user_id=1):
+    with session_factory() as db:
+        row = db.get(UserOrderSummary, user_id)
+        return (row.order_count, row.total_amount) if row else None
+
+
+def run(writer: OrderWriter, orders):
+    """Поставить заказы в очередь до старта потока: пачки набираются детерминированно"""
+    for item in orders:
+        assert writer.submit(item)
+    writer.start()
+    writer.close()
+
+
+class TestOrderWriter:
+    """Пакетная запись, outbox и повтор после перезапуска"""
+
+    def test_orders_written_in_batches(self, session_factory):
+        writer = OrderWriter(session_factory, batch_size=3, flush_interval=0.01)
+        run(writer, [order(total=1.0) for _ in range(7)])
+
+        assert count_orders(session_factory) == 7
+        assert summary(session_factory) == (7, 7.0)
+        assert writer.stats["batches"] == 3
+        assert writer.stats["written"] == 7
+
+    def test_submit_keeps_caller_order_intact(self, session_factory):
+        """Синхронная запись после отказа очереди получает заказ без dedupe_key"""
+        writer = OrderWriter(session_factory, max_queue=1, enqueue_timeout=0.01)
+        first, second = order(), order()
+
+        assert writer.submit(first)
+        assert not writer.submit(second)
+        assert "dedupe_key" not in first and "dedupe_key" not in second
+        assert writer.stats["rejected"] == 1
+
+    def test_failed_batch_spilled_to_outbox(self, outbox):
+        writer = OrderWriter(broken_database, max_retries=1, flush_interval=0.01, outbox_path=outbox)
+        run(writer, [order(), order(user_id=2)])
+
+        with open(f"{outbox}.{os.getpid()}") as f:
+            spilled = [json.loads(line) for line in f]
+        assert [item["user_id"] for item in spilled] == [1, 2]
+        assert all(item["dedupe_key"] for item in spilled)
+        assert writer.stats["spilled"] == 2
+
+    def test_outbox_replayed_after_restart(self, session_factory, outbox):
+        run(OrderWriter(broken_database, max_retries=1, flush_interval=0.01, outbox_path=outbox),
+            [order(total=2.0), order(total=3.0)])
+
+        writer = OrderWriter(session_factory, flush_interval=0.01, outbox_path=outbox)
+        writer.start()
+        writer.close()
+
+        assert count_orders(session_factory) == 2
+        assert summary(session_factory) == (2, 5.0)
+        assert writer.stats["replayed"] == 2
+        assert os.listdir(os.path.dirname(outbox)) == ["orders.db"]
+
+    def test_replay_after_crash_does_not_duplicate(self, session_factory, outbox):
+        """Пачка закоммичена, но файл не удален (падение): повтор ничего не вставляет"""
+        orders = [{**order(total=4.0), "dedupe_key": f"key-{i}"} for i in range(3)]
+        OrderWriter(session_factory).write_batch(orders)
+        # Файл, забранный процессом с нашим pid до перезапуска
+        with open(f"{outbox}.1.{os.getpid()}.replaying", "w") as f:
+            for item in orders:
+                f.write(json.dumps({**item, "created_at": item["created_at"].isoformat()}) + "\n")
+
+        writer = OrderWriter(session_factory, outbox_path=outbox)
+        writer._replay_outbox()
+
+        assert count_orders(session_factory) == 3
+        assert summary(session_factory) == (3, 12.0)
+        assert writer.stats["duplicates"] == 3
+        assert writer.stats["replayed"] == 0
+        assert not os.path.exists(f"{outbox}.1.{os.getpid()}.replaying")
+
+    def test_replaying_file_of_live_process_skipped(self, session_factory, outbox):
+        path = f"{outbox}.1.1.replaying"
+        with open(path, "w") as f:
+            f.write(json.dumps({**order(), "created_at": "2026-01-01T12:00:00"}) + "\n")
+
+        OrderWriter(session_factory, outbox_path=outbox, replay_lease=60)._replay_outbox()
+        assert os.path.exists(path)
+        assert count_orders(session_factory) == 0
+
+        # Аренда истекла: файл забирается, даже если pid занят другим процессом
+        os.utime(path, (0, 0))
+        OrderWriter(session_factory, outbox_path=outbox, replay_lease=60)._replay_outbox()
+        assert not os.path.exists(path)
+        assert count_orders(session_factory) == 1
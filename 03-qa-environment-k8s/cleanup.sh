@@ -39,4 +39,4 @@ done
 echo ""
 echo "✅ Cleanup completed! All resources have been removed."
 echo ""
-echo "💡 To redeploy, run: ./deploy.sh"
+echo "💡 To redeploy, run: IMAGE_TAG=<tag> ./deploy.sh"
@@ -1,7 +1,7 @@
 #!/bin/bash
 
 # Скрипт деплоя приложений на которых будут запускаться тесты
-set -e
+set -eo pipefail
 
 echo "🚀 Deploying Microservice Testing Environment to Kubernetes"
 
@@ -17,20 +17,35 @@ if ! kubectl config current-context &> /dev/null; then
     exit 1
 fi
 
-# Function to wait for deployment to be ready
-wait_for_deployment() {
-    local deployment=$1
-    local namespace=$2
-    echo "⏳ Waiting for deployment $deployment to be ready..."
-    kubectl wait --for=condition=available --timeout=300s deployment/$deployment -n $namespace
+SCRIPT_DIR="$(cd "$(dirname "$0")" && pwd)"
+NAMESPACE="qa-microservice-testing"
+# Общий инструмент ожидания готовности (параллельно, с учетом зависимостей)
+WAIT_READY="$SCRIPT_DIR/../02-microservice-testing/tests/wait_ready.py"
+
+APP_IMAGE="cr.yandex/crp8fh8qsgbjccrgdjdj/qa-devops/tests-app"
+
+# Тег образов приложения, опубликованный build-template.yml: Job миграций и
+# Deployment берут один и тот же образ, а не плавающий :latest. Тег задается
+# явно - локальный git describe мог никогда не собираться в CI (ImagePullBackOff)
+if [ -z "$IMAGE_TAG" ]; then
+    echo "❌ IMAGE_TAG is not set (tag pushed by the build workflow, e.g. IMAGE_TAG=1a2b3c4 ./deploy.sh)"
+    exit 1
+fi
+if command -v docker &> /dev/null; then
+    if ! docker manifest inspect "$APP_IMAGE:$IMAGE_TAG" &> /dev/null; then
+        echo "❌ Image $APP_IMAGE:$IMAGE_TAG not found in the registry (or no access)"
+        exit 1
+    fi
+else
+    echo "⚠️  docker is not available, skipping the $APP_IMAGE:$IMAGE_TAG existence check"
+fi
+
+render() {
+    sed "s/\${IMAGE_TAG}/$IMAGE_TAG/g" "$1"
 }
 
-# Function to wait for job completion
-wait_for_job() {
-    local job=$1
-    local namespace=$2
-    echo "⏳ Waiting for job $job to complete..."
-    kubectl wait --for=condition=complete --timeout=300s job/$job -n $namespace
+k8s_wait() {
+    echo "cmd:kubectl wait --for=condition=$1 --timeout=300s $2 -n $NAMESPACE"
 }
 
 echo "📦 Deploying Kubernetes resources..."
@@ -42,23 +57,30 @@ kubectl apply -f k8s/00-namespace.yaml
 echo "2️⃣ Creating ConfigMaps and Secrets..."
 kubectl apply -f k8s/01-configmaps-secrets.yaml
 
-echo "3️⃣ Deploying PostgreSQL database..."
-kubectl apply -f k8s/02-postgres.yaml
-wait_for_deployment "postgres" "qa-microservice-testing"
-
-echo "4️⃣ Deploying Mock Server..."
-kubectl apply -f k8s/03-mock-server.yaml
-wait_for_deployment "mock-server" "qa-microservice-testing"
+echo "3️⃣ Deploying PostgreSQL, Mock Server and Main Application (image tag $IMAGE_TAG)..."
+# Шаблон Job неизменяем, а завершенный Job с тем же именем не перезапускается:
+# без удаления apply упадет или миграции нового релиза не запустятся
+kubectl delete job db-migrate -n $NAMESPACE --ignore-not-found --wait=true
+# Миграции сами ждут БД, приложение не готово (readinessProbe /ready) до миграций,
+# поэтому манифесты применяются сразу, а ожидание идет по графу зависимостей:
+# postgres -> db-migrate -> app, mock-server -> app
+kubectl apply -f k8s/02-postgres.yaml -f k8s/03-mock-server.yaml
+render k8s/04-app.yaml | kubectl apply -f -
 
-echo "5️⃣ Deploying Main Application..."
-kubectl apply -f k8s/04-app.yaml
-wait_for_deployment "app" "qa-microservice-testing"
+echo "⏳ Waiting for components..."
+python3 "$WAIT_READY" --timeout 300 --attempt-timeout 0 \
+    postgres="$(k8s_wait available deployment/postgres)" \
+    mock-server="$(k8s_wait available deployment/mock-server)" \
+    db-migrate="$(k8s_wait complete job/db-migrate)" \
+    app="$(k8s_wait available deployment/app)" \
+    --after db-migrate=postgres \
+    --after app=db-migrate,mock-server
 
 echo "✅ All services deployed successfully!"
 
 # Show service status
 echo "📊 Service Status:"
-kubectl get pods -n qa-microservice-testing
+kubectl get pods -n $NAMESPACE
 
 echo ""
 echo "🌐 Services available at:"
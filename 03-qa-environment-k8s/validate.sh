@@ -25,11 +25,12 @@ validate_manifest() {
     local file=$1
     echo "📄 Validating $file..."
     
-    if kubectl apply --dry-run=client -f "$file" > /dev/null 2>&1; then
+    # ${IMAGE_TAG} подставляет deploy.sh; для проверки достаточно любого тега
+    if sed 's/${IMAGE_TAG}/validate/g' "$file" | kubectl apply --dry-run=client -f - > /dev/null 2>&1; then
         echo "✅ $file is valid"
     else
         echo "❌ $file has validation errors:"
-        kubectl apply --dry-run=client -f "$file"
+        sed 's/${IMAGE_TAG}/validate/g' "$file" | kubectl apply --dry-run=client -f -
         return 1
     fi
 }
@@ -56,5 +57,5 @@ kubectl get storageclass --no-headers 2>/dev/null | head -3
 echo ""
 echo "✅ All manifests are valid and ready for deployment!"
 echo ""
-echo "🚀 To deploy, run: ./deploy.sh"
+echo "🚀 To deploy, run: IMAGE_TAG=<tag> ./deploy.sh"
 echo "📋 To see what will be deployed: kubectl apply --dry-run=server -f k8s/"
@@ -1,28 +1,99 @@
-from flask import Flask, jsonify, request
+from flask import Flask, Response, render_template, request
 import os
 
+from user_store import DuplicateEmail, UserStore, etag, to_json
+
 app = Flask(__name__)
 
+# Пагинация списка пользователей: ?page=2&per_page=20
+DEFAULT_PER_PAGE = 50
+MAX_PER_PAGE = 500
+
+# Журнал записей общий для воркеров gunicorn (см. gunicorn.conf.py)
+users = UserStore([
+    {"name": "Test User 1", "email": "user1@example.com"},
+    {"name": "Test User 2", "email": "user2@example.com"},
+], journal=os.environ.get("USER_STORE_JOURNAL"))
+
+# Неизменяемые ответы сериализуются один раз при старте
+HEALTH_BODY = to_json({"status": "healthy", "service": "demo-app"})
+HEALTH_ETAG = etag(HEALTH_BODY)
+_index = {}
+
+
+def cached_response(body: bytes, tag: str, mimetype: str = "application/json", headers: dict = None) -> Response:
+    """Ответ из готовых байт с ETag; 304, если у клиента та же версия (If-None-Match)"""
+    if request.if_none_match.contains_weak(tag):
+        response = Response(status=304, headers=headers)
+    else:
+        response = Response(body, mimetype=mimetype, headers=headers)
+    response.set_etag(tag)
+    return response
+
+
+def json_response(body: bytes, status: int = 200, headers: dict = None) -> Response:
+    return Response(body, status=status, mimetype="application/json", headers=headers)
+
+
+def error(message: str, status: int) -> Response:
+    return json_response(to_json({"error": message}), status)
+
+
+@app.route('/')
+def index():
+    # Шаблон рендерится один раз на воркер (url_for нужен контекст запроса)
+    if not _index:
+        body = render_template('index.html').encode("utf-8")
+        _index.update(body=body, etag=etag(body))
+    return cached_response(_index["body"], _index["etag"], mimetype="text/html")
+
+
 @app.route('/health')
 def health():
-    return jsonify({"status": "healthy", "service": "demo-app"})
+    return cached_response(HEALTH_BODY, HEALTH_ETAG)
+
+
+@app.route('/ready')
+def ready():
+    return json_response(HEALTH_BODY)
+
+
+@app.route('/api/stats')
+def stats():
+    return json_response(to_json({"users": len(users), "worker_pid": os.getpid()}))
+
 
 @app.route('/api/users')
 def get_users():
-    return jsonify([
-        {"id": 1, "name": "Test User 1", "email": "user1@example.com"},
-        {"id": 2, "name": "Test User 2", "email": "user2@example.com"}
-    ])
+    page = request.args.get('page', 1, type=int)
+    per_page = request.args.get('per_page', DEFAULT_PER_PAGE, type=int)
+    if page < 1 or not 1 <= per_page <= MAX_PER_PAGE:
+        return error(f"page >= 1, 1 <= per_page <= {MAX_PER_PAGE}", 400)
+    body, tag = users.page((page - 1) * per_page, per_page)
+    return cached_response(body, tag, headers={"X-Total-Count": str(len(users))})
+
+
+@app.route('/api/users/<int:user_id>')
+def get_user(user_id):
+    user = users.get(user_id)
+    if user is None:
+        return error("User not found", 404)
+    return json_response(to_json(user))
+
 
 @app.route('/api/users', methods=['POST'])
 def create_user():
-    data = request.get_json()
-    return jsonify({
-        "id": 123,
-        "name": data.get("name"),
-        "email": data.get("email"),
-        "created": True
-    }), 201
+    data = request.get_json(silent=True) or {}
+    name, email = data.get("name"), data.get("email")
+    if not isinstance(name, str) or not isinstance(email, str) or "@" not in email:
+        return error("name and email are required", 400)
+    try:
+        user = users.create(name, email)
+    except DuplicateEmail:
+        return error("Email already exists", 409)
+    return json_response(to_json({**user, "created": True}), 201,
+                         headers={"Location": f"/api/users/{user['id']}"})
+
 
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=int(os.environ.get('PORT', 5050)))
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""Бенчмарк пропускной способности sample-app: req/s напрямую и через nginx
+
+Каждый сценарий гоняется заданное время: --processes процессов по
+--connections keep-alive соединений (процессы нужны, чтобы генератор
+нагрузки не упирался в GIL). Недоступные цели пропускаются.
+
+    docker compose up -d --build
+    python benchmark.py                                  # напрямую (:5050) и через nginx (:8080)
+    python benchmark.py --target direct=http://localhost:5050 --duration 5 --json reports/bench.json
+"""
+import argparse
+import http.client
+import json
+import multiprocessing
+import sys
+import threading
+import time
+import urllib.request
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+DEFAULT_TARGETS = ["direct=http://localhost:5050", "nginx=http://localhost:8080"]
+# Сценарий: путь и нужен ли условный запрос с ETag из первого ответа
+SCENARIOS = {
+    "health": ("/health", False),
+    "users": ("/api/users", False),
+    "users-304": ("/api/users", True),
+    "index": ("/", False),
+}
+
+
+def fetch_etag(base_url: str, path: str) -> Optional[str]:
+    with urllib.request.urlopen(base_url + path, timeout=5) as response:
+        return response.headers.get("ETag")
+
+
+def connection_loop(base_url: str, path: str, headers: dict, deadline: float, result: dict):
+    """Запросы по одному keep-alive соединению до deadline"""
+    parts = urlsplit(base_url)
+    connection = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=10)
+    latencies = []
+    errors = 0
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        try:
+            connection.request("GET", path, headers=headers)
+            response = connection.getresponse()
+            response.read()
+            if response.status >= 400:
+                errors += 1
+            else:
+                latencies.append(time.perf_counter() - started)
+        except (OSError, http.client.HTTPException):
+            errors += 1
+            connection.close()
+    connection.close()
+    result["latencies"].extend(latencies)
+    result["errors"] += errors
+
+
+def process_run(args) -> dict:
+    """Нагрузка одного процесса: connections потоков до общего deadline"""
+    base_url, path, headers, connections, deadline = args
+    result = {"latencies": [], "errors": 0}
+    threads = [threading.Thread(target=connection_loop, args=(base_url, path, headers, deadline, result))
+               for _ in range(connections)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return result
+
+
+def run_scenario(pool, base_url: str, path: str, headers: dict, processes: int, connections: int,
+                 duration: float) -> dict:
+    started = time.perf_counter()
+    deadline = started + duration
+    results = pool.map(process_run, [(base_url, path, headers, connections, deadline)] * processes)
+    elapsed = time.perf_counter() - started
+    latencies = sorted(latency for result in results for latency in result["latencies"])
+    count = len(latencies)
+    return {
+        "requests": count,
+        "errors": sum(result["errors"] for result in results),
+        "rps": round(count / elapsed, 1),
+        "p50_ms": round(latencies[count // 2] * 1000, 2) if count else None,
+        "p99_ms": round(latencies[min(count - 1, int(count * 0.99))] * 1000, 2) if count else None,
+    }
+
+
+def is_up(base_url: str) -> bool:
+    try:
+        with urllib.request.urlopen(base_url + "/health", timeout=3) as response:
+            return response.status == 200
+    except OSError:
+        return False
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="req/s sample-app напрямую и через nginx")
+    parser.add_argument("--target", action="append", help="имя=URL (по умолчанию direct и nginx)")
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS), help="По умолчанию все")
+    parser.add_argument("--duration", type=float, default=10.0, help="Секунд на сценарий")
+    parser.add_argument("--processes", type=int, default=multiprocessing.cpu_count())
+    parser.add_argument("--connections", type=int, default=8, help="Соединений на процесс")
+    parser.add_argument("--json", help="Записать результаты в JSON")
+    args = parser.parse_args()
+
+    results: Dict[str, Dict[str, dict]] = {}
+    with multiprocessing.Pool(args.processes) as pool:
+        for target in args.target or DEFAULT_TARGETS:
+            name, base_url = target.split("=", 1)
+            base_url = base_url.rstrip("/")
+            if not is_up(base_url):
+                print(f"⚠️  {name} ({base_url}) недоступен, пропускаем")
+                continue
+            results[name] = {}
+            for scenario in args.scenario or list(SCENARIOS):
+                path, conditional = SCENARIOS[scenario]
+                headers = {}
+                if conditional:
+                    headers["If-None-Match"] = fetch_etag(base_url, path) or ""
+                stats = run_scenario(pool, base_url, path, headers, args.processes, args.connections, args.duration)
+                results[name][scenario] = stats
+                print(f"{name:<8} {scenario:<10} {stats['rps']:>9.1f} req/s  p50 {stats['p50_ms']} ms  "
+                      f"p99 {stats['p99_ms']} ms  errors {stats['errors']}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"processes": args.processes, "connections": args.connections,
+                       "duration": args.duration, "results": results}, f, indent=2)
+    return 0 if results else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
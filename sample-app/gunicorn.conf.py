@@ -0,0 +1,37 @@
+# Конфигурация gunicorn: gunicorn -c gunicorn.conf.py app:app
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 5050)}"
+# Процессы обходят GIL, потоки в каждом перекрывают ожидание сети
+workers = int(os.environ.get("WEB_CONCURRENCY", multiprocessing.cpu_count() * 2 + 1))
+worker_class = "gthread"
+threads = int(os.environ.get("GUNICORN_THREADS", 4))
+# Соединения от nginx переиспользуются (upstream keepalive в nginx.conf)
+keepalive = 30
+# Запись лога на каждый запрос заметно снижает req/s; включается через ACCESS_LOG=-
+accesslog = os.environ.get("ACCESS_LOG")
+
+
+# Журнал, созданный этим запуском (удаляется при остановке); None - путь задан в USER_STORE_JOURNAL
+_own_journal = None
+
+
+def on_starting(server):
+    """Общий журнал созданных пользователей: POST в одном воркере виден всем (user_store.py)
+
+    Журнал из USER_STORE_JOURNAL не трогается: пользователи в нем переживают
+    перезапуск. Без переменной журнал временный - пустой при старте и
+    удаляется при остановке.
+    """
+    global _own_journal
+    if os.environ.get("USER_STORE_JOURNAL"):
+        return
+    _own_journal = f"/tmp/sample-app-users-{os.getpid()}.ndjson"
+    open(_own_journal, "w").close()
+    os.environ["USER_STORE_JOURNAL"] = _own_journal
+
+
+def on_exit(server):
+    if _own_journal and os.path.exists(_own_journal):
+        os.remove(_own_journal)
@@ -0,0 +1,11 @@
+// Список пользователей на главной странице (запрос попадает в Resource Timing)
+fetch('/api/users')
+    .then(response => response.json())
+    .then(users => {
+        const list = document.getElementById('users');
+        for (const user of users) {
+            const item = document.createElement('li');
+            item.textContent = `${user.name} <${user.email}>`;
+            list.appendChild(item);
+        }
+    });
@@ -0,0 +1,126 @@
+"""Хранилище пользователей в памяти с индексами и готовыми ответами
+
+Пользователи лежат в словаре по id (порядок вставки = порядок id), email
+проиндексирован для проверки уникальности. Страницы списка сериализуются
+один раз: байты JSON и ETag кэшируются до следующей записи, так что
+повторные GET не строят и не сериализуют список заново.
+
+У каждого воркера gunicorn своя копия в памяти. Чтобы созданный через POST
+пользователь был виден всем воркерам, записи идут в общий журнал (NDJSON,
+USER_STORE_JOURNAL): запись - под flock, чтение - дочитывание новых строк
+журнала, если файл вырос (один stat на запрос).
+"""
+import fcntl
+import hashlib
+import itertools
+import json
+import os
+import threading
+from typing import Dict, List, Optional, Tuple
+
+# Кэш страниц ограничен: произвольные offset/limit не раздувают память
+MAX_CACHED_PAGES = 256
+
+
+def to_json(data) -> bytes:
+    """Компактный JSON в UTF-8"""
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def etag(body: bytes) -> str:
+    """ETag (без кавычек) по содержимому: одинаковые данные дают одинаковый ETag во всех воркерах"""
+    return hashlib.blake2b(body, digest_size=16).hexdigest()
+
+
+class DuplicateEmail(ValueError):
+    pass
+
+
+class UserStore:
+    def __init__(self, users: Optional[List[dict]] = None, journal: Optional[str] = None):
+        self._lock = threading.Lock()
+        self._by_id: Dict[int, dict] = {}
+        self._by_email: Dict[str, int] = {}
+        self._next_id = 1
+        # (offset, limit) -> (тело, ETag); сбрасывается при записи
+        self._pages: Dict[Tuple[int, int], Tuple[bytes, str]] = {}
+        # Начальные пользователи одинаковы во всех воркерах и в журнал не пишутся
+        for user in users or []:
+            self._add(user["name"], user["email"])
+        self.journal = journal
+        self._journal_offset = 0
+        self.sync()
+
+    def __len__(self):
+        self.sync()
+        return len(self._by_id)
+
+    def get(self, user_id: int) -> Optional[dict]:
+        self.sync()
+        return self._by_id.get(user_id)
+
+    def create(self, name: str, email: str) -> dict:
+        """Добавить пользователя; DuplicateEmail, если email уже занят"""
+        with self._lock:
+            if not self.journal:
+                return self._add(name, email)
+            with open(self.journal, "ab+") as f:
+                fcntl.flock(f, fcntl.LOCK_EX)
+                try:
+                    # Под блокировкой журнала: сначала записи других воркеров
+                    self._replay(f)
+                    user = self._add(name, email)
+                    f.write(to_json({"name": name, "email": email}) + b"\n")
+                    f.flush()
+                    self._journal_offset = f.tell()
+                finally:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+            return user
+
+    def page(self, offset: int, limit: int) -> Tuple[bytes, str]:
+        """Сериализованная страница списка и ее ETag"""
+        self.sync()
+        # Поиск и запись в кэш под той же блокировкой, что и create: иначе страница,
+        # собранная до записи, могла бы попасть в кэш после его сброса
+        with self._lock:
+            cached = self._pages.get((offset, limit))
+            if cached is None:
+                users = list(itertools.islice(self._by_id.values(), offset, offset + limit))
+                body = to_json(users)
+                cached = (body, etag(body))
+                if len(self._pages) < MAX_CACHED_PAGES:
+                    self._pages[(offset, limit)] = cached
+        return cached
+
+    def sync(self):
+        """Применить записи других воркеров, если журнал вырос"""
+        if not self.journal:
+            return
+        try:
+            size = os.path.getsize(self.journal)
+        except FileNotFoundError:
+            return
+        if size > self._journal_offset:
+            with self._lock, open(self.journal, "rb") as f:
+                self._replay(f)
+
+    def _replay(self, f):
+        f.seek(self._journal_offset)
+        data = f.read()
+        # Строка, которую другой воркер еще дописывает, применится в следующий раз
+        complete = data[:data.rfind(b"\n") + 1]
+        for line in complete.splitlines():
+            entry = json.loads(line)
+            self._add(entry["name"], entry["email"])
+        self._journal_offset += len(complete)
+
+    def _add(self, name: str, email: str) -> dict:
+        key = email.strip().lower()
+        if key in self._by_email:
+            raise DuplicateEmail(email)
+        user = {"id": self._next_id, "name": name, "email": email}
+        self._by_id[user["id"]] = user
+        self._by_email[key] = user["id"]
+        self._next_id += 1
+        self._pages = {}
+        return user
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""Синхронизация вендоренных копий общих модулей тестов
+
+Плагины и утилиты тестов пишутся один раз в 01-tests-in-container/src/.
+Образ тестов 02-microservice-testing собирается из своего каталога
+(./tests) и не видит 01-tests-in-container, поэтому ему нужна копия
+модуля рядом с тестами. Копии не редактируются руками:
+
+    python scripts/sync_vendored.py           # перезаписать копии из оригиналов
+    python scripts/sync_vendored.py --check   # код 1 и diff, если копия разошлась (CI)
+"""
+import argparse
+import difflib
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# копия -> оригинал (пути от корня репозитория)
+VENDORED = {
+    "02-microservice-testing/tests/http_budget.py": "01-tests-in-container/src/http_budget.py",
+    "02-microservice-testing/tests/sharding.py": "01-tests-in-container/src/sharding.py",
+}
+
+
+def read(path: str) -> str:
+    with open(os.path.join(ROOT, path), encoding="utf-8") as f:
+        return f.read()
+
+
+def drifted() -> dict:
+    """Разошедшиеся копии: {копия: unified diff от оригинала}"""
+    result = {}
+    for copy, original in VENDORED.items():
+        expected, actual = read(original), read(copy)
+        if expected != actual:
+            result[copy] = "".join(difflib.unified_diff(
+                expected.splitlines(keepends=True), actual.splitlines(keepends=True), original, copy
+            ))
+    return result
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Вендоренные копии общих модулей тестов")
+    parser.add_argument("--check", action="store_true", help="Только проверить, ничего не записывать")
+    args = parser.parse_args()
+
+    if args.check:
+        diffs = drifted()
+        for copy, diff in diffs.items():
+            print(f"❌ {copy} differs from {VENDORED[copy]}:\n{diff}")
+        if diffs:
+            print("Run: python scripts/sync_vendored.py")
+            return 1
+        print(f"✅ {len(VENDORED)} vendored copies are up to date")
+        return 0
+
+    for copy, original in VENDORED.items():
+        with open(os.path.join(ROOT, copy), "w", encoding="utf-8") as f:
+            f.write(read(original))
+        print(f"{original} -> {copy}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())